@@ -1,8 +1,25 @@
 from sequencescape.api import connect_to_sequencescape
+from sequencescape.async_api import connect_to_sequencescape_async
 from sequencescape.models import NamedModel, InternalIdModel, AccessionNumberModel, Sample, Study, Library, Well, \
     MultiplexedLibrary
 from sequencescape.enums import Property
 from sequencescape.mappers import Mapper, LibraryMapper, MultiplexedLibraryMapper, SampleMapper, WellMapper, StudyMapper
 from sequencescape.json_converters import SampleJSONEncoder, SampleJSONDecoder, StudyJSONEncoder, StudyJSONDecoder,\
     LibraryJSONEncoder, LibraryJSONDecoder, MultiplexedLibraryJSONEncoder, MultiplexedLibraryJSONDecoder, \
-    WellJSONEncoder, WellJSONDecoder
\ No newline at end of file
+    WellJSONEncoder, WellJSONDecoder, FastSampleJSONEncoder, FastSampleJSONDecoder, FastStudyJSONEncoder, \
+    FastStudyJSONDecoder, FastLibraryJSONEncoder, FastLibraryJSONDecoder, FastMultiplexedLibraryJSONEncoder, \
+    FastMultiplexedLibraryJSONDecoder, FastWellJSONEncoder, FastWellJSONDecoder
+from sequencescape.caching import ModelCache, CacheStatistics, CachingSampleMapper, CachingStudyMapper, \
+    CachingLibraryMapper, CachingMultiplexedLibraryMapper, CachingWellMapper
+from sequencescape.batching import BatchingSampleMapper, BatchingStudyMapper, BatchingLibraryMapper, \
+    BatchingMultiplexedLibraryMapper, BatchingWellMapper
+from sequencescape.mirror import SequencescapeMirror, MirrorSyncStatistics, create_mirror
+from sequencescape.compact_models import CompactModel, CompactSample, CompactStudy, CompactLibrary, \
+    CompactMultiplexedLibrary, CompactWell
+from sequencescape.columnar import ColumnarModels
+from sequencescape.ndjson import NDJSONWriter, NDJSONReader, write_ndjson, read_ndjson, export_ndjson, import_ndjson
+from sequencescape.binary_codec import BinaryModels, encode_models, decode_models
+from sequencescape.lookup_index import LookupIndex, IndexedSampleMapper, IndexedStudyMapper, IndexedLibraryMapper, \
+    IndexedMultiplexedLibraryMapper, IndexedWellMapper
+from sequencescape.in_memory import InMemoryDatabase, InMemorySampleMapper, InMemoryStudyMapper, \
+    InMemoryLibraryMapper, InMemoryMultiplexedLibraryMapper, InMemoryWellMapper
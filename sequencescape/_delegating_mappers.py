@@ -0,0 +1,56 @@
+from typing import Union, Any, Iterable, Sequence, Tuple, Optional, Iterator
+
+from sequencescape.mappers import Mapper, MappedType, SampleMapper, StudyMapper
+from sequencescape.models import Sample, Study
+
+
+class DelegatingMapper(Mapper[MappedType]):
+    """
+    Mapper that passes all operations on to another mapper. Subclasses override the operations they change.
+    """
+    def __init__(self, mapper: Mapper[MappedType]):
+        """
+        Constructor.
+        :param mapper: the mapper to which operations are passed on
+        """
+        self._mapper = mapper
+
+    def add(self, models: Union[MappedType, Iterable[MappedType]]):
+        self._mapper.add(models)
+
+    def get_all(self) -> Sequence[MappedType]:
+        return self._mapper.get_all()
+
+    def iter_all(self) -> Iterator[MappedType]:
+        return self._mapper.iter_all()
+
+    def iter_by_property_value(self, property: Union[str, Union[Tuple[str, Any]], Iterable[Tuple[str, Any]]],
+                               values: Optional[Union[Any, Iterable[Any]]]=None) -> Iterator[MappedType]:
+        return self._mapper.iter_by_property_value(property, values)
+
+    def _get_by_property_value_sequence(self, property: str, values: Iterable[Any]) -> Sequence[MappedType]:
+        return self._mapper._get_by_property_value_sequence(property, values)
+
+
+class DelegatingSampleMapper(DelegatingMapper[Sample], SampleMapper):
+    """
+    `SampleMapper` that passes all operations on to another `SampleMapper`.
+    """
+    def set_association_with_study(self, samples: Union[Sample, Iterable[Sample]],
+                                   study: Union[Study, Iterable[Study]]):
+        self._mapper.set_association_with_study(samples, study)
+
+    def get_associated_with_study(self, studies: Union[Study, Iterable[Study]]) -> Sequence[Sample]:
+        return self._mapper.get_associated_with_study(studies)
+
+
+class DelegatingStudyMapper(DelegatingMapper[Study], StudyMapper):
+    """
+    `StudyMapper` that passes all operations on to another `StudyMapper`.
+    """
+    def set_association_with_sample(self, studies: Union[Study, Iterable[Study]],
+                                    sample: Union[Sample, Iterable[Sample]]):
+        self._mapper.set_association_with_sample(studies, sample)
+
+    def get_associated_with_sample(self, samples: Union[Sample, Iterable[Sample]]) -> Sequence[Study]:
+        return self._mapper.get_associated_with_sample(samples)
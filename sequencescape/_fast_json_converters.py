@@ -0,0 +1,165 @@
+from json import JSONEncoder, JSONDecoder
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from hgijson import JsonPropertyMapping
+from hgijson.json.interfaces import ParsedJSONDecoder
+
+
+class SimpleJsonPropertyMapping(JsonPropertyMapping):
+    """
+    Mapping between a JSON property and an object property of the same value, which keeps the names of the properties so
+    that specialised JSON encoders/decoders can be generated from it.
+    """
+    def __init__(self, json_property_name: str, object_property_name: str):
+        """
+        Constructor.
+        :param json_property_name: the name of the JSON property
+        :param object_property_name: the name of the object property, which must also be the name of the parameter
+        through which the object's constructor sets it
+        """
+        super().__init__(json_property_name, object_property_name)
+        self.json_property_name = json_property_name
+        self.object_property_name = object_property_name
+
+
+def _get_property_names(mapping_converter_cls: type) -> List[Tuple[str, str]]:
+    """
+    Gets the names of the properties mapped by the given hgijson encoder or decoder, in the order in which it maps them.
+    :param mapping_converter_cls: the encoder or decoder, built by a hgijson builder
+    :return: tuples containing the name of each JSON property and the name of the object property it maps to
+    """
+    property_names = []    # type: List[Tuple[str, str]]
+    for mapping in mapping_converter_cls._get_property_mappings(mapping_converter_cls):
+        if not isinstance(mapping, SimpleJsonPropertyMapping):
+            raise ValueError("Cannot generate a JSON converter from mapping `%s` that is not a `%s`"
+                             % (mapping, SimpleJsonPropertyMapping.__name__))
+        if not mapping.object_property_name.isidentifier():
+            raise ValueError("Object property name `%s` is not an identifier" % mapping.object_property_name)
+        names = (mapping.json_property_name, mapping.object_property_name)
+        # Mappings of a property can be repeated (e.g. through more than one superclass), with the first setting the
+        # position of the property in the JSON
+        if names not in property_names:
+            property_names.append(names)
+    return property_names
+
+
+def _generate_function(name: str, source_lines: Sequence[str], namespace: Dict[str, Any]) -> Callable:
+    """
+    Generates a function from the given source code.
+    :param name: the name of the function
+    :param source_lines: the lines of source code of the function, including its definition
+    :param namespace: the global namespace of the function
+    :return: the function
+    """
+    exec("\n".join(source_lines), namespace)
+    return namespace[name]
+
+
+def _generate_encode_function(property_names: List[Tuple[str, str]]) -> Callable[[Any], Dict[str, Any]]:
+    """
+    Generates a function that encodes an object with the given properties as a dictionary, with the same keys (in the
+    same order) as a hgijson encoder.
+    :param property_names: see `_get_property_names`
+    :return: the function
+    """
+    items = ["%r: obj.%s" % (json_property_name, object_property_name)
+             for json_property_name, object_property_name in property_names]
+    return _generate_function("encode", ["def encode(obj):", "    return {%s}" % ", ".join(items)], {})
+
+
+def _generate_decode_function(target_cls: type, property_names: List[Tuple[str, str]]) \
+        -> Callable[[Dict[str, Any]], Any]:
+    """
+    Generates a function that decodes an object of the given type from a dictionary, setting its properties through its
+    constructor.
+    :param target_cls: the type of object to decode
+    :param property_names: see `_get_property_names`
+    :return: the function
+    """
+    arguments = ["%s=obj_as_json[%r]" % (object_property_name, json_property_name)
+                 for json_property_name, object_property_name in property_names]
+    return _generate_function(
+        "decode", ["def decode(obj_as_json):", "    return target_cls(%s)" % ", ".join(arguments)],
+        {"target_cls": target_cls})
+
+
+class FastJSONEncoderClassBuilder:
+    """
+    Builder of JSON encoders that produce the same JSON as a hgijson encoder, using a function generated from its
+    property mappings rather than going through hgijson's property mapping machinery for each object.
+    """
+    def __init__(self, target_cls: type, mapping_encoder_cls: type):
+        """
+        Constructor.
+        :param target_cls: the class that the encoder targets
+        :param mapping_encoder_cls: the hgijson encoder to produce the same JSON as, whose mappings must all be
+        `SimpleJsonPropertyMapping`
+        """
+        self.target_cls = target_cls
+        self.mapping_encoder_cls = mapping_encoder_cls
+
+    def build(self) -> type:
+        """
+        Build a subclass of `JSONEncoder`.
+        :return: the built subclass
+        """
+        target_cls = self.target_cls
+        encode = _generate_encode_function(_get_property_names(self.mapping_encoder_cls))
+
+        def default(encoder: JSONEncoder, serializable: Any) -> Any:
+            if isinstance(serializable, target_cls):
+                return encode(serializable)
+            if isinstance(serializable, List):
+                # Consistent with hgijson encoders, which encode lists given to `default`
+                return [encoder.default(item) for item in serializable]
+            return JSONEncoder.default(encoder, serializable)
+
+        return type(
+            "%sFastJSONEncoder" % target_cls.__name__,
+            (JSONEncoder, ),
+            {
+                "default": default,
+                "encode_object": staticmethod(encode)
+            }
+        )
+
+
+class FastJSONDecoderClassBuilder:
+    """
+    Builder of JSON decoders that decode the same objects as a hgijson decoder, using a function generated from its
+    property mappings rather than going through hgijson's property mapping machinery for each object.
+    """
+    def __init__(self, target_cls: type, mapping_decoder_cls: type):
+        """
+        Constructor.
+        :param target_cls: the class that the decoder targets
+        :param mapping_decoder_cls: the hgijson decoder to decode the same objects as, whose mappings must all be
+        `SimpleJsonPropertyMapping`
+        """
+        self.target_cls = target_cls
+        self.mapping_decoder_cls = mapping_decoder_cls
+
+    def build(self) -> type:
+        """
+        Build a subclass of `JSONDecoder` (and of hgijson's `ParsedJSONDecoder`).
+        :return: the built subclass
+        """
+        decode_object = _generate_decode_function(self.target_cls, _get_property_names(self.mapping_decoder_cls))
+
+        def decode(decoder: JSONDecoder, json_as_string: str, **kwargs) -> Any:
+            return decoder.decode_parsed(JSONDecoder.decode(decoder, json_as_string, **kwargs))
+
+        def decode_parsed(decoder: JSONDecoder, parsed_json: Any) -> Any:
+            if isinstance(parsed_json, list):
+                return [decode_object(item) for item in parsed_json]
+            return decode_object(parsed_json)
+
+        return type(
+            "%sFastJSONDecoder" % self.target_cls.__name__,
+            (JSONDecoder, ParsedJSONDecoder),
+            {
+                "decode": decode,
+                "decode_parsed": decode_parsed,
+                "decode_object": staticmethod(decode_object)
+            }
+        )
@@ -1,27 +1,244 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from threading import Lock, local
+from typing import Iterator
+
+from hgicommon.models import Model
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
+
+from sequencescape._sqlalchemy.instrumentation import Instrumentation
+
+
+class ConnectionPoolStatistics(Model):
+    """
+    Model of the usage statistics of a database connection pool.
+    """
+    def __init__(self, connections_created: int=0, checkouts: int=0, checkins: int=0, checked_out: int=0,
+                 disconnects_detected: int=0, pool_size: int=None, idle: int=None, overflow: int=None):
+        """
+        Constructor.
+        :param connections_created: number of new DBAPI connections that have been opened
+        :param checkouts: number of times a connection has been checked out of the pool
+        :param checkins: number of times a connection has been returned to the pool
+        :param checked_out: number of connections currently checked out of the pool
+        :param disconnects_detected: number of stale connections found (and replaced) by pre-ping
+        :param pool_size: the size of the pool. `None` if the pool is not of a fixed size
+        :param idle: number of connections currently idle in the pool. `None` if the pool does not keep connections
+        :param overflow: number of connections currently open above the pool size. `None` if the pool does not overflow
+        """
+        self.connections_created = connections_created
+        self.checkouts = checkouts
+        self.checkins = checkins
+        self.checked_out = checked_out
+        self.disconnects_detected = disconnects_detected
+        self.pool_size = pool_size
+        self.idle = idle
+        self.overflow = overflow
 
 
 class SQLAlchemyDatabaseConnector:
     """
     Database connector for use with SQLAlchemy.
+
+    The connector owns a single engine (and therefore a single connection pool) and a single session factory, both of
+    which are created upon first use and then reused for the lifetime of the connector.
     """
-    def __init__(self, database_location: str):
+    def __init__(self, database_location: str, pool_size: int=None, max_overflow: int=None, pool_recycle: int=None,
+                 pool_pre_ping: bool=False, slow_query_threshold: float=None):
         """
         Default constructor.
         :param database_location: the url of the database that connections can be made to.
+        :param pool_size: the number of connections to keep open in the pool. `None` to use the dialect's default
+        :param max_overflow: the number of connections that can be opened above `pool_size` when under load. `None` to
+        use the dialect's default
+        :param pool_recycle: number of seconds after which a connection is replaced, which should be set to be less
+        than the database server's idle connection timeout. `None` to never recycle connections
+        :param pool_pre_ping: whether to test connections are alive when they are checked out of the pool, replacing
+        them transparently if not
+        :param slow_query_threshold: the number of seconds above which queries are logged as slow. `None` to not log
+        slow queries
         """
-        self._engine = None
         self._database_location = database_location
+        self._pool_size = pool_size
+        self._max_overflow = max_overflow
+        self._pool_recycle = pool_recycle
+        self._pool_pre_ping = pool_pre_ping
+
+        self._engine = None     # type: Engine
+        self._session_factory = None    # type: sessionmaker
+        self._engine_lock = Lock()
+        self._shared_sessions = local()
+        self._instrumentation = Instrumentation(slow_query_threshold)
+
+        self._statistics_lock = Lock()
+        self._connections_created = 0
+        self._checkouts = 0
+        self._checkins = 0
+        self._disconnects_detected = 0
+
+    @property
+    def engine(self) -> Engine:
+        """
+        Gets the engine through which connections to the database are made, creating it if it does not yet exist.
+        :return: the engine
+        """
+        if self._engine is None:
+            with self._engine_lock:
+                if self._engine is None:
+                    engine = self._create_engine()
+                    self._session_factory = sessionmaker(bind=engine)
+                    self._engine = engine
+        return self._engine
+
+    @property
+    def instrumentation(self) -> Instrumentation:
+        """
+        Gets the instrumentation that records the queries made through this connector.
+        :return: the instrumentation
+        """
+        return self._instrumentation
 
     def create_session(self) -> Session:
         """
         Creates a SQLAlchemy session, which is used to interact with the database.
         :return: connected database session
         """
-        if not self._engine:
-            self._engine = create_engine(self._database_location)
+        if self._session_factory is None:
+            assert self.engine is not None
+        return self._session_factory()
+
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        """
+        Context manager that provides a session, which is committed if the block exits normally, rolled back if an
+        exception is raised and closed (returning its connection to the pool) in both cases.
+
+        If the current thread is within a shared session scope, its session is provided instead and is left for the
+        shared session scope to commit.
+        :return: the session to use within the block
+        """
+        shared_session = getattr(self._shared_sessions, "session", None)
+        if shared_session is not None:
+            yield shared_session
+            return
+
+        session = self.create_session()
+        try:
+            yield session
+            session.commit()
+        except:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @contextmanager
+    def shared_session_scope(self) -> Iterator[Session]:
+        """
+        Context manager that provides a session that is used by all session scopes entered by the current thread
+        within the block, so that they share a single connection and transaction. The session is committed once, if
+        the block exits normally, or rolled back if an exception is raised. Nested shared session scopes use the
+        outermost one's session.
+        :return: the shared session
+        """
+        if self.in_shared_session_scope():
+            yield self._shared_sessions.session
+            return
 
-        Session = sessionmaker(bind=self._engine)
-        session = Session()
-        return session
+        with self.session_scope() as session:
+            self._shared_sessions.session = session
+            try:
+                yield session
+            finally:
+                self._shared_sessions.session = None
+
+    def in_shared_session_scope(self) -> bool:
+        """
+        Gets whether the current thread is within a shared session scope.
+        :return: whether in a shared session scope
+        """
+        return getattr(self._shared_sessions, "session", None) is not None
+
+    def get_pool_statistics(self) -> ConnectionPoolStatistics:
+        """
+        Gets statistics about the usage of the connection pool.
+        :return: the connection pool statistics
+        """
+        with self._statistics_lock:
+            statistics = ConnectionPoolStatistics(
+                connections_created=self._connections_created, checkouts=self._checkouts, checkins=self._checkins,
+                checked_out=self._checkouts - self._checkins, disconnects_detected=self._disconnects_detected)
+
+        if self._engine is not None and isinstance(self._engine.pool, QueuePool):
+            pool = self._engine.pool    # type: QueuePool
+            statistics.pool_size = pool.size()
+            statistics.idle = pool.checkedin()
+            statistics.overflow = max(pool.overflow(), 0)
+        return statistics
+
+    def dispose(self):
+        """
+        Closes all idle connections in the pool. Connections that are checked out are closed when they are returned.
+        The connector can continue to be used afterwards, in which case new connections will be opened.
+        """
+        if self._engine is not None:
+            self._engine.dispose()
+
+    def _create_engine(self) -> Engine:
+        """
+        Creates an engine, configured with the pool settings given to this connector.
+        :return: the created engine
+        """
+        engine_kwargs = {}
+        # Only the options that have been set are passed as some dialects' default pools (e.g. SQLite's) do not accept
+        # the sizing options. If sizing is requested, a queue pool (the default for server databases) is used
+        if self._pool_size is not None or self._max_overflow is not None:
+            engine_kwargs["poolclass"] = QueuePool
+        if self._pool_size is not None:
+            engine_kwargs["pool_size"] = self._pool_size
+        if self._max_overflow is not None:
+            engine_kwargs["max_overflow"] = self._max_overflow
+        if self._pool_recycle is not None:
+            engine_kwargs["pool_recycle"] = self._pool_recycle
+
+        engine = create_engine(self._database_location, **engine_kwargs)
+
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        self._instrumentation.attach(engine)
+        return engine
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        """
+        Called when the pool opens a new DBAPI connection.
+        """
+        with self._statistics_lock:
+            self._connections_created += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        """
+        Called when a connection is checked out of the pool. Tests the connection if pre-ping is enabled.
+        """
+        if self._pool_pre_ping:
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+            except Exception as e:
+                with self._statistics_lock:
+                    self._disconnects_detected += 1
+                # The pool reacts to this error by replacing the connection and retrying the checkout
+                raise exc.DisconnectionError() from e
+            cursor.close()
+
+        with self._statistics_lock:
+            self._checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        """
+        Called when a connection is returned to the pool.
+        """
+        with self._statistics_lock:
+            self._checkins += 1
@@ -0,0 +1,339 @@
+import collections
+import logging
+import time
+from contextlib import contextmanager
+from threading import Lock, local
+from typing import Dict, Callable, Iterator, Optional, List, Any
+
+from hgicommon.models import Model
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds (in seconds) of the buckets of the latency histograms
+LATENCY_HISTOGRAM_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+# Logger to which queries slower than the threshold are logged
+slow_query_logger = logging.getLogger("sequencescape.slow_queries")
+
+_hook_error_logger = logging.getLogger(__name__)
+
+# Attribute of a query's execution context in which the time at which it started executing is held
+_START_TIME_ATTRIBUTE = "_sequencescape_query_start_time"
+
+
+class OperationRecord(Model):
+    """
+    Model of what happened during a single call to a mapper operation.
+    """
+    def __init__(self, operation: str=None, duration: float=0.0, database_time: float=0.0,
+                 conversion_time: float=0.0, queries: int=0, rows_returned: int=0, models_converted: int=0):
+        """
+        Constructor.
+        :param operation: the name of the operation, prefixed with the name of the type of model the mapper deals with
+        :param duration: the number of seconds that the operation took
+        :param database_time: the number of seconds spent executing queries in the database
+        :param conversion_time: the number of seconds spent converting results into models
+        :param queries: the number of queries executed
+        :param rows_returned: the number of rows returned by the queries that got models
+        :param models_converted: the number of models that rows were converted into
+        """
+        self.operation = operation
+        self.duration = duration
+        self.database_time = database_time
+        self.conversion_time = conversion_time
+        self.queries = queries
+        self.rows_returned = rows_returned
+        self.models_converted = models_converted
+
+
+class OperationStatistics(Model):
+    """
+    Model of the statistics of all the calls made to a mapper operation.
+    """
+    def __init__(self, calls: int=0, total_time: float=0.0, max_time: float=0.0, database_time: float=0.0,
+                 conversion_time: float=0.0, queries: int=0, rows_returned: int=0, models_converted: int=0,
+                 latency_histogram: Dict[float, int]=None):
+        """
+        Constructor.
+        :param calls: the number of calls made to the operation
+        :param total_time: the total number of seconds that the calls took
+        :param max_time: the number of seconds that the slowest call took
+        :param database_time: the total number of seconds spent executing queries in the database
+        :param conversion_time: the total number of seconds spent converting results into models
+        :param queries: the total number of queries executed
+        :param rows_returned: the total number of rows returned by the queries that got models
+        :param models_converted: the total number of models that rows were converted into
+        :param latency_histogram: the number of calls that took at most each number of seconds in
+        `LATENCY_HISTOGRAM_BUCKETS` (and longer than the number of seconds of the bucket before)
+        """
+        self.calls = calls
+        self.total_time = total_time
+        self.max_time = max_time
+        self.database_time = database_time
+        self.conversion_time = conversion_time
+        self.queries = queries
+        self.rows_returned = rows_returned
+        self.models_converted = models_converted
+        self.latency_histogram = latency_histogram if latency_histogram is not None \
+            else collections.OrderedDict((bucket, 0) for bucket in LATENCY_HISTOGRAM_BUCKETS)
+
+
+class QueryStatistics(Model):
+    """
+    Model of a snapshot of the statistics of the queries made through a connection.
+    """
+    def __init__(self, operations: Dict[str, OperationStatistics]=None, queries: int=0, database_time: float=0.0,
+                 slow_queries: int=0, failed_queries: int=0):
+        """
+        Constructor.
+        :param operations: statistics of each mapper operation that has been called, by operation name
+        :param queries: the total number of queries executed (including those that failed), including those not made by
+        mapper operations
+        :param database_time: the total number of seconds spent executing queries in the database
+        :param slow_queries: the number of queries that took longer than the slow query threshold
+        :param failed_queries: the number of queries that failed
+        """
+        self.operations = operations if operations is not None else {}
+        self.queries = queries
+        self.database_time = database_time
+        self.slow_queries = slow_queries
+        self.failed_queries = failed_queries
+
+
+class Instrumentation:
+    """
+    Records the queries made through an engine and the mapper operations that they were made for.
+
+    Operations are recorded on the thread that they are called on. Work that an operation does on other threads (e.g.
+    parallel queries) is attributed to it by activating its record on those threads.
+    """
+    def __init__(self, slow_query_threshold: float=None, timer: Callable[[], float]=time.perf_counter):
+        """
+        Constructor.
+        :param slow_query_threshold: the number of seconds above which queries are logged to `slow_query_logger`.
+        `None` to not log slow queries
+        :param timer: function that gets the current time, in seconds
+        """
+        self._slow_query_threshold = slow_query_threshold
+        self._timer = timer
+        self._lock = Lock()
+        self._current = local()
+        self._hooks = []    # type: List[Callable[[OperationRecord], None]]
+        self._operations = {}   # type: Dict[str, OperationStatistics]
+        self._queries = 0
+        self._database_time = 0.0
+        self._slow_queries = 0
+        self._failed_queries = 0
+
+    @property
+    def timer(self) -> Callable[[], float]:
+        """
+        Gets the function used to get the current time.
+        :return: the timer function
+        """
+        return self._timer
+
+    def attach(self, engine: Engine):
+        """
+        Starts recording the queries that are executed through the given engine.
+        :param engine: the engine to record queries of
+        """
+        event.listen(engine, "before_cursor_execute", self._on_before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._on_after_cursor_execute)
+        event.listen(engine, "handle_error", self._on_handle_error)
+
+    def add_hook(self, hook: Callable[[OperationRecord], None]):
+        """
+        Adds a function that is called with the record of each operation when it finishes.
+        :param hook: the function to add. It is called on the thread that made the operation
+        """
+        with self._lock:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook: Callable[[OperationRecord], None]):
+        """
+        Removes a function previously added with `add_hook`.
+        :param hook: the function to remove
+        """
+        with self._lock:
+            self._hooks.remove(hook)
+
+    def current_record(self) -> Optional[OperationRecord]:
+        """
+        Gets the record of the operation that is active on the current thread.
+        :return: the active operation's record. `None` if no operation is active
+        """
+        return getattr(self._current, "record", None)
+
+    @contextmanager
+    def operation(self, name: str) -> Iterator[OperationRecord]:
+        """
+        Context manager that records the block as a call to the operation with the given name. If another operation is
+        already active on the current thread, the block is recorded as part of it instead.
+        :param name: the name of the operation
+        :return: the record of the active operation
+        """
+        record = self.current_record()
+        if record is not None:
+            yield record
+            return
+
+        record = OperationRecord(operation=name)
+        started = self._timer()
+        try:
+            with self.activate(record):
+                yield record
+        finally:
+            record.duration = self._timer() - started
+            self.finish_operation(record)
+
+    @contextmanager
+    def activate(self, record: Optional[OperationRecord]) -> Iterator[None]:
+        """
+        Context manager that makes the given record that of the active operation on the current thread for the block.
+        :param record: the record to activate. `None` for no operation to be active
+        """
+        previous = self.current_record()
+        self._current.record = record
+        try:
+            yield
+        finally:
+            self._current.record = previous
+
+    def finish_operation(self, record: OperationRecord):
+        """
+        Adds the given record of a finished operation to the statistics and passes it to the hooks.
+        :param record: the record of the finished operation
+        """
+        with self._lock:
+            statistics = self._operations.get(record.operation)
+            if statistics is None:
+                statistics = OperationStatistics()
+                self._operations[record.operation] = statistics
+            statistics.calls += 1
+            statistics.total_time += record.duration
+            statistics.max_time = max(statistics.max_time, record.duration)
+            statistics.database_time += record.database_time
+            statistics.conversion_time += record.conversion_time
+            statistics.queries += record.queries
+            statistics.rows_returned += record.rows_returned
+            statistics.models_converted += record.models_converted
+            for bucket in LATENCY_HISTOGRAM_BUCKETS:
+                if record.duration <= bucket:
+                    statistics.latency_histogram[bucket] += 1
+                    break
+            hooks = list(self._hooks)
+
+        for hook in hooks:
+            try:
+                hook(record)
+            except Exception:
+                _hook_error_logger.exception("Instrumentation hook %s failed" % hook)
+
+    def record_conversion(self, rows_returned: int, models_converted: int, duration: float):
+        """
+        Records that rows were converted into models as part of the active operation (if any).
+        :param rows_returned: the number of rows that were converted
+        :param models_converted: the number of models that the rows were converted into
+        :param duration: the number of seconds that the conversion took
+        """
+        record = self.current_record()
+        if record is not None:
+            with self._lock:
+                record.rows_returned += rows_returned
+                record.models_converted += models_converted
+                record.conversion_time += duration
+
+    def get_statistics(self) -> QueryStatistics:
+        """
+        Gets a snapshot of the statistics recorded so far.
+        :return: the statistics
+        """
+        with self._lock:
+            operations = {}
+            for name, statistics in self._operations.items():
+                snapshot = OperationStatistics(**vars(statistics))
+                snapshot.latency_histogram = collections.OrderedDict(statistics.latency_histogram)
+                operations[name] = snapshot
+            return QueryStatistics(operations=operations, queries=self._queries, database_time=self._database_time,
+                                   slow_queries=self._slow_queries, failed_queries=self._failed_queries)
+
+    def reset(self):
+        """
+        Discards the statistics recorded so far.
+        """
+        with self._lock:
+            self._operations.clear()
+            self._queries = 0
+            self._database_time = 0.0
+            self._slow_queries = 0
+            self._failed_queries = 0
+
+    def _on_before_cursor_execute(self, connection, cursor, statement: str, parameters: Any, context,
+                                  executemany: bool):
+        """
+        Called before a query is executed.
+        """
+        # The start time is held by the query's execution context, which is discarded with it whether or not the query
+        # succeeds
+        setattr(context, _START_TIME_ATTRIBUTE, self._timer())
+
+    def _on_after_cursor_execute(self, connection, cursor, statement: str, parameters: Any, context,
+                                 executemany: bool):
+        """
+        Called after a query has been executed.
+        """
+        self._record_query(context, statement, parameters, executemany, False)
+
+    def _on_handle_error(self, exception_context):
+        """
+        Called when a query (or other use of a connection) fails.
+        """
+        context = exception_context.execution_context
+        if context is not None and hasattr(context, _START_TIME_ATTRIBUTE):
+            self._record_query(context, exception_context.statement, exception_context.parameters,
+                               context.executemany, True)
+
+    def _record_query(self, context, statement: str, parameters: Any, executemany: bool, failed: bool):
+        """
+        Records that a query has finished executing, as part of the active operation (if any).
+        :param context: the query's execution context
+        :param statement: the query's statement
+        :param parameters: the query's parameters
+        :param executemany: whether the statement was executed with many sets of parameters
+        :param failed: whether the query failed
+        """
+        duration = self._timer() - getattr(context, _START_TIME_ATTRIBUTE)
+        delattr(context, _START_TIME_ATTRIBUTE)
+        record = self.current_record()
+        slow = self._slow_query_threshold is not None and duration > self._slow_query_threshold
+        with self._lock:
+            self._queries += 1
+            self._database_time += duration
+            if slow:
+                self._slow_queries += 1
+            if failed:
+                self._failed_queries += 1
+            if record is not None:
+                record.queries += 1
+                record.database_time += duration
+        if slow:
+            # Parameters are not logged as they can be many (e.g. large IN-lists) and contain data
+            slow_query_logger.warning(
+                "%s took %.3fs%s: %s (%s)",
+                "Failed query" if failed else "Query", duration,
+                " in %s" % record.operation if record is not None else "", statement,
+                _describe_parameters(parameters, executemany))
+
+
+def _describe_parameters(parameters: Any, executemany: bool) -> str:
+    """
+    Describes the parameters of a query without including their values.
+    :param parameters: the parameters
+    :param executemany: whether the parameters are many sets of parameters
+    :return: the description of the parameters
+    """
+    number = len(parameters) if parameters is not None else 0
+    if executemany:
+        return "sets of parameters: %d" % number
+    return "parameters: %d" % number
@@ -1,39 +1,211 @@
 import collections
+import functools
+import itertools
 from abc import ABCMeta
-from typing import Union, Any, Iterable, Sequence, TypeVar
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from threading import Lock
+from typing import Union, Any, Iterable, Sequence, TypeVar, Callable, List, Tuple, Dict, Iterator, Optional, Set
 
-from sqlalchemy import Column
+from sqlalchemy import or_, and_, func, select, exists, bindparam, Table, Column
+from sqlalchemy.orm import Session, Query
 
 from hgicommon.models import Model
 from sequencescape._sqlalchemy.database_connector import SQLAlchemyDatabaseConnector
-from sequencescape._sqlalchemy.model_converters import convert_to_sqlalchemy_model, convert_to_popo_models,\
-    get_equivalent_sqlalchemy_model_type, convert_to_sqlalchemy_models
+from sequencescape._sqlalchemy.instrumentation import Instrumentation, OperationRecord
+from sequencescape._sqlalchemy.model_converters import convert_to_popo_models, get_equivalent_sqlalchemy_model_type, \
+    convert_to_table_rows, get_popo_model_columns, convert_rows_to_popo_models, convert_rows_to_compact_models
+from sequencescape.columnar import ColumnarModels
+from sequencescape.compact_models import get_compact_model_type
 from sequencescape.enums import Property
-from sequencescape.mappers import Mapper, LibraryMapper, MultiplexedLibraryMapper, SampleMapper, WellMapper, StudyMapper, \
-    MappedType
+from sequencescape.mappers import Mapper, LibraryMapper, MultiplexedLibraryMapper, SampleMapper, WellMapper, \
+    StudyMapper, MappedType, _group_values_by_property, _unique_models
 from sequencescape.models import Library, MultiplexedLibrary, Sample, Well, Study, InternalIdModel
 
 _InternalIdMappedType = TypeVar("InternalIdMappedType", bound=InternalIdModel)
 
+# Maximum number of values put into a single SQL `IN` clause. Kept below SQLite's limit of 999 bound parameters
+DEFAULT_IN_CLAUSE_CHUNK_SIZE = 500
+
+# Number of rows fetched from the database at a time when streaming results
+DEFAULT_STREAM_BATCH_SIZE = 1000
+
+# Maximum number of rows inserted with a single statement
+DEFAULT_INSERT_BATCH_SIZE = 1000
+
+# Number of partitions that a parallel scan of a table is split into for each query that can run at the same time. More
+# partitions than queries keep all queries busy when rows are not spread evenly over the range of internal IDs
+PARTITIONS_PER_PARALLEL_QUERY = 4
+
+# Marks the end of an iterator whose steps are instrumented
+_END_OF_ITERATION = object()
+
+# Prefixes to `INSERT` that make databases of the given dialect skip rows that would violate a uniqueness constraint
+_INSERT_IGNORE_PREFIXES = {
+    "sqlite": "OR IGNORE",
+    "mysql": "IGNORE"
+}
+
+
+def _unique(values: Iterable[Any]) -> List[Any]:
+    """
+    Removes duplicates from the given values, retaining the order in which each value first appears.
+    :param values: the values to remove duplicates from
+    :return: the unique values
+    """
+    return list(collections.OrderedDict.fromkeys(values))
+
+
+def _convert_in_batches(query: Query, batch_size: int, instrumentation: Instrumentation) -> Iterator[Model]:
+    """
+    Streams the results of the given query, converting them into POPO models one batch at a time.
+    :param query: the query to stream the results of
+    :param batch_size: the number of rows to fetch and convert at a time
+    :param instrumentation: the instrumentation to record the conversion of each batch with
+    :return: iterator of POPO models
+    """
+    results = iter(query.yield_per(batch_size))
+    while True:
+        batch = list(itertools.islice(results, batch_size))
+        if len(batch) == 0:
+            break
+        yield from _record_conversion(instrumentation, len(batch), lambda: convert_to_popo_models(batch))
+
+
+def _convert_rows_in_batches(query: Query, sqlalchemy_type: type, batch_size: int, instrumentation: Instrumentation,
+                             convert_rows: Callable[[type, Sequence[Sequence[Any]]], List[Model]]) -> Iterator[Model]:
+    """
+    Streams the rows selected by the given query without going through the ORM, converting them into POPO models one
+    batch at a time.
+    :param query: the query to stream the results of, which must be for models of the given SQLAlchemy type
+    :param sqlalchemy_type: the type of SQLAlchemy model that the query is for
+    :param batch_size: the number of rows to fetch and convert at a time
+    :param instrumentation: the instrumentation to record the conversion of each batch with
+    :param convert_rows: converts rows from the table of the given SQLAlchemy type into POPO models
+    :return: iterator of POPO models
+    """
+    statement = query.with_entities(*get_popo_model_columns(sqlalchemy_type)).statement
+    result = query.session.execute(statement.execution_options(stream_results=True))
+    try:
+        while True:
+            rows = result.fetchmany(batch_size)
+            if len(rows) == 0:
+                break
+            yield from _record_conversion(
+                instrumentation, len(rows), lambda: convert_rows(sqlalchemy_type, rows))
+    finally:
+        result.close()
+
+
+def _record_conversion(instrumentation: Instrumentation, rows_returned: int, convert: Callable[[], List[Model]]) \
+        -> List[Model]:
+    """
+    Converts rows into POPO models, recording the time taken as part of the active operation.
+    :param instrumentation: the instrumentation to record the conversion with
+    :param rows_returned: the number of rows being converted
+    :param convert: converts the rows
+    :return: the POPO models
+    """
+    started = instrumentation.timer()
+    models = convert()
+    instrumentation.record_conversion(rows_returned, len(models), instrumentation.timer() - started)
+    return models
+
+
+def _instrumented_iterator(iter_method: Callable[..., Iterator[MappedType]]) \
+        -> Callable[..., Iterator[MappedType]]:
+    """
+    Decorates a method of a `SQLAlchemyMapper` that returns an iterator so that the iteration is recorded as a call to
+    the operation with the name of the method.
+    :param iter_method: the method to decorate
+    :return: the decorated method
+    """
+    @functools.wraps(iter_method)
+    def wrapped(mapper: "SQLAlchemyMapper", *args, **kwargs) -> Iterator[MappedType]:
+        return mapper._instrument_iterator(iter_method.__name__, iter_method(mapper, *args, **kwargs))
+    return wrapped
+
+
+def _chunk(values: Sequence[Any], chunk_size: int) -> List[Sequence[Any]]:
+    """
+    Splits the given values into chunks of (at most) the given size.
+    :param values: the values to split
+    :param chunk_size: the maximum number of values in a chunk
+    :return: the chunks of values, in order
+    """
+    return [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+
+
+def _partition_range(minimum: int, maximum: int, number_of_partitions: int) -> List[Tuple[int, int]]:
+    """
+    Splits the given (inclusive) range of integers into contiguous partitions of about the same size.
+    :param minimum: the smallest integer in the range
+    :param maximum: the largest integer in the range
+    :param number_of_partitions: the maximum number of partitions
+    :return: the (inclusive) lower and (exclusive) upper bound of each non-empty partition, in order
+    """
+    size = maximum - minimum + 1
+    number_of_partitions = min(number_of_partitions, size)
+    boundaries = [minimum + (size * i) // number_of_partitions for i in range(number_of_partitions + 1)]
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _get_association_join_columns(sqlalchemy_type: type, relationship_property_name: str) \
+        -> Tuple[Table, Column, Column, Column]:
+    """
+    Gets the join table and columns through which the given many-to-many relationship property is expressed.
+    :param sqlalchemy_type: the SQLAlchemy model type with the relationship property
+    :param relationship_property_name: the name of the relationship property
+    :return: tuple containing the join table, the column in the join table that refers to models of the given type,
+    the column in the join table that refers to associated models and the column that this column refers to
+    """
+    relationship = getattr(sqlalchemy_type, relationship_property_name).property
+    assert relationship.secondary is not None
+    associated_with_join_column = relationship.synchronize_pairs[0][1]
+    associate_primary_key, associate_join_column = relationship.secondary_synchronize_pairs[0]
+    return relationship.secondary, associated_with_join_column, associate_join_column, associate_primary_key
+
 
 class SQLAlchemyMapper(Mapper[MappedType], metaclass=ABCMeta):
     """
     Implementation of `Mapper` using SQLAlchemy.
     """
-    def __init__(self, database_connector: SQLAlchemyDatabaseConnector, model_type: type):
+    def __init__(self, database_connector: SQLAlchemyDatabaseConnector, model_type: type,
+                 in_clause_chunk_size: int=DEFAULT_IN_CLAUSE_CHUNK_SIZE, max_parallel_queries: int=1,
+                 core_reads: bool=False, compact_models: bool=False):
         """
         Constructor.
         :param database_connector: the object through which database connections can be made
         :param model_type: the type of the model that the metadata_mapper is used for. Note that it is not (currently)
         possible in Python to get this type from the generic used
+        :param in_clause_chunk_size: the maximum number of values to query for in a single query. Queries for more
+        values are split into several queries
+        :param max_parallel_queries: the maximum number of queries for chunks of values that can be executed at the
+        same time, each using its own database connection. 1 to execute the queries one after another
+        :param core_reads: whether to read models by selecting plain rows with SQLAlchemy Core, which are converted
+        straight into POPO models, instead of loading SQLAlchemy models through the ORM
+        :param compact_models: whether to read models as their memory-compact equivalents (see `CompactModel`), which
+        are always converted from rows selected with SQLAlchemy Core
         """
         if not model_type:
             raise ValueError("Model type must be specified through `model_type` parameter")
         if not issubclass(model_type, Model):
             raise ValueError("Model type (%s) must be a subclass of `Model`" % model_type)
+        if in_clause_chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1 (%d given)" % in_clause_chunk_size)
+        if max_parallel_queries < 1:
+            raise ValueError("Maximum number of parallel queries must be at least 1 (%d given)" % max_parallel_queries)
+        if compact_models and get_compact_model_type(model_type) is None:
+            raise ValueError("No compact equivalent of model type (%s) known" % model_type)
 
         self._database_connector = database_connector
         self._model_type = model_type
+        self._in_clause_chunk_size = in_clause_chunk_size
+        self._max_parallel_queries = max_parallel_queries
+        self._core_reads = core_reads or compact_models
+        self._compact_models = compact_models
+        self._convert_rows = convert_rows_to_compact_models if compact_models else convert_rows_to_popo_models
+        self._executor = None   # type: ThreadPoolExecutor
+        self._executor_lock = Lock()
         self._sqlalchemy_model_type = get_equivalent_sqlalchemy_model_type(self._model_type)
 
         if self._sqlalchemy_model_type is None:
@@ -44,35 +216,382 @@ class SQLAlchemyMapper(Mapper[MappedType], metaclass=ABCMeta):
             raise ValueError("Cannot add `None`")
         if not isinstance(models, list):
             models = [models]
+        with self._instrumented("add"):
+            self.bulk_add(models)
 
-        session = self._database_connector.create_session()
+    def bulk_add(self, models: Iterable[MappedType], batch_size: int=DEFAULT_INSERT_BATCH_SIZE,
+                 ignore_duplicates: bool=False) -> int:
+        """
+        Adds data in the given models to the database using multi-row inserts, without going through the ORM. All of
+        the models are added in a single transaction.
+        :param models: the models containing the data to be transferred
+        :param batch_size: the maximum number of rows to insert with a single statement
+        :param ignore_duplicates: whether to skip models that clash with data that is already in the database (e.g. by
+        internal ID), instead of failing. Only supported with SQLite and MySQL databases
+        :return: the number of rows that were inserted
+        """
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1 (%d given)" % batch_size)
+        models = list(models)
         for model in models:
-            sqlalchemy_model = convert_to_sqlalchemy_model(model)
-            session.add(sqlalchemy_model)
-        session.commit()
-        session.close()
+            if not isinstance(model, self._model_type):
+                raise ValueError("Cannot add `%s` using a mapper for models of type `%s`" % (model, self._model_type))
+
+        insert = self._sqlalchemy_model_type.__table__.insert()
+        if ignore_duplicates:
+            dialect_name = self._database_connector.engine.dialect.name
+            if dialect_name not in _INSERT_IGNORE_PREFIXES:
+                raise NotImplementedError("Ignoring duplicates is not supported with `%s` databases" % dialect_name)
+            insert = insert.prefix_with(_INSERT_IGNORE_PREFIXES[dialect_name])
+
+        rows_inserted = 0
+        with self._instrumented("bulk_add"), self._database_connector.session_scope() as session:
+            for batch in _chunk(models, batch_size):
+                result = session.execute(insert, convert_to_table_rows(batch))
+                rows_inserted += result.rowcount
+        return rows_inserted
 
     def get_all(self) -> Sequence[MappedType]:
-        query_model = self._sqlalchemy_model_type
-        session = self._database_connector.create_session()
-        result = session.query(query_model).all()
-        session.close()
-        assert isinstance(result, collections.Sequence)
-        return convert_to_popo_models(result)
+        with self._instrumented("get_all"):
+            # A table can only be scanned in parallel partitions if it has an integer primary key to partition by
+            if self._can_query_in_parallel() and issubclass(self._model_type, InternalIdModel):
+                return list(self.iter_all_in_partitions())
+            with self._database_connector.session_scope() as session:
+                return self._get_models(session.query(self._sqlalchemy_model_type))
+
+    @_instrumented_iterator
+    def iter_all_in_partitions(self, number_of_partitions: int=None, ordered: bool=True) -> Iterator[MappedType]:
+        """
+        Iterates over all the data of the type this data mapper deals with in the Sequencescape database, which is got
+        by splitting the range of internal IDs into partitions that are each queried for, and converted, separately.
+        Up to `max_parallel_queries` partitions are got at the same time, each using its own database connection.
+
+        Only for use with models that have internal IDs.
+        :param number_of_partitions: the number of partitions to split the range of internal IDs into. `None` to use
+        `PARTITIONS_PER_PARALLEL_QUERY` partitions for each query that can run at the same time
+        :param ordered: whether to yield the partitions in the order of their internal IDs. If not, the models in each
+        partition are yielded as soon as the partition has been got
+        :return: iterator of models representing each piece of data in the database of the type this data mapper deals
+        with
+        """
+        if number_of_partitions is None:
+            number_of_partitions = self._max_parallel_queries * PARTITIONS_PER_PARALLEL_QUERY
+        if number_of_partitions < 1:
+            raise ValueError("Number of partitions must be at least 1 (%d given)" % number_of_partitions)
+        internal_id = self._sqlalchemy_model_type.internal_id
+
+        with self._database_connector.session_scope() as session:
+            minimum, maximum = session.query(func.min(internal_id), func.max(internal_id)).one()
+        if minimum is None:
+            return
+
+        record = self._database_connector.instrumentation.current_record()
+
+        def get_partition(partition: Tuple[int, int]) -> List[MappedType]:
+            lower, upper = partition
+            with self._database_connector.instrumentation.activate(record), \
+                    self._database_connector.session_scope() as session:
+                query = session.query(self._sqlalchemy_model_type). \
+                    filter(internal_id >= lower). \
+                    filter(internal_id < upper)
+                return self._get_models(query)
+
+        partitions = _partition_range(minimum, maximum, number_of_partitions)
+        if len(partitions) == 1 or not self._can_query_in_parallel():
+            for partition in partitions:
+                yield from get_partition(partition)
+            return
+
+        executor = self._get_executor()
+        futures = []    # type: List[Future]
+        try:
+            for partition in partitions:
+                futures.append(executor.submit(get_partition, partition))
+            for future in (futures if ordered else as_completed(futures)):
+                yield from future.result()
+        finally:
+            # Partitions that have not started are not needed if the iterator is closed early (or if not all of the
+            # partitions could be submitted), so do not go on to hold connections from the pool
+            for future in futures:
+                future.cancel()
+
+    def get_all_columnar(self, intern_strings: bool=True, batch_size: int=DEFAULT_STREAM_BATCH_SIZE) \
+            -> ColumnarModels:
+        """
+        Gets all the data of the type this data mapper deals with in the Sequencescape database, held in columns (one
+        for each property) rather than as models. Rows are selected with SQLAlchemy Core and fetched in batches,
+        without creating any models.
+        :param intern_strings: whether to make equal strings in each column the same object, which saves memory when
+        there are few distinct values
+        :param batch_size: the number of rows to fetch from the database at a time
+        :return: the models representing each piece of data in the database of the type this data mapper deals with,
+        in columns
+        """
+        sqlalchemy_columns = get_popo_model_columns(self._sqlalchemy_model_type)
+        instrumentation = self._database_connector.instrumentation
+        values = [[] for _ in sqlalchemy_columns]   # type: List[List[Any]]
+        with self._instrumented("get_all_columnar"), self._database_connector.session_scope() as session:
+            statement = session.query(*sqlalchemy_columns).statement
+            result = session.execute(statement.execution_options(stream_results=True))
+            try:
+                while True:
+                    rows = result.fetchmany(batch_size)
+                    if len(rows) == 0:
+                        break
+                    started = instrumentation.timer()
+                    for column_values, batch_values in zip(values, zip(*rows)):
+                        column_values.extend(batch_values)
+                    instrumentation.record_conversion(len(rows), 0, instrumentation.timer() - started)
+            finally:
+                result.close()
+
+        model_type = get_compact_model_type(self._model_type) if self._compact_models else self._model_type
+        columns = collections.OrderedDict(
+            (column.key, column_values) for column, column_values in zip(sqlalchemy_columns, values))
+        return ColumnarModels(model_type, columns, intern_strings=intern_strings)
+
+    @_instrumented_iterator
+    def iter_all(self, batch_size: int=DEFAULT_STREAM_BATCH_SIZE) -> Iterator[MappedType]:
+        """
+        Iterates over all the data of the type this data mapper deals with in the Sequencescape database, fetching rows
+        from the database (using a server-side cursor, where supported) and converting them in batches.
+
+        A database connection is held until the iterator has been exhausted or closed.
+        :param batch_size: the number of rows to fetch from the database at a time
+        :return: iterator of models representing each piece of data in the database of the type this data mapper deals
+        with
+        """
+        with self._database_connector.session_scope() as session:
+            query = session.query(self._sqlalchemy_model_type)
+            yield from self._iter_models(query, batch_size)
+
+    @_instrumented_iterator
+    def iter_by_property_value(self, property: Union[str, Union[Tuple[str, Any]], Iterable[Tuple[str, Any]]],
+                               values: Optional[Union[Any, Iterable[Any]]]=None,
+                               batch_size: int=DEFAULT_STREAM_BATCH_SIZE) -> Iterator[MappedType]:
+        """
+        Streaming equivalent of `get_by_property_value`, which fetches rows from the database (using a server-side
+        cursor, where supported) and converts them in batches.
+
+        A database connection is held until the iterator has been exhausted or closed.
+        :param property: see `get_by_property_value`
+        :param values: see `get_by_property_value`
+        :param batch_size: the number of rows to fetch from the database at a time
+        :return: iterator of models that have at least one of the given property values
+        """
+        if isinstance(property, str):
+            property_value_tuples = [(property, values)]
+        elif isinstance(property, tuple):
+            property_value_tuples = [property]
+        else:
+            property_value_tuples = property
+        property_values = self._to_property_value_pairs(property_value_tuples)
+
+        # Models can only match the values in more than one chunk if more than one property is used
+        remove_duplicates = len(set(property for property, value in property_values)) > 1
+        seen_internal_ids = set()
+
+        with self._database_connector.session_scope() as session:
+            for chunk in _chunk(property_values, self._in_clause_chunk_size):
+                query = self._create_property_value_query(session, chunk)
+                for model in self._iter_models(query, batch_size):
+                    if remove_duplicates:
+                        if model.internal_id in seen_internal_ids:
+                            continue
+                        seen_internal_ids.add(model.internal_id)
+                    yield model
 
     def _get_by_property_value_sequence(self, property: Property, required_property_values: Iterable[Any]) \
             -> Sequence[MappedType]:
+        def get_chunk(session: Session, chunk: Sequence[Tuple[str, Any]]) -> Sequence[MappedType]:
+            return self._get_models(self._create_property_value_query(session, chunk))
+
+        # Each model has one value for the property so, as long as the values are unique, it can only be in the results
+        # for one chunk
+        property_values = [(property, value) for value in _unique(required_property_values)]
+        with self._instrumented("get_by_%s" % property):
+            return self._get_in_chunks(get_chunk, property_values)
+
+    def _get_by_property_value_tuple(
+            self, property_value_tuples: Union[Tuple[str, Any], Iterable[Tuple[str, Any]]]) -> Sequence[MappedType]:
+        if isinstance(property_value_tuples, tuple):
+            property_value_tuples = [property_value_tuples]
+
+        def get_chunk(session: Session, chunk: Sequence[Tuple[str, Any]]) -> Sequence[MappedType]:
+            return self._get_models(self._create_property_value_query(session, chunk))
+
+        # A model may match values of more than one property, in which case it could be in the results of many chunks
+        property_values = self._to_property_value_pairs(property_value_tuples)
+        with self._instrumented("get_by_property_values"):
+            return _unique_models(self._get_in_chunks(get_chunk, property_values))
+
+    def _instrumented(self, operation: str) -> Iterator[OperationRecord]:
+        """
+        Context manager that records the block as a call to the given operation of this mapper.
+        :param operation: the name of the operation, which is prefixed with the name of the type of model this mapper
+        deals with
+        :return: the record of the active operation
+        """
+        return self._database_connector.instrumentation.operation(
+            "%s.%s" % (self._model_type.__name__, operation))
+
+    def _instrument_iterator(self, operation: str, iterator: Iterator[MappedType]) -> Iterator[MappedType]:
+        """
+        Records the iteration of the given iterator as a call to the given operation of this mapper, which finishes
+        when the iterator is exhausted or closed. Only the time spent getting the next model is included in the
+        operation's duration, not the time that the caller spends between steps.
+        :param operation: the name of the operation
+        :param iterator: the iterator to record the iteration of
+        :return: iterator of the same models
+        """
+        instrumentation = self._database_connector.instrumentation
+        if instrumentation.current_record() is not None:
+            # Iterated as part of another operation
+            yield from iterator
+            return
+
+        record = OperationRecord(operation="%s.%s" % (self._model_type.__name__, operation))
+        timer = instrumentation.timer
+        try:
+            while True:
+                started = timer()
+                try:
+                    # `StopIteration` is not raised through the context manager, which is a generator
+                    with instrumentation.activate(record):
+                        model = next(iterator, _END_OF_ITERATION)
+                finally:
+                    record.duration += timer() - started
+                if model is _END_OF_ITERATION:
+                    return
+                yield model
+        finally:
+            with instrumentation.activate(record):
+                iterator.close()
+            instrumentation.finish_operation(record)
+
+    def _get_models(self, query: Query) -> List[MappedType]:
+        """
+        Gets the models that are the results of the given query, using the read mode of this mapper.
+        :param query: the query for SQLAlchemy models of the type this mapper deals with
+        :return: the results as POPO models
+        """
+        instrumentation = self._database_connector.instrumentation
+        if self._core_reads:
+            statement = query.with_entities(*get_popo_model_columns(self._sqlalchemy_model_type)).statement
+            rows = query.session.execute(statement).fetchall()
+            return _record_conversion(
+                instrumentation, len(rows), lambda: self._convert_rows(self._sqlalchemy_model_type, rows))
+        results = query.all()
+        assert isinstance(results, collections.Sequence)
+        return _record_conversion(instrumentation, len(results), lambda: convert_to_popo_models(results))
+
+    def _iter_models(self, query: Query, batch_size: int) -> Iterator[MappedType]:
+        """
+        Streams the models that are the results of the given query, using the read mode of this mapper.
+        :param query: the query for SQLAlchemy models of the type this mapper deals with
+        :param batch_size: the number of rows to fetch and convert at a time
+        :return: iterator of the results as POPO models
+        """
+        instrumentation = self._database_connector.instrumentation
+        if self._core_reads:
+            return _convert_rows_in_batches(
+                query, self._sqlalchemy_model_type, batch_size, instrumentation, self._convert_rows)
+        return _convert_in_batches(query, batch_size, instrumentation)
+
+    def _create_property_value_query(self, session: Session, property_values: Sequence[Tuple[str, Any]]) -> Query:
+        """
+        Creates a query for the models (of the type this mapper deals with) that have any of the given property values.
+        :param session: the session to create the query in
+        :param property_values: pairs of properties and values, where any pair may be matched
+        :return: the query
+        """
         query_model = self._sqlalchemy_model_type
-        session = self._database_connector.create_session()
+        values_by_property = collections.OrderedDict()  # type: Dict[str, List[Any]]
+        for property, value in property_values:
+            values_by_property.setdefault(property, []).append(value)
 
         # FIXME: It is an assumption that the Model property has the same name as SQLAlchemyModel property
-        query_column = query_model.__dict__[property]   # type: Column
-        results = session.query(query_model). \
-            filter(query_column.in_(required_property_values)).\
-            all()
-        session.close()
-        assert isinstance(results, collections.Sequence)
-        return convert_to_popo_models(results)
+        conditions = [query_model.__dict__[property].in_(values) for property, values in values_by_property.items()]
+        return session.query(query_model). \
+            filter(or_(*conditions))
+
+    @staticmethod
+    def _to_property_value_pairs(property_value_tuples: Iterable[Tuple[str, Any]]) -> List[Tuple[str, Any]]:
+        """
+        Converts the given property-value tuples, where the values may be iterables of values, into unique pairs of
+        single property and value.
+        :param property_value_tuples: the tuples to convert
+        :return: the unique property and value pairs, grouped by property
+        """
+        property_values = []
+        for property, values in _group_values_by_property(property_value_tuples).items():
+            property_values.extend((property, value) for value in values)
+        return property_values
+
+    def _get_in_chunks(self, get_chunk: Callable[[Session, Sequence[Any]], Sequence[Any]], values: Sequence[Any]) \
+            -> List[Any]:
+        """
+        Gets the results for the given values, splitting the values into chunks that are each queried for separately
+        (possibly in parallel).
+        :param get_chunk: gets the results for a chunk of values, using the given session
+        :param values: the values to get results for
+        :return: the combined results of all of the chunks, in the order of the chunks
+        """
+        return self._get_for_chunks(get_chunk, _chunk(values, self._in_clause_chunk_size))
+
+    def _get_for_chunks(self, get_chunk: Callable[[Session, Any], Sequence[Any]], chunks: Sequence[Any]) -> List[Any]:
+        """
+        Gets the results for each of the given chunks, which are each queried for separately (possibly in parallel).
+        :param get_chunk: gets the results for a chunk, using the given session
+        :param chunks: the chunks to get results for
+        :return: the combined results of all of the chunks, in the order of the chunks
+        """
+        if len(chunks) > 1 and self._can_query_in_parallel():
+            # Queries made on other threads are recorded as part of the operation made on this one
+            record = self._database_connector.instrumentation.current_record()
+
+            def get_chunk_in_own_session(chunk: Sequence[Any]) -> Sequence[Any]:
+                with self._database_connector.instrumentation.activate(record), \
+                        self._database_connector.session_scope() as session:
+                    return get_chunk(session, chunk)
+            chunk_results = list(self._get_executor().map(get_chunk_in_own_session, chunks))
+        elif len(chunks) > 0:
+            with self._database_connector.session_scope() as session:
+                chunk_results = [get_chunk(session, chunk) for chunk in chunks]
+        else:
+            chunk_results = []
+
+        return list(itertools.chain.from_iterable(chunk_results))
+
+    def _can_query_in_parallel(self) -> bool:
+        """
+        Gets whether queries can currently be run in parallel. They cannot be within a shared session scope, as queries
+        on other threads would not be made in its transaction.
+        :return: whether queries can be run in parallel
+        """
+        return self._max_parallel_queries > 1 and not self._database_connector.in_shared_session_scope()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """
+        Gets the executor that is used to run queries in parallel, creating it if it does not yet exist.
+        :return: the executor
+        """
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._max_parallel_queries)
+        return self._executor
+
+    def close(self):
+        """
+        Shuts down the threads used to run queries in parallel, once the queries that they are running have finished.
+        The mapper can still be used afterwards, with the threads being created again when they are next needed.
+        """
+        with self._executor_lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown()
 
 
 class SQLAssociationMapper(SQLAlchemyMapper[_InternalIdMappedType], metaclass=ABCMeta):
@@ -80,49 +599,85 @@ class SQLAssociationMapper(SQLAlchemyMapper[_InternalIdMappedType], metaclass=AB
     SQLAlchemy metadata_mapper that deals with models that can be associated with other models via a join table.
     """
     def _set_association(self, associate: Union[InternalIdModel, Iterable[InternalIdModel]],
-                         associate_with: InternalIdModel, relationship_property_name: str):
+                         associate_with: Union[InternalIdModel, Iterable[InternalIdModel]],
+                         relationship_property_name: str):
         """
-        Associates the given models to another model, linked to via the specified relationship property.
+        Associates the given models to other models, linked to via the specified relationship property. Each of the
+        models is associated to each of the models to associate with. Associations that already exist are left as they
+        are.
         :param associate: the models to associate
-        :param associate_with: the model to associate with
+        :param associate_with: the models to associate with
         :param relationship_property_name: the property on `associate_with` in which the relationship is expressed
         """
-        if associate_with.internal_id is None:
-            raise ValueError("Model to associate with must have an internal ID: %s" % associate_with)
-
         if isinstance(associate, InternalIdModel):
             associate = [associate]
-
-        session = self._database_connector.create_session()
-        sqlalchemy_associated_with_type = get_equivalent_sqlalchemy_model_type(associate_with.__class__)
+        if isinstance(associate_with, InternalIdModel):
+            associate_with = [associate_with]
+        associate = list(associate)
+        associate_with = list(associate_with)
+        if len(associate) == 0 or len(associate_with) == 0:
+            return
+
+        for model in associate_with:
+            if model.internal_id is None:
+                raise ValueError("Model to associate with must have an internal ID: %s" % model)
+        for model in associate:
+            if model.internal_id is None:
+                raise ValueError("Model to associate must have an internal ID: %s" % model)
+
+        sqlalchemy_associated_with_type = get_equivalent_sqlalchemy_model_type(associate_with[0].__class__)
         assert sqlalchemy_associated_with_type is not None
+        associate_with_internal_ids = _unique(x.internal_id for x in associate_with)
+        associate_internal_ids = _unique(x.internal_id for x in associate)
+        join_table, associated_with_join_column, associate_join_column, associate_primary_key = \
+            _get_association_join_columns(sqlalchemy_associated_with_type, relationship_property_name)
+
+        # The join table has no unique constraint, so the checks and the insert are made in a single transaction and
+        # each association is only inserted if it does not exist when the insert is made. Inserts are made for each
+        # model to associate with and chunk of models to associate (selected from their table, by primary key)
+        associated_with_internal_id = bindparam("associated_with_internal_id")
+        join_table_alias = join_table.alias()
+        with self._database_connector.session_scope() as session:
+            existing_internal_ids = self._get_existing_internal_ids(
+                sqlalchemy_associated_with_type, associate_with_internal_ids, session)
+            if len(existing_internal_ids) != len(associate_with_internal_ids):
+                raise ValueError("Model to associate with does not exist:\n%s"
+                                 % [x for x in associate_with if x.internal_id not in existing_internal_ids])
+            existing_internal_ids = self._get_existing_internal_ids(
+                self._sqlalchemy_model_type, associate_internal_ids, session)
+            if len(existing_internal_ids) != len(associate_internal_ids):
+                raise ValueError("Model to associate does not exist:\n%s"
+                                 % [x for x in associate if x.internal_id not in existing_internal_ids])
+
+            for chunk in _chunk(associate_internal_ids, self._in_clause_chunk_size):
+                new_associations = select([associated_with_internal_id, associate_primary_key]). \
+                    where(associate_primary_key.in_(chunk)). \
+                    where(~exists().where(and_(
+                        join_table_alias.c[associated_with_join_column.key] == associated_with_internal_id,
+                        join_table_alias.c[associate_join_column.key] == associate_primary_key)))
+                insert = join_table.insert().from_select(
+                    [associated_with_join_column.key, associate_join_column.key], new_associations)
+                session.execute(insert, [{"associated_with_internal_id": internal_id}
+                                         for internal_id in associate_with_internal_ids])
+
+    def _get_existing_internal_ids(self, sqlalchemy_type: type, internal_ids: Sequence[int], session: Session=None) \
+            -> Set[int]:
+        """
+        Gets which of the given internal IDs belong to models of the given type that exist in the database.
+        :param sqlalchemy_type: the type of SQLAlchemy model the internal IDs are of
+        :param internal_ids: the internal IDs to check
+        :param session: the session in which to check. `None` to check in sessions of their own (possibly in parallel)
+        :return: the internal IDs that exist
+        """
+        def get_existing_internal_ids_chunk(session: Session, chunk: Sequence[int]) -> Sequence[int]:
+            return [result.internal_id for result in session.query(sqlalchemy_type.internal_id).
+                    filter(sqlalchemy_type.internal_id.in_(chunk))]
 
-        # sqlalchemy_associated_with_type = SQLAlchemyStudy
-        results = session.query(sqlalchemy_associated_with_type). \
-            filter(sqlalchemy_associated_with_type.internal_id == associate_with.internal_id).all()
-
-        if len(results) != 1:
-            raise ValueError("Model to associate with does not exist:\n%s" % associate_with)
-
-        # FIXME: SQLAlchemy wants to insert the `associate` records. Could not find out how to stop this so hacking by
-        #        deleting from the database. If the given model is not in sync with the  database this will lead to data
-        #        loss.
-        sqlalchemy_associate_type = get_equivalent_sqlalchemy_model_type(associate[0].__class__)
-        assert sqlalchemy_associate_type is not None
-        for associate_element in associate:
-            session.query(sqlalchemy_associate_type).\
-                filter(sqlalchemy_associate_type.internal_id == associate_element.internal_id).\
-                delete()
-
-        sqlalchemy_associate = convert_to_sqlalchemy_models(associate)
-        for result in results:
-            for sqlalchemy_associate_element in sqlalchemy_associate:
-                current_relationship = getattr(result, relationship_property_name)
-                if sqlalchemy_associate_element not in current_relationship:
-                    setattr(result, relationship_property_name, current_relationship + sqlalchemy_associate)
-
-        session.commit()
-        session.close()
+        if session is not None:
+            return set(itertools.chain.from_iterable(
+                get_existing_internal_ids_chunk(session, chunk)
+                for chunk in _chunk(internal_ids, self._in_clause_chunk_size)))
+        return set(self._get_in_chunks(get_existing_internal_ids_chunk, internal_ids))
 
     def _get_association(self, associated_with: Union[InternalIdModel, Iterable[InternalIdModel]],
                          relationship_property_name: str) -> Sequence[_InternalIdMappedType]:
@@ -134,105 +689,112 @@ class SQLAssociationMapper(SQLAlchemyMapper[_InternalIdMappedType], metaclass=AB
         """
         if isinstance(associated_with, InternalIdModel):
             associated_with = [associated_with]
+        associated_with = list(associated_with)
         if len(associated_with) == 0:
             return []
 
-        session = self._database_connector.create_session()
         sqlalchemy_associated_with_type = get_equivalent_sqlalchemy_model_type(associated_with[0].__class__)
         assert sqlalchemy_associated_with_type is not None
-        results = session.query(sqlalchemy_associated_with_type). \
-            filter(sqlalchemy_associated_with_type.internal_id.
-            in_([x.internal_id for x in associated_with])). \
-            all()
-        assert isinstance(results, collections.Sequence)
+        internal_ids = _unique(x.internal_id for x in associated_with)
 
-        if len(results) != len(associated_with):
+        existing_internal_ids = self._get_existing_internal_ids(sqlalchemy_associated_with_type, internal_ids)
+        if len(existing_internal_ids) != len(internal_ids):
+            existing = [x for x in associated_with if x.internal_id in existing_internal_ids]
             raise ValueError(
                 "Not all given models to find associations with exist in the database.\nGiven: %s\nExisting: %s"
-                % (associated_with, convert_to_popo_models(results)))
+                % (associated_with, existing))
+
+        join_table, associated_with_join_column, associate_join_column, associate_primary_key = \
+            _get_association_join_columns(sqlalchemy_associated_with_type, relationship_property_name)
 
-        associated = []
-        for result in results:
-            relationships = getattr(result, relationship_property_name)
-            if not isinstance(relationships, list):
-                relationships = [relationships]
-            # Ensure only gets put in `associated` list once, even if the associate is associated with many of the given
-            # `associated_with` models.
-            for relationship in relationships:
-                if relationship not in associated:
-                    associated.append(relationship)
-        session.close()
+        def get_associated_chunk(session: Session, chunk: Sequence[int]) -> Sequence[_InternalIdMappedType]:
+            query = session.query(self._sqlalchemy_model_type). \
+                join(join_table, associate_join_column == associate_primary_key). \
+                filter(associated_with_join_column.in_(chunk))
+            return self._get_models(query)
 
-        return convert_to_popo_models(associated)
+        # A model is returned once for each of the given `associated_with` models it is associated with
+        return _unique_models(self._get_in_chunks(get_associated_chunk, internal_ids))
 
 
 class SQLAlchemySampleMapper(SQLAssociationMapper[MappedType], SampleMapper):
     """
     Implementation of `SampleMapper` using SQLAlchemy.
     """
-    def __init__(self, database_connector: SQLAlchemyDatabaseConnector):
+    def __init__(self, database_connector: SQLAlchemyDatabaseConnector, **kwargs):
         """
         Constructor.
         :param database_connector: the database connector
+        :param kwargs: query options, as defined in the constructor of `SQLAlchemyMapper`
         """
-        super().__init__(database_connector, Sample)
+        super().__init__(database_connector, Sample, **kwargs)
 
-    def set_association_with_study(self, samples: Union[Sample, Iterable[Sample]], study: Study):
-        self._set_association(samples, study, "samples")
+    def set_association_with_study(self, samples: Union[Sample, Iterable[Sample]],
+                                   study: Union[Study, Iterable[Study]]):
+        with self._instrumented("set_association_with_study"):
+            self._set_association(samples, study, "samples")
 
     def get_associated_with_study(self, studies: Union[Study, Iterable[Study]]) -> Sequence[Sample]:
-        return self._get_association(studies, "samples")
+        with self._instrumented("get_associated_with_study"):
+            return self._get_association(studies, "samples")
 
 
 class SQLAlchemyStudyMapper(SQLAssociationMapper[Study], StudyMapper):
     """
     Implementation of `StudyMapper` using SQLAlchemy.
     """
-    def __init__(self, database_connector: SQLAlchemyDatabaseConnector):
+    def __init__(self, database_connector: SQLAlchemyDatabaseConnector, **kwargs):
         """
         Constructor.
         :param database_connector: the database connector
+        :param kwargs: query options, as defined in the constructor of `SQLAlchemyMapper`
         """
-        super().__init__(database_connector, Study)
+        super().__init__(database_connector, Study, **kwargs)
 
-    def set_association_with_sample(self, studies: Union[Study, Iterable[Study]], sample: Sample):
-        self._set_association(studies, sample, "studies")
+    def set_association_with_sample(self, studies: Union[Study, Iterable[Study]],
+                                    sample: Union[Sample, Iterable[Sample]]):
+        with self._instrumented("set_association_with_sample"):
+            self._set_association(studies, sample, "studies")
 
     def get_associated_with_sample(self, samples: Union[Sample, Iterable[Sample]]) -> Sequence[Study]:
-        return self._get_association(samples, "studies")
+        with self._instrumented("get_associated_with_sample"):
+            return self._get_association(samples, "studies")
 
 
 class SQLAlchemyLibraryMapper(SQLAlchemyMapper[Library], LibraryMapper):
     """
     Implementation of `LibraryMapper` using SQLAlchemy.
     """
-    def __init__(self, database_connector: SQLAlchemyDatabaseConnector):
+    def __init__(self, database_connector: SQLAlchemyDatabaseConnector, **kwargs):
         """
         Constructor.
         :param database_connector: the database connector
+        :param kwargs: query options, as defined in the constructor of `SQLAlchemyMapper`
         """
-        super().__init__(database_connector, Library)
+        super().__init__(database_connector, Library, **kwargs)
 
 
 class SQLAlchemyWellMapper(SQLAlchemyMapper[Well], WellMapper):
     """
     Implementation of `WellMapper` using SQLAlchemy.
     """
-    def __init__(self, database_connector: SQLAlchemyDatabaseConnector):
+    def __init__(self, database_connector: SQLAlchemyDatabaseConnector, **kwargs):
         """
         Constructor.
         :param database_connector: the database connector
+        :param kwargs: query options, as defined in the constructor of `SQLAlchemyMapper`
         """
-        super().__init__(database_connector, Well)
+        super().__init__(database_connector, Well, **kwargs)
 
 
 class SQLAlchemyMultiplexedLibraryMapper(SQLAlchemyMapper[MultiplexedLibrary], MultiplexedLibraryMapper):
     """
     Implementation of `MultiplexedLibraryMapper` using SQLAlchemy.
     """
-    def __init__(self, database_connector: SQLAlchemyDatabaseConnector):
+    def __init__(self, database_connector: SQLAlchemyDatabaseConnector, **kwargs):
         """
         Constructor.
         :param database_connector: the database connector
+        :param kwargs: query options, as defined in the constructor of `SQLAlchemyMapper`
         """
-        super().__init__(database_connector, MultiplexedLibrary)
+        super().__init__(database_connector, MultiplexedLibrary, **kwargs)
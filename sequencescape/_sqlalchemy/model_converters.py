@@ -1,8 +1,14 @@
-from typing import Sequence, Iterable
+import operator
+from functools import lru_cache
+from typing import Sequence, Iterable, List, Dict, Any, Optional, Callable, Tuple
 
 from hgicommon.models import Model
+from sqlalchemy import Column
+from sqlalchemy.orm.attributes import manager_of_class
+
 from sequencescape._sqlalchemy._models import SQLAlchemySample, SQLAlchemyStudy, SQLAlchemyLibrary, \
     SQLAlchemyWell, SQLAlchemyMultiplexedLibrary, SQLAlchemyModel
+from sequencescape.compact_models import get_compact_model_type, CompactModel
 from sequencescape.models import Library, Study, Sample, Well, MultiplexedLibrary
 
 
@@ -12,7 +18,76 @@ _SQLALCHEMY_TO_POPO_CONVERSIONS = {
     SQLAlchemyLibrary: Library,
     SQLAlchemyWell: Well,
     SQLAlchemyMultiplexedLibrary: MultiplexedLibrary
-}
+}   # type: Dict[type, type]
+
+_POPO_TO_SQLALCHEMY_CONVERSIONS = {popo_type: sqlalchemy_type
+                                   for sqlalchemy_type, popo_type in _SQLALCHEMY_TO_POPO_CONVERSIONS.items()}
+
+
+def register_model_conversion(popo_type: type, sqlalchemy_type: type):
+    """
+    Registers that the given POPO model type is equivalent to the given SQLAlchemy model type, so that models of these
+    types (and of their subclasses) can be converted between each other. Replaces any existing registration of either
+    type.
+    :param popo_type: the type of POPO model
+    :param sqlalchemy_type: the type of the equivalent SQLAlchemy model
+    """
+    if not issubclass(popo_type, Model):
+        raise ValueError("POPO model type (%s) must be a subclass of `Model`" % popo_type)
+    if not issubclass(sqlalchemy_type, SQLAlchemyModel):
+        raise ValueError("SQLAlchemy model type (%s) must be a subclass of `SQLAlchemyModel`" % sqlalchemy_type)
+
+    previous_sqlalchemy_type = _POPO_TO_SQLALCHEMY_CONVERSIONS.pop(popo_type, None)
+    _SQLALCHEMY_TO_POPO_CONVERSIONS.pop(previous_sqlalchemy_type, None)
+    previous_popo_type = _SQLALCHEMY_TO_POPO_CONVERSIONS.pop(sqlalchemy_type, None)
+    _POPO_TO_SQLALCHEMY_CONVERSIONS.pop(previous_popo_type, None)
+
+    _SQLALCHEMY_TO_POPO_CONVERSIONS[sqlalchemy_type] = popo_type
+    _POPO_TO_SQLALCHEMY_CONVERSIONS[popo_type] = sqlalchemy_type
+    _clear_conversion_caches()
+
+
+def _clear_conversion_caches():
+    """
+    Clears the cached lookups of registered types and the cached converters, which must be done whenever the registered
+    conversions change.
+    """
+    for cached in (_find_registered_popo_type, _find_registered_sqlalchemy_type, _get_popo_property_defaults,
+                   _get_popo_model_converter, _get_row_converter, _get_compact_row_converter,
+                   _get_sqlalchemy_model_converter, _get_table_row_converter):
+        cached.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def _find_registered_popo_type(sqlalchemy_type: type) -> Optional[type]:
+    """
+    Finds the POPO type registered for the given SQLAlchemy model type or, failing that, for the closest of its
+    superclasses.
+    :param sqlalchemy_type: the type of SQLAlchemy model
+    :return: the registered POPO type. `None` if there is not one
+    """
+    for cls in sqlalchemy_type.__mro__:
+        if cls in _SQLALCHEMY_TO_POPO_CONVERSIONS:
+            return _SQLALCHEMY_TO_POPO_CONVERSIONS[cls]
+    return None
+
+
+@lru_cache(maxsize=None)
+def _find_registered_sqlalchemy_type(popo_type: type) -> Optional[type]:
+    """
+    Finds the SQLAlchemy model type registered for the given POPO type or, failing that, for the closest of its
+    superclasses.
+    :param popo_type: the type of POPO model
+    :return: the registered SQLAlchemy model type. `None` if there is not one
+    """
+    for cls in popo_type.__mro__:
+        if cls in _POPO_TO_SQLALCHEMY_CONVERSIONS:
+            return _POPO_TO_SQLALCHEMY_CONVERSIONS[cls]
+    # Virtual subclasses (e.g. compact models) are registered with, rather than inherit from, the POPO type
+    for registered_popo_type, sqlalchemy_type in _POPO_TO_SQLALCHEMY_CONVERSIONS.items():
+        if issubclass(popo_type, registered_popo_type):
+            return sqlalchemy_type
+    return None
 
 
 def get_equivalent_popo_model_type(sqlalchemy_type: type) -> type:
@@ -21,10 +96,10 @@ def get_equivalent_popo_model_type(sqlalchemy_type: type) -> type:
     :param sqlalchemy_type: the type of SQLAlchemy model to get_by_path equivalent POPO for
     :return: the equivalent type of POPO for the given SQLAlchemy model type. `None` if no equivalent model is known
     """
-    if sqlalchemy_type not in _SQLALCHEMY_TO_POPO_CONVERSIONS:
+    popo_type = _find_registered_popo_type(sqlalchemy_type)
+    if popo_type is None:
         raise ValueError("No conversion of SQLAlchemy model of type `%s` known" % sqlalchemy_type)
-
-    return _SQLALCHEMY_TO_POPO_CONVERSIONS[sqlalchemy_type]
+    return popo_type
 
 
 def get_equivalent_sqlalchemy_model_type(popo_type: type) -> type:
@@ -33,10 +108,10 @@ def get_equivalent_sqlalchemy_model_type(popo_type: type) -> type:
     :param popo_type: the type of POPO model to get_by_path equivalent SQLAlchemy model for
     :return: the equivalent type of SQLAlchemy model to the given POPO. `None` if no equivalent model is known
     """
-    for key, value in _SQLALCHEMY_TO_POPO_CONVERSIONS.items():
-        if value == popo_type:
-            return key
-    raise ValueError("No conversion of POPO model of type `%s` known" % popo_type)
+    sqlalchemy_type = _find_registered_sqlalchemy_type(popo_type)
+    if sqlalchemy_type is None:
+        raise ValueError("No conversion of POPO model of type `%s` known" % popo_type)
+    return sqlalchemy_type
 
 
 def convert_to_popo_model(sqlalchemy_model: SQLAlchemyModel) -> Model:
@@ -46,20 +121,7 @@ def convert_to_popo_model(sqlalchemy_model: SQLAlchemyModel) -> Model:
     :param sqlalchemy_model: the SQLAlchemy model to convert
     :return: an equivalent POPO model
     """
-    type = sqlalchemy_model.__class__
-    convert_to_type = get_equivalent_popo_model_type(type)
-
-    if convert_to_type is None:
-        raise ValueError("SQLAlchemy models of type %s have not been setup for automatic conversion" % type)
-
-    converted = convert_to_type()
-    assert issubclass(converted.__class__, Model)
-
-    for property_name, value in vars(sqlalchemy_model).items():
-        if property_name in converted.__dict__:
-            converted.__dict__[property_name] = value
-
-    return converted
+    return _get_popo_model_converter(sqlalchemy_model.__class__)(sqlalchemy_model)
 
 
 def convert_to_popo_models(sqlalchemy_models: Iterable[SQLAlchemyModel]) -> Sequence[Model]:
@@ -69,7 +131,7 @@ def convert_to_popo_models(sqlalchemy_models: Iterable[SQLAlchemyModel]) -> Sequ
     :param sqlalchemy_models: the SQLAlchemy models to convert
     :return: an equivalent POPO models
     """
-    return [convert_to_popo_model(x) for x in sqlalchemy_models]
+    return _convert_all(sqlalchemy_models, _get_popo_model_converter)
 
 
 def convert_to_sqlalchemy_model(model: Model) -> SQLAlchemyModel:
@@ -78,25 +140,208 @@ def convert_to_sqlalchemy_model(model: Model) -> SQLAlchemyModel:
     :param model: the POPO model to convert
     :return: the equivalent SQLAlchemy model
     """
-    type = model.__class__
-    convert_to_type = get_equivalent_sqlalchemy_model_type(type)    # type: type
+    return _get_sqlalchemy_model_converter(model.__class__)(model)
 
-    if convert_to_type is None:
-        raise ValueError("Models of type %s have not been setup for automatic conversion to SQLAlchemy models" % type)
 
-    converted = convert_to_type()
-    assert issubclass(converted.__class__, SQLAlchemyModel)
+def convert_to_sqlalchemy_models(models: Iterable[Model]) -> Sequence[SQLAlchemyModel]:
+    """
+    Converts the given POPO models into equivalent SQLAlchemy models.
+    :param models: the POPO models to convert
+    :return: the equivalent SQLAlchemy models
+    """
+    return _convert_all(models, _get_sqlalchemy_model_converter)
 
-    for property_name, value in vars(model).items():
-        converted.__dict__[property_name] = value
 
+def convert_to_table_rows(models: Iterable[Model]) -> List[Dict[str, Any]]:
+    """
+    Converts the given POPO models into rows of the table of the equivalent SQLAlchemy model, for use in bulk inserts
+    that do not go through the ORM. Raises exception if cannot convert.
+    :param models: the POPO models to convert
+    :return: the rows as dictionaries, where the keys are column names
+    """
+    return _convert_all(models, _get_table_row_converter)
+
+
+def get_popo_model_columns(sqlalchemy_type: type) -> Tuple[Column, ...]:
+    """
+    Gets the columns that need to be selected to create POPO models equivalent to SQLAlchemy models of the given type
+    from rows (see `convert_rows_to_popo_models`). Raises exception if cannot convert.
+    :param sqlalchemy_type: the type of SQLAlchemy model
+    :return: the columns, in the order in which their values are expected in rows
+    """
+    return _get_row_converter(sqlalchemy_type)[0]
+
+
+def convert_rows_to_popo_models(sqlalchemy_type: type, rows: Iterable[Sequence[Any]]) -> List[Model]:
+    """
+    Converts the given rows, selected from the table of the given SQLAlchemy model type without going through the ORM,
+    into equivalent POPO models. Raises exception if cannot convert.
+    :param sqlalchemy_type: the type of SQLAlchemy model whose table the rows are from
+    :param rows: the rows, containing the values of the columns given by `get_popo_model_columns`, in that order
+    :return: the equivalent POPO models
+    """
+    convert = _get_row_converter(sqlalchemy_type)[1]
+    return [convert(row) for row in rows]
+
+
+def convert_rows_to_compact_models(sqlalchemy_type: type, rows: Iterable[Sequence[Any]]) -> List[CompactModel]:
+    """
+    Converts the given rows, selected from the table of the given SQLAlchemy model type without going through the ORM,
+    into equivalent compact models. Raises exception if cannot convert.
+    :param sqlalchemy_type: the type of SQLAlchemy model whose table the rows are from
+    :param rows: the rows, containing the values of the columns given by `get_popo_model_columns`, in that order
+    :return: the equivalent compact models
+    """
+    convert = _get_compact_row_converter(sqlalchemy_type)
+    return [convert(row) for row in rows]
+
+
+def _convert_all(models: Iterable[Any], get_converter: Callable[[type], Callable[[Any], Any]]) -> List[Any]:
+    """
+    Converts all of the given models in a single pass, only looking up the converter when the type of model changes.
+    :param models: the models to convert
+    :param get_converter: gets the converter for models of the given type
+    :return: the converted models
+    """
+    converted = []
+    append = converted.append
+    model_type = None
+    converter = None
+    for model in models:
+        if model.__class__ is not model_type:
+            model_type = model.__class__
+            converter = get_converter(model_type)
+        append(converter(model))
     return converted
 
 
-def convert_to_sqlalchemy_models(models: Iterable[Model]) -> Sequence[SQLAlchemyModel]:
+@lru_cache(maxsize=None)
+def _get_popo_property_defaults(popo_type: type) -> Tuple[Tuple[str, Any], ...]:
     """
-    Converts the given POPO models into equivalent SQLAlchemy models.
-    :param models: the POPO models to convert
-    :return: the equivalent SQLAlchemy models
+    Gets the names and default values of the properties of POPO models of the given type.
+    :param popo_type: the type of POPO model
+    :return: tuple of property name and default value pairs, in the order in which the constructor sets them
+    """
+    return tuple(vars(popo_type()).items())
+
+
+@lru_cache(maxsize=None)
+def _get_popo_model_converter(sqlalchemy_type: type) -> Callable[[SQLAlchemyModel], Model]:
+    """
+    Gets a converter of SQLAlchemy models of the given type into equivalent POPO models. The converter copies a fixed
+    set of properties and creates the POPO models without calling their constructor.
+    :param sqlalchemy_type: the type of SQLAlchemy model
+    :return: the converter
+    """
+    popo_type = get_equivalent_popo_model_type(sqlalchemy_type)
+    assert issubclass(popo_type, Model)
+    property_defaults = _get_popo_property_defaults(popo_type)
+    create = object.__new__
+
+    def convert(sqlalchemy_model: SQLAlchemyModel) -> Model:
+        # Properties are read from the instance dictionary directly to avoid triggering loads of expired properties
+        loaded = sqlalchemy_model.__dict__
+        converted = create(popo_type)
+        # The instance dictionary is filled in, rather than replaced, so that it shares its keys with the dictionaries
+        # of other instances of the type, which uses much less memory
+        converted.__dict__.update([(name, loaded.get(name, default)) for name, default in property_defaults])
+        return converted
+
+    return convert
+
+
+@lru_cache(maxsize=None)
+def _get_row_converter(sqlalchemy_type: type) -> Tuple[Tuple[Column, ...], Callable[[Sequence[Any]], Model]]:
     """
-    return [convert_to_sqlalchemy_model(x) for x in models]
+    Gets a converter of rows from the table of SQLAlchemy models of the given type into equivalent POPO models, along
+    with the columns that the rows must contain.
+    :param sqlalchemy_type: the type of SQLAlchemy model
+    :return: tuple containing the columns to select and the converter
+    """
+    popo_type = get_equivalent_popo_model_type(sqlalchemy_type)
+    assert issubclass(popo_type, Model)
+    property_defaults = _get_popo_property_defaults(popo_type)
+    columns_by_name = {column.key: column for column in sqlalchemy_type.__table__.columns}
+    # POPO properties that have no corresponding column keep their default values
+    columns = tuple(columns_by_name[name] for name, default in property_defaults if name in columns_by_name)
+    column_names = tuple(column.key for column in columns)
+    create = object.__new__
+
+    if len(columns) == len(property_defaults):
+        def convert(row: Sequence[Any]) -> Model:
+            converted = create(popo_type)
+            # Properties are set in the order in which the constructor sets them, so that the instance dictionary
+            # shares its keys with the dictionaries of other instances of the type
+            converted.__dict__.update(zip(column_names, row))
+            return converted
+    else:
+        def convert(row: Sequence[Any]) -> Model:
+            converted = create(popo_type)
+            properties = converted.__dict__
+            properties.update(property_defaults)
+            properties.update(zip(column_names, row))
+            return converted
+
+    return columns, convert
+
+
+@lru_cache(maxsize=None)
+def _get_compact_row_converter(sqlalchemy_type: type) -> Callable[[Sequence[Any]], CompactModel]:
+    """
+    Gets a converter of rows from the table of SQLAlchemy models of the given type, containing the columns given by
+    `get_popo_model_columns`, into equivalent compact models.
+    :param sqlalchemy_type: the type of SQLAlchemy model
+    :return: the converter
+    """
+    popo_type = get_equivalent_popo_model_type(sqlalchemy_type)
+    compact_type = get_compact_model_type(popo_type)
+    if compact_type is None:
+        raise ValueError("No compact equivalent of POPO model of type `%s` known" % popo_type)
+    column_names = [column.key for column in get_popo_model_columns(sqlalchemy_type)]
+    if not set(compact_type.__slots__).issubset(column_names):
+        raise ValueError("Not all properties of compact model of type `%s` are columns of `%s`"
+                         % (compact_type, sqlalchemy_type))
+    # Values are passed to the constructor in the order of the compact model's properties
+    reorder = operator.itemgetter(*(column_names.index(name) for name in compact_type.__slots__))
+
+    def convert(row: Sequence[Any]) -> CompactModel:
+        return compact_type(*reorder(row))
+
+    return convert
+
+
+@lru_cache(maxsize=None)
+def _get_sqlalchemy_model_converter(popo_type: type) -> Callable[[Model], SQLAlchemyModel]:
+    """
+    Gets a converter of POPO models of the given type into equivalent SQLAlchemy models. The converter copies the
+    properties that correspond to columns of the SQLAlchemy model.
+    :param popo_type: the type of POPO model
+    :return: the converter
+    """
+    sqlalchemy_type = get_equivalent_sqlalchemy_model_type(popo_type)
+    assert issubclass(sqlalchemy_type, SQLAlchemyModel)
+    property_names = tuple(column.key for column in sqlalchemy_type.__table__.columns)
+    new_instance = manager_of_class(sqlalchemy_type).new_instance
+
+    def convert(model: Model) -> SQLAlchemyModel:
+        converted = new_instance()
+        converted.__dict__.update((name, getattr(model, name, None)) for name in property_names)
+        return converted
+
+    return convert
+
+
+@lru_cache(maxsize=None)
+def _get_table_row_converter(popo_type: type) -> Callable[[Model], Dict[str, Any]]:
+    """
+    Gets a converter of POPO models of the given type into rows of the table of the equivalent SQLAlchemy model.
+    :param popo_type: the type of POPO model
+    :return: the converter
+    """
+    sqlalchemy_type = get_equivalent_sqlalchemy_model_type(popo_type)
+    column_names = tuple(column.key for column in sqlalchemy_type.__table__.columns)
+
+    def convert(model: Model) -> Dict[str, Any]:
+        return {name: getattr(model, name, None) for name in column_names}
+
+    return convert
@@ -1,8 +1,11 @@
 import urllib.parse
+from contextlib import contextmanager
+from typing import Iterator, Callable
 
-from sequencescape._sqlalchemy.database_connector import SQLAlchemyDatabaseConnector
+from sequencescape._sqlalchemy.database_connector import SQLAlchemyDatabaseConnector, ConnectionPoolStatistics
+from sequencescape._sqlalchemy.instrumentation import QueryStatistics, OperationRecord
 from sequencescape._sqlalchemy.mappers import SQLAlchemySampleMapper, SQLAlchemyMultiplexedLibraryMapper, \
-    SQLAlchemyLibraryMapper, SQLAlchemyWellMapper
+    SQLAlchemyLibraryMapper, SQLAlchemyWellMapper, DEFAULT_IN_CLAUSE_CHUNK_SIZE
 from sequencescape._sqlalchemy.mappers import SQLAlchemyStudyMapper
 
 
@@ -10,28 +13,126 @@ class Connection:
     """
     Connection manager for queries to the Sequencescape database.
     """
-    def __init__(self, database_location: str):
+    def __init__(self, database_location: str, pool_size: int=None, max_overflow: int=None, pool_recycle: int=None,
+                 pool_pre_ping: bool=False, in_clause_chunk_size: int=DEFAULT_IN_CLAUSE_CHUNK_SIZE,
+                 max_parallel_queries: int=1, core_reads: bool=False, compact_models: bool=False,
+                 slow_query_threshold: float=None):
         """
         Constructor.
         :param database_location: location of the database as a URL
+        :param pool_size: the number of database connections to keep open. `None` to use the database dialect's
+        default
+        :param max_overflow: the number of connections that can be opened above `pool_size` when under load. `None` to
+        use the database dialect's default
+        :param pool_recycle: number of seconds after which a connection is replaced. `None` to never recycle
+        :param pool_pre_ping: whether to test connections are alive before they are used
+        :param in_clause_chunk_size: the maximum number of values to look up in a single query
+        :param max_parallel_queries: the maximum number of queries that a single lookup can execute at the same time
+        :param core_reads: whether to read models from plain rows selected with SQLAlchemy Core instead of the ORM
+        :param compact_models: whether to read models as their memory-compact equivalents
+        :param slow_query_threshold: the number of seconds above which queries are logged as slow. `None` to not log
         """
         parsed_database_location = urllib.parse.urlparse(database_location)
         if parsed_database_location.scheme == "":
             raise ValueError("Database location must define a scheme (%s given)" % database_location)
 
-        database_connector = SQLAlchemyDatabaseConnector(database_location)
-        self.sample = SQLAlchemySampleMapper(database_connector)
-        self.study = SQLAlchemyStudyMapper(database_connector)
-        self.multiplexed_library = SQLAlchemyMultiplexedLibraryMapper(database_connector)
-        self.library = SQLAlchemyLibraryMapper(database_connector)
-        self.well = SQLAlchemyWellMapper(database_connector)
+        self._database_connector = SQLAlchemyDatabaseConnector(
+            database_location, pool_size=pool_size, max_overflow=max_overflow, pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping, slow_query_threshold=slow_query_threshold)
+        mapper_options = dict(in_clause_chunk_size=in_clause_chunk_size, max_parallel_queries=max_parallel_queries,
+                              core_reads=core_reads, compact_models=compact_models)
+        self.sample = SQLAlchemySampleMapper(self._database_connector, **mapper_options)
+        self.study = SQLAlchemyStudyMapper(self._database_connector, **mapper_options)
+        self.multiplexed_library = SQLAlchemyMultiplexedLibraryMapper(self._database_connector, **mapper_options)
+        self.library = SQLAlchemyLibraryMapper(self._database_connector, **mapper_options)
+        self.well = SQLAlchemyWellMapper(self._database_connector, **mapper_options)
+
+    @contextmanager
+    def session(self) -> Iterator[None]:
+        """
+        Context manager within which all mapper operations made by the current thread share a single database session
+        and transaction, which is committed once when the block exits normally or rolled back if an exception is raised.
+        Lookups made within the block see data added earlier in it.
+
+        Queries are not run in parallel within the block.
+        """
+        with self._database_connector.shared_session_scope():
+            yield
+
+    def get_pool_statistics(self) -> ConnectionPoolStatistics:
+        """
+        Gets statistics about the usage of the pool of connections to the database.
+        :return: the connection pool statistics
+        """
+        return self._database_connector.get_pool_statistics()
+
+    def get_query_statistics(self) -> QueryStatistics:
+        """
+        Gets a snapshot of the statistics of the queries made through this connection, including the timings of each
+        mapper operation (e.g. `Sample.get_by_name`).
+        :return: the query statistics
+        """
+        return self._database_connector.instrumentation.get_statistics()
+
+    def reset_query_statistics(self):
+        """
+        Discards the query statistics recorded so far.
+        """
+        self._database_connector.instrumentation.reset()
+
+    def add_instrumentation_hook(self, hook: Callable[[OperationRecord], None]):
+        """
+        Adds a function that is called with the record of each mapper operation when it finishes, e.g. to feed timings
+        into a metrics system. Exceptions raised by the function are logged and otherwise ignored.
+        :param hook: the function to add. It is called on the thread that made the operation so should be quick
+        """
+        self._database_connector.instrumentation.add_hook(hook)
+
+    def remove_instrumentation_hook(self, hook: Callable[[OperationRecord], None]):
+        """
+        Removes a function previously added with `add_instrumentation_hook`.
+        :param hook: the function to remove
+        """
+        self._database_connector.instrumentation.remove_hook(hook)
+
+    def close(self):
+        """
+        Closes the idle connections to the database and shuts down the threads that the mappers use to run queries in
+        parallel. The connection can still be used afterwards.
+        """
+        for mapper in (self.sample, self.study, self.multiplexed_library, self.library, self.well):
+            mapper.close()
+        self._database_connector.dispose()
 
 
-def connect_to_sequencescape(database_uri: str) -> Connection:
+def connect_to_sequencescape(database_uri: str, pool_size: int=None, max_overflow: int=None, pool_recycle: int=None,
+                             pool_pre_ping: bool=False, in_clause_chunk_size: int=DEFAULT_IN_CLAUSE_CHUNK_SIZE,
+                             max_parallel_queries: int=1, core_reads: bool=False, compact_models: bool=False,
+                             slow_query_threshold: float=None) -> Connection:
     """
     Creates an object that enables the transfer of data from a Sequencescape database to be made using data mappers.
-    Only opens connections when data mappers are used.
+    Only opens connections when data mappers are used. Connections are pooled and reused between uses of the mappers.
     :param database_uri: location of the database as a URL
+    :param pool_size: the number of database connections to keep open. `None` to use the database dialect's default
+    :param max_overflow: the number of connections that can be opened above `pool_size` when under load. `None` to use
+    the database dialect's default
+    :param pool_recycle: number of seconds after which a connection is replaced, which should be less than the database
+    server's idle connection timeout. `None` to never recycle
+    :param pool_pre_ping: whether to test connections are alive before they are used, replacing them if not
+    :param in_clause_chunk_size: the maximum number of values to look up in a single query. Lookups of more values are
+    split into several queries
+    :param max_parallel_queries: the maximum number of queries that a single lookup of many values can execute at the
+    same time. 1 to execute them one after another
+    :param core_reads: whether to read data by selecting plain rows with SQLAlchemy Core, which are converted straight
+    into models, instead of going through the ORM. This is faster when reading many rows
+    :param compact_models: whether to read models as their memory-compact equivalents (e.g. `CompactSample`), which
+    behave like the models (including passing `isinstance` checks) but use much less memory. Properties cannot be added
+    to them
+    :param slow_query_threshold: the number of seconds above which queries are logged (with a warning) to the
+    `sequencescape.slow_queries` logger. `None` to not log slow queries
     :return: object through which connections can be made to the Sequencescape database
     """
-    return Connection(database_uri)
+    return Connection(database_uri, pool_size=pool_size, max_overflow=max_overflow, pool_recycle=pool_recycle,
+                      pool_pre_ping=pool_pre_ping, in_clause_chunk_size=in_clause_chunk_size,
+                      max_parallel_queries=max_parallel_queries, core_reads=core_reads,
+                      compact_models=compact_models, slow_query_threshold=slow_query_threshold)
@@ -0,0 +1,376 @@
+import asyncio
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor, Executor
+from threading import Event, Thread
+from typing import Union, Any, Iterable, Sequence, Tuple, Optional, Callable, Iterator, Generic, List
+
+from sequencescape._sqlalchemy.database_connector import ConnectionPoolStatistics
+from sequencescape._sqlalchemy.instrumentation import QueryStatistics
+from sequencescape.api import Connection
+from sequencescape.enums import Property
+from sequencescape.mappers import Mapper, MappedType, SampleMapper, StudyMapper
+from sequencescape.models import Sample, Study, NamedModel, InternalIdModel, AccessionNumberModel
+
+# Number of models passed from the thread reading them to the event loop at a time
+DEFAULT_ASYNC_ITERATION_BATCH_SIZE = 1000
+
+# Number of batches that a thread reading models can get ahead of the coroutine consuming them
+_ITERATION_QUEUE_SIZE = 2
+
+# Number of seconds after which a thread waiting to pass on models checks whether the consumer has gone away
+_ITERATION_STOP_CHECK_INTERVAL = 0.1
+
+# Marks the end of iteration in the queue of batches
+_END_OF_ITERATION = object()
+
+
+class AsyncModelIterator(Generic[MappedType]):
+    """
+    Asynchronous iterator of the models produced by a (synchronous) iterator, which is run on a thread of its own so
+    that the event loop is not blocked. The thread is not taken from the pool that runs the other asynchronous
+    operations, so iterations (which can last as long as their consumers take) cannot starve those operations of
+    threads. The models are passed to the event loop in batches, with the thread reading at most a couple of batches
+    ahead of the consumer.
+
+    The iterator should be iterated to the end, closed with `aclose` or used as an asynchronous context manager, else
+    the thread (and any database connection that it holds) is only freed once the iterator has been garbage collected.
+    """
+    def __init__(self, create_iterator: Callable[[], Iterator[MappedType]],
+                 batch_size: int=DEFAULT_ASYNC_ITERATION_BATCH_SIZE):
+        """
+        Constructor.
+        :param create_iterator: creates the iterator of models, which is created and advanced on a single thread
+        :param batch_size: the number of models passed to the event loop at a time
+        """
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1 (%d given)" % batch_size)
+        self._create_iterator = create_iterator
+        self._batch_size = batch_size
+        self._queue = None   # type: asyncio.Queue
+        self._batch = iter([])   # type: Iterator[MappedType]
+        self._stopped = Event()
+        self._finished = False
+        self._thread = None     # type: Thread
+
+    def __aiter__(self) -> "AsyncModelIterator[MappedType]":
+        return self
+
+    async def __anext__(self) -> MappedType:
+        while True:
+            for model in self._batch:
+                return model
+            if self._finished:
+                raise StopAsyncIteration()
+            if self._queue is None:
+                loop = asyncio.get_event_loop()
+                self._queue = asyncio.Queue(maxsize=_ITERATION_QUEUE_SIZE)
+                self._thread = Thread(target=self._produce, args=(loop, ), name="AsyncModelIterator", daemon=True)
+                self._thread.start()
+
+            batch = await self._queue.get()
+            if batch is _END_OF_ITERATION:
+                self._finished = True
+            elif isinstance(batch, BaseException):
+                self._finished = True
+                raise batch
+            else:
+                self._batch = iter(batch)
+
+    async def aclose(self):
+        """
+        Stops the iteration, freeing the thread that reads the models (once any read that it is making has finished).
+        """
+        self._finished = True
+        self._stopped.set()
+
+    async def __aenter__(self) -> "AsyncModelIterator[MappedType]":
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    def __del__(self):
+        self._stopped.set()
+
+    def _produce(self, loop: asyncio.AbstractEventLoop):
+        """
+        Reads models from the iterator, passing them to the event loop in batches. Runs on the thread of this iterator.
+        :param loop: the event loop that the models are consumed on
+        """
+        try:
+            iterator = self._create_iterator()
+            try:
+                batch = []   # type: List[MappedType]
+                for model in iterator:
+                    batch.append(model)
+                    if len(batch) == self._batch_size:
+                        if not self._put(batch, loop):
+                            return
+                        batch = []
+                if len(batch) > 0 and not self._put(batch, loop):
+                    return
+            finally:
+                # Closing the iterator releases any database connection that it holds
+                if hasattr(iterator, "close"):
+                    iterator.close()
+        except Exception as e:
+            # Nothing is waiting for the exception if the iteration has been stopped
+            if not self._stopped.is_set():
+                self._put(e, loop)
+            return
+        self._put(_END_OF_ITERATION, loop)
+
+    def _put(self, item: Any, loop: asyncio.AbstractEventLoop) -> bool:
+        """
+        Puts the given item into the queue read by the consumer, waiting until there is space.
+        :param item: the item to put into the queue
+        :param loop: the event loop that the queue belongs to
+        :return: whether the item was put into the queue, which it is not if the iteration has been stopped or the event
+        loop has been closed
+        """
+        if self._stopped.is_set() or loop.is_closed():
+            return False
+        coroutine = self._queue.put(item)
+        try:
+            future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+        except RuntimeError:
+            # The event loop was closed after it was checked
+            coroutine.close()
+            return False
+        while True:
+            try:
+                future.result(timeout=_ITERATION_STOP_CHECK_INTERVAL)
+                return True
+            except concurrent.futures.TimeoutError:
+                if loop.is_closed():
+                    # The put can no longer be cancelled through the event loop so is closed directly, which raises
+                    # when it tries to clean up with the closed event loop (which holds nothing to clean up)
+                    try:
+                        coroutine.close()
+                    except RuntimeError:
+                        pass
+                    return False
+                if self._stopped.is_set():
+                    future.cancel()
+                    return False
+
+
+class AsyncMapper(Generic[MappedType]):
+    """
+    Asynchronous counterpart of `Mapper`, which runs the operations of a (synchronous) mapper on the threads of an
+    executor so that they do not block the event loop. Many operations can run at the same time.
+    """
+    def __init__(self, mapper: Mapper[MappedType], executor: Executor):
+        """
+        Constructor.
+        :param mapper: the mapper whose operations are run
+        :param executor: the executor on which the operations are run
+        """
+        self._mapper = mapper
+        self._executor = executor
+
+    async def add(self, models: Union[MappedType, Iterable[MappedType]]):
+        """
+        See `Mapper.add`.
+        """
+        await self._run(self._mapper.add, models)
+
+    async def get_all(self) -> Sequence[MappedType]:
+        """
+        See `Mapper.get_all`.
+        """
+        return await self._run(self._mapper.get_all)
+
+    async def get_by_property_value(self, property: Union[str, Union[Tuple[str, Any]], Iterable[Tuple[str, Any]]],
+                                    values: Optional[Union[Any, Iterable[Any]]]=None) -> Sequence[MappedType]:
+        """
+        See `Mapper.get_by_property_value`.
+        """
+        return await self._run(self._mapper.get_by_property_value, property, values)
+
+    def iter_all(self, batch_size: int=DEFAULT_ASYNC_ITERATION_BATCH_SIZE) -> AsyncModelIterator[MappedType]:
+        """
+        Asynchronous counterpart of `Mapper.iter_all`.
+        :param batch_size: the number of models passed to the event loop at a time
+        :return: asynchronous iterator of models representing each piece of data in the database of the type this
+        mapper deals with
+        """
+        return AsyncModelIterator(self._mapper.iter_all, batch_size)
+
+    def iter_by_property_value(self, property: Union[str, Union[Tuple[str, Any]], Iterable[Tuple[str, Any]]],
+                               values: Optional[Union[Any, Iterable[Any]]]=None,
+                               batch_size: int=DEFAULT_ASYNC_ITERATION_BATCH_SIZE) -> AsyncModelIterator[MappedType]:
+        """
+        Asynchronous counterpart of `Mapper.iter_by_property_value`.
+        :param property: see `Mapper.get_by_property_value`
+        :param values: see `Mapper.get_by_property_value`
+        :param batch_size: the number of models passed to the event loop at a time
+        :return: asynchronous iterator of models that have the given property values
+        """
+        return AsyncModelIterator(lambda: self._mapper.iter_by_property_value(property, values), batch_size)
+
+    async def _run(self, function: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs the given function with the given arguments on the executor.
+        :param function: the function to run
+        :param args: the arguments to call the function with
+        :return: the value that the function returns
+        """
+        return await asyncio.get_event_loop().run_in_executor(self._executor, function, *args)
+
+
+class AsyncNamedMapper(AsyncMapper[NamedModel]):
+    """
+    Asynchronous mapper for `Named` models.
+    """
+    async def get_by_name(self, names: Union[str, Iterable[str]]) -> Sequence[NamedModel]:
+        """
+        See `NamedMapper.get_by_name`.
+        """
+        return await self.get_by_property_value(Property.NAME, names)
+
+
+class AsyncInternalIdMapper(AsyncMapper[InternalIdModel]):
+    """
+    Asynchronous mapper for `InternalId` models.
+    """
+    async def get_by_id(self, internal_ids: Union[int, Iterable[int]]) -> Sequence[InternalIdModel]:
+        """
+        See `InternalIdMapper.get_by_id`.
+        """
+        return await self.get_by_property_value(Property.INTERNAL_ID, internal_ids)
+
+
+class AsyncAccessionNumberMapper(AsyncMapper[AccessionNumberModel]):
+    """
+    Asynchronous mapper for `AccessionNumber` models.
+    """
+    async def get_by_accession_number(self, accession_numbers: Union[str, Iterable[str]]) \
+            -> Sequence[AccessionNumberModel]:
+        """
+        See `AccessionNumberMapper.get_by_accession_number`.
+        """
+        return await self.get_by_property_value(Property.ACCESSION_NUMBER, accession_numbers)
+
+
+class AsyncSampleMapper(AsyncNamedMapper, AsyncInternalIdMapper, AsyncAccessionNumberMapper):
+    """
+    Asynchronous mapper for `Sample` models.
+    """
+    def __init__(self, mapper: SampleMapper, executor: Executor):
+        """
+        Constructor.
+        :param mapper: the sample mapper whose operations are run
+        :param executor: the executor on which the operations are run
+        """
+        super().__init__(mapper, executor)
+
+    async def set_association_with_study(self, samples: Union[Sample, Iterable[Sample]],
+                                         study: Union[Study, Iterable[Study]]):
+        """
+        See `SampleMapper.set_association_with_study`.
+        """
+        await self._run(self._mapper.set_association_with_study, samples, study)
+
+    async def get_associated_with_study(self, studies: Union[Study, Iterable[Study]]) -> Sequence[Sample]:
+        """
+        See `SampleMapper.get_associated_with_study`.
+        """
+        return await self._run(self._mapper.get_associated_with_study, studies)
+
+
+class AsyncStudyMapper(AsyncNamedMapper, AsyncInternalIdMapper, AsyncAccessionNumberMapper):
+    """
+    Asynchronous mapper for `Study` models.
+    """
+    def __init__(self, mapper: StudyMapper, executor: Executor):
+        """
+        Constructor.
+        :param mapper: the study mapper whose operations are run
+        :param executor: the executor on which the operations are run
+        """
+        super().__init__(mapper, executor)
+
+    async def set_association_with_sample(self, studies: Union[Study, Iterable[Study]],
+                                          sample: Union[Sample, Iterable[Sample]]):
+        """
+        See `StudyMapper.set_association_with_sample`.
+        """
+        await self._run(self._mapper.set_association_with_sample, studies, sample)
+
+    async def get_associated_with_sample(self, samples: Union[Sample, Iterable[Sample]]) -> Sequence[Study]:
+        """
+        See `StudyMapper.get_associated_with_sample`.
+        """
+        return await self._run(self._mapper.get_associated_with_sample, samples)
+
+
+class AsyncLibraryMapper(AsyncNamedMapper, AsyncInternalIdMapper):
+    """
+    Asynchronous mapper for `Library` models.
+    """
+
+
+class AsyncMultiplexedLibraryMapper(AsyncNamedMapper, AsyncInternalIdMapper):
+    """
+    Asynchronous mapper for `MultiplexedLibrary` models.
+    """
+
+
+class AsyncWellMapper(AsyncNamedMapper, AsyncInternalIdMapper):
+    """
+    Asynchronous mapper for `Well` models.
+    """
+
+
+class AsyncConnection:
+    """
+    Asynchronous counterpart of `Connection`, whose mappers run queries on a managed pool of threads.
+    """
+    def __init__(self, connection: Connection, max_workers: int=None):
+        """
+        Constructor.
+        :param connection: the (synchronous) connection whose mappers are used
+        :param max_workers: the maximum number of operations that can run at the same time. `None` to use the default
+        of `ThreadPoolExecutor`
+        """
+        self._connection = connection
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.sample = AsyncSampleMapper(connection.sample, self._executor)
+        self.study = AsyncStudyMapper(connection.study, self._executor)
+        self.multiplexed_library = AsyncMultiplexedLibraryMapper(connection.multiplexed_library, self._executor)
+        self.library = AsyncLibraryMapper(connection.library, self._executor)
+        self.well = AsyncWellMapper(connection.well, self._executor)
+
+    def get_pool_statistics(self) -> ConnectionPoolStatistics:
+        """
+        See `Connection.get_pool_statistics`.
+        """
+        return self._connection.get_pool_statistics()
+
+    def get_query_statistics(self) -> QueryStatistics:
+        """
+        See `Connection.get_query_statistics`.
+        """
+        return self._connection.get_query_statistics()
+
+    async def close(self):
+        """
+        Waits for running operations to finish then closes the pool of threads and the idle connections to the
+        database. The connection cannot be used afterwards.
+        """
+        await asyncio.get_event_loop().run_in_executor(None, self._executor.shutdown)
+        self._connection.close()
+
+
+def connect_to_sequencescape_async(database_uri: str, max_workers: int=None, **kwargs) -> AsyncConnection:
+    """
+    Creates an object that enables the transfer of data from a Sequencescape database to be made using asynchronous
+    data mappers. Queries are run on a managed pool of threads so that they do not block the event loop.
+    :param database_uri: location of the database as a URL
+    :param max_workers: the maximum number of queries that can run at the same time. Should not be more than the
+    number of connections that the connection pool allows. `None` to use the default of `ThreadPoolExecutor`
+    :param kwargs: connection options, as defined in `connect_to_sequencescape`
+    :return: object through which connections can be made to the Sequencescape database
+    """
+    return AsyncConnection(Connection(database_uri, **kwargs), max_workers=max_workers)
@@ -0,0 +1,203 @@
+import collections
+import copy
+from concurrent.futures import Future
+from threading import Lock, Event
+from typing import Any, Iterable, Sequence, List, Dict, Tuple
+
+from sequencescape._delegating_mappers import DelegatingMapper, DelegatingSampleMapper, DelegatingStudyMapper
+from sequencescape.mappers import Mapper, MappedType, SampleMapper, StudyMapper, LibraryMapper, \
+    MultiplexedLibraryMapper, WellMapper
+from sequencescape.models import Sample, Study, Library, MultiplexedLibrary, Well
+
+# Number of seconds for which lookups are collected before they are made as a batch
+DEFAULT_BATCH_WINDOW = 0.005
+
+# Number of values after which a batch of lookups is made without waiting for the rest of the window
+DEFAULT_MAX_BATCH_SIZE = 500
+
+
+class _Batch:
+    """
+    Lookups of values of a property that are to be made together.
+    """
+    def __init__(self):
+        self.values = collections.OrderedDict()   # type: Dict[Any, None]
+        self.requests = []   # type: List[Tuple[List[Any], Future]]
+        self.full = Event()
+
+
+class BatchingMapper(DelegatingMapper[MappedType]):
+    """
+    Mapper that combines lookups by property value that are made at about the same time (e.g. by different threads)
+    into a single lookup through another mapper.
+
+    The first lookup of a property starts a batch, which collects the lookups of the same property that are made in the
+    following window of time, or until the batch has reached its maximum size. The thread that started the batch then
+    makes the lookup for all of the values in the batch and each of the waiting threads is given the models that match
+    the values it asked for.
+    """
+    def __init__(self, mapper: Mapper[MappedType], batch_window: float=DEFAULT_BATCH_WINDOW,
+                 max_batch_size: int=DEFAULT_MAX_BATCH_SIZE):
+        """
+        Constructor.
+        :param mapper: the mapper through which data is got from the database
+        :param batch_window: the number of seconds for which lookups are collected into a batch
+        :param max_batch_size: the number of values in a batch after which its lookup is made without waiting for the
+        window to end
+        """
+        if batch_window < 0:
+            raise ValueError("Batch window cannot be negative (%s given)" % batch_window)
+        if max_batch_size < 1:
+            raise ValueError("Maximum batch size must be at least 1 (%d given)" % max_batch_size)
+        super().__init__(mapper)
+        self._batch_window = batch_window
+        self._max_batch_size = max_batch_size
+        self._batches = {}    # type: Dict[str, _Batch]
+        self._batches_lock = Lock()
+
+    def _get_by_property_value_sequence(self, property: str, values: Iterable[Any]) -> Sequence[MappedType]:
+        values = list(values)
+        if len(values) == 0:
+            return []
+        future = Future()
+        with self._batches_lock:
+            batch = self._batches.get(property)
+            started_batch = batch is None
+            if started_batch:
+                batch = _Batch()
+                self._batches[property] = batch
+            batch.requests.append((values, future))
+            batch.values.update((value, None) for value in values)
+            if len(batch.values) >= self._max_batch_size:
+                # Later lookups go into a new batch
+                del self._batches[property]
+                batch.full.set()
+
+        if started_batch:
+            # Whatever happens, every lookup in the batch must be given a result or an exception, else the threads
+            # waiting for them would wait forever
+            try:
+                batch.full.wait(self._batch_window)
+                with self._batches_lock:
+                    if self._batches.get(property) is batch:
+                        del self._batches[property]
+                self._make_lookup(property, batch)
+            except Exception as e:
+                # Given to this lookup too, through its future
+                self._fail_lookups(property, batch, e)
+            except BaseException as e:
+                self._fail_lookups(property, batch, e)
+                raise
+
+        return future.result()
+
+    def _make_lookup(self, property: str, batch: _Batch):
+        """
+        Makes the lookup for all of the values in the given batch, giving the results to the lookups in the batch. If an
+        exception is raised, some lookups in the batch may not have been given a result.
+        :param property: the property that the values in the batch are of
+        :param batch: the batch of lookups, to which no more lookups can be added
+        """
+        models = self._mapper._get_by_property_value_sequence(property, list(batch.values.keys()))
+        models_by_value = collections.defaultdict(list)
+        for model in models:
+            models_by_value[getattr(model, property)].append(model)
+        number_matched = sum(len(matched) for value, matched in models_by_value.items() if value in batch.values)
+        all_matched = number_matched == len(models)
+
+        for values, future in batch.requests:
+            if all_matched:
+                results = []
+                for value in collections.OrderedDict.fromkeys(values):
+                    # Each lookup gets its own copies, as the same model may be given to many lookups
+                    results.extend(copy.copy(model) for model in models_by_value.get(value, []))
+                future.set_result(results)
+            else:
+                # The database matched values differently (e.g. ignoring case) so the results cannot be shared out by
+                # value: each lookup in the batch has to be made on its own instead
+                try:
+                    future.set_result(self._mapper._get_by_property_value_sequence(property, values))
+                except Exception as e:
+                    future.set_exception(e)
+
+    def _fail_lookups(self, property: str, batch: _Batch, exception: BaseException):
+        """
+        Gives the given exception to each lookup in the given batch that has not yet been given a result.
+        :param property: the property that the values in the batch are of
+        :param batch: the batch of lookups
+        :param exception: the exception to give
+        """
+        with self._batches_lock:
+            # No more lookups can be added to the batch once it is no longer the current batch of the property
+            if self._batches.get(property) is batch:
+                del self._batches[property]
+            requests = list(batch.requests)
+        for values, future in requests:
+            if not future.done():
+                future.set_exception(exception)
+
+
+class BatchingSampleMapper(BatchingMapper[Sample], DelegatingSampleMapper):
+    """
+    Implementation of `SampleMapper` that combines concurrent lookups made through another `SampleMapper`.
+    """
+    def __init__(self, mapper: SampleMapper, **kwargs):
+        """
+        Constructor.
+        :param mapper: the mapper through which data is got from the database
+        :param kwargs: batching options, as defined in the constructor of `BatchingMapper`
+        """
+        super().__init__(mapper, **kwargs)
+
+
+class BatchingStudyMapper(BatchingMapper[Study], DelegatingStudyMapper):
+    """
+    Implementation of `StudyMapper` that combines concurrent lookups made through another `StudyMapper`.
+    """
+    def __init__(self, mapper: StudyMapper, **kwargs):
+        """
+        Constructor.
+        :param mapper: the mapper through which data is got from the database
+        :param kwargs: batching options, as defined in the constructor of `BatchingMapper`
+        """
+        super().__init__(mapper, **kwargs)
+
+
+class BatchingLibraryMapper(BatchingMapper[Library], LibraryMapper):
+    """
+    Implementation of `LibraryMapper` that combines concurrent lookups made through another `LibraryMapper`.
+    """
+    def __init__(self, mapper: LibraryMapper, **kwargs):
+        """
+        Constructor.
+        :param mapper: the mapper through which data is got from the database
+        :param kwargs: batching options, as defined in the constructor of `BatchingMapper`
+        """
+        super().__init__(mapper, **kwargs)
+
+
+class BatchingMultiplexedLibraryMapper(BatchingMapper[MultiplexedLibrary], MultiplexedLibraryMapper):
+    """
+    Implementation of `MultiplexedLibraryMapper` that combines concurrent lookups made through another
+    `MultiplexedLibraryMapper`.
+    """
+    def __init__(self, mapper: MultiplexedLibraryMapper, **kwargs):
+        """
+        Constructor.
+        :param mapper: the mapper through which data is got from the database
+        :param kwargs: batching options, as defined in the constructor of `BatchingMapper`
+        """
+        super().__init__(mapper, **kwargs)
+
+
+class BatchingWellMapper(BatchingMapper[Well], WellMapper):
+    """
+    Implementation of `WellMapper` that combines concurrent lookups made through another `WellMapper`.
+    """
+    def __init__(self, mapper: WellMapper, **kwargs):
+        """
+        Constructor.
+        :param mapper: the mapper through which data is got from the database
+        :param kwargs: batching options, as defined in the constructor of `BatchingMapper`
+        """
+        super().__init__(mapper, **kwargs)
@@ -0,0 +1,301 @@
+import collections
+import collections.abc
+import itertools
+import struct
+from operator import attrgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from sequencescape.columnar import _get_model_factory
+from sequencescape.compact_models import get_compact_model_type
+from sequencescape.models import Sample, Study, Library, MultiplexedLibrary, Well
+
+# A list of models of one type is encoded as (with all integers little-endian):
+# - header: magic bytes, format version, model type code, number of properties, number of records and number of strings
+# - records: one fixed-size record per model, holding the internal ID (a signed 64-bit integer) followed by the index of
+#   the value of each of the model's string properties in the string table (an unsigned 32-bit integer, where 0 is
+#   `None`). Properties are in the order of the slots of the equivalent compact model
+# - string table: the offset of each string (and of the end of the last), followed by the UTF-8 encoded strings. Each
+#   distinct string is held once, however many models have it
+# As records are of a fixed size, any model can be decoded without decoding the others (see `BinaryModels`)
+BINARY_FORMAT_MAGIC = b"SQSB"
+BINARY_FORMAT_VERSION = 1
+
+# Type codes of the models that can be encoded
+_MODEL_TYPE_CODES = collections.OrderedDict([
+    (Sample, 1),
+    (Study, 2),
+    (Library, 3),
+    (MultiplexedLibrary, 4),
+    (Well, 5)
+])   # type: Dict[type, int]
+_MODEL_TYPES = {code: model_type for model_type, code in _MODEL_TYPE_CODES.items()}   # type: Dict[int, type]
+
+_HEADER = struct.Struct("<4sBBHII")
+_STRING_OFFSET = struct.Struct("<I")
+_INTERNAL_ID = struct.Struct("<q")
+_STRING_INDEX = struct.Struct("<I")
+
+# Value of the internal ID in a record of a model without one
+_NO_INTERNAL_ID = -2 ** 63
+
+# Index in the string table of `None`
+_NO_STRING = 0
+
+
+def _get_property_names(model_type: type) -> Sequence[str]:
+    """
+    Gets the names of the properties of models of the given type, in the order in which they are held in records.
+    :param model_type: the type of model
+    :return: the internal ID followed by the names of the string properties
+    """
+    return get_compact_model_type(model_type).__slots__
+
+
+def _get_record_format(model_type: type) -> str:
+    """
+    Gets the format (as used by `struct`, without byte order) of the records of models of the given type.
+    :param model_type: the type of model
+    :return: the record format
+    """
+    return "q%dI" % (len(_get_property_names(model_type)) - 1)
+
+
+def _get_model_type(models: Sequence[Any]) -> type:
+    """
+    Gets the type of the given models, as it is encoded.
+    :param models: the models, which must all be of the same type
+    :return: the type of model
+    """
+    if len(models) == 0:
+        raise ValueError("Type of model must be given if there are no models")
+    for model_type in _MODEL_TYPE_CODES.keys():
+        if isinstance(models[0], model_type):
+            return model_type
+    raise ValueError("Models of type `%s` cannot be encoded" % type(models[0]))
+
+
+def encode_models(models: Iterable[Any], model_type: type=None) -> bytes:
+    """
+    Encodes the given models in the binary format.
+    :param models: the models (or compact models), which must all be of the same type
+    :param model_type: the type of the models. `None` to use the type of the first model
+    :return: the encoded models
+    """
+    models = list(models)
+    if model_type is None:
+        model_type = _get_model_type(models)
+    if model_type not in _MODEL_TYPE_CODES:
+        raise ValueError("Models of type `%s` cannot be encoded" % model_type)
+
+    for type_of_model in set(map(type, models)):
+        if not issubclass(type_of_model, model_type):
+            raise ValueError("Models of type `%s` are not of type `%s`" % (type_of_model, model_type))
+    property_names = _get_property_names(model_type)
+    columns = [list(map(attrgetter(name), models)) for name in property_names]
+
+    internal_ids = columns[0]
+    if not set(map(type, internal_ids)) <= {int, type(None)}:
+        raise ValueError("Internal IDs must be integers or `None`")
+    if None in internal_ids:
+        internal_ids = [_NO_INTERNAL_ID if internal_id is None else internal_id for internal_id in internal_ids]
+
+    # Values are indexed a column at a time, using set operations to find the strings not seen in previous columns.
+    # These are sorted so that equal models are always encoded the same
+    strings = []    # type: List[str]
+    string_indices = {None: _NO_STRING}     # type: Dict[Optional[str], int]
+    string_index_columns = []   # type: List[List[int]]
+    for name, column in zip(property_names[1:], columns[1:]):
+        if not set(map(type, column)) <= {str, type(None)}:
+            raise ValueError("Values of `%s` must be strings or `None`" % name)
+        for string in sorted(set(column).difference(string_indices)):
+            strings.append(string)
+            string_indices[string] = len(strings)
+        string_index_columns.append(list(map(string_indices.__getitem__, column)))
+
+    encoded_strings = [string.encode("utf-8") for string in strings]
+    string_offsets = [0]
+    for encoded_string in encoded_strings:
+        string_offsets.append(string_offsets[-1] + len(encoded_string))
+
+    return b"".join([
+        _HEADER.pack(BINARY_FORMAT_MAGIC, BINARY_FORMAT_VERSION, _MODEL_TYPE_CODES[model_type],
+                     len(property_names), len(models), len(encoded_strings)),
+        struct.pack("<" + _get_record_format(model_type) * len(models),
+                    *itertools.chain.from_iterable(zip(internal_ids, *string_index_columns))),
+        struct.pack("<%dI" % len(string_offsets), *string_offsets),
+        b"".join(encoded_strings)
+    ])
+
+
+def decode_models(buffer: Union[bytes, bytearray, memoryview], compact: bool=False) -> List[Any]:
+    """
+    Decodes all of the models encoded in the binary format in the given buffer. Each distinct string is only decoded
+    once, with models that have equal values sharing the same string object.
+    :param buffer: the buffer (e.g. `bytes`, `memoryview` or `mmap`) containing the encoded models
+    :param compact: whether to decode the models as their compact equivalents
+    :return: the models
+    """
+    with BinaryModels(buffer, compact) as models:
+        return models.to_models()
+
+
+class BinaryModels(collections.abc.Sequence):
+    """
+    Sequence of the models encoded in the binary format in a buffer (e.g. `bytes`, `memoryview` or `mmap`), which reads
+    the buffer in place, decoding each model only when it is accessed.
+
+    The view of the buffer is held until `release` is called (or the `with` block is exited), which must be done before
+    a `mmap` buffer can be closed.
+    """
+    def __init__(self, buffer: Union[bytes, bytearray, memoryview], compact: bool=False):
+        """
+        Constructor.
+        :param buffer: the buffer containing the encoded models
+        :param compact: whether to decode the models as their compact equivalents
+        """
+        view = memoryview(buffer)
+        if view.ndim != 1 or view.itemsize != 1:
+            view = view.cast("B")
+        if len(view) < _HEADER.size:
+            raise ValueError("Buffer is too small to hold encoded models (%d bytes)" % len(view))
+        magic, version, model_type_code, number_of_properties, number_of_records, number_of_strings = \
+            _HEADER.unpack_from(view)
+        if magic != BINARY_FORMAT_MAGIC:
+            raise ValueError("Buffer does not contain encoded models (magic bytes: %r)" % magic)
+        if version != BINARY_FORMAT_VERSION:
+            raise ValueError("Unsupported format version: %d" % version)
+        if model_type_code not in _MODEL_TYPES:
+            raise ValueError("Unknown model type code: %d" % model_type_code)
+        model_type = _MODEL_TYPES[model_type_code]
+        record_struct = struct.Struct("<" + _get_record_format(model_type))
+        if number_of_properties != len(_get_property_names(model_type)):
+            raise ValueError("Records have %d properties, not the %d of `%s`"
+                             % (number_of_properties, len(_get_property_names(model_type)), model_type.__name__))
+
+        self._view = view
+        self._model_type = model_type
+        self._property_positions = {name: position for position, name in enumerate(_get_property_names(model_type))}
+        self._create_model = _get_model_factory(
+            get_compact_model_type(model_type) if compact else model_type, _get_property_names(model_type))
+        self._record_struct = record_struct
+        self._length = number_of_records
+        self._number_of_strings = number_of_strings
+        self._string_offsets_start = _HEADER.size + record_struct.size * number_of_records
+        self._strings_start = self._string_offsets_start + _STRING_OFFSET.size * (number_of_strings + 1)
+        if len(view) < self._strings_start or len(view) < self._strings_start + self._get_string_offset(
+                number_of_strings):
+            raise ValueError("Buffer is too small to hold %d records and %d strings (%d bytes)"
+                             % (number_of_records, number_of_strings, len(view)))
+
+    @property
+    def model_type(self) -> type:
+        """
+        Gets the type of the encoded models.
+        :return: the type of model
+        """
+        return self._model_type
+
+    def to_models(self) -> List[Any]:
+        """
+        Decodes all of the models.
+        :return: the models, in order
+        """
+        strings = self._decode_strings()
+        create_model = self._create_model
+        records = self._view[_HEADER.size:self._string_offsets_start]
+        decode_internal_id = self._decode_internal_id
+        return [create_model([decode_internal_id(record[0])] + [strings[index] for index in record[1:]])
+                for record in self._record_struct.iter_unpack(records)]
+
+    def get_value(self, index: int, property: str) -> Any:
+        """
+        Gets the value of the given property of the model at the given index, without decoding the rest of the model.
+        :param index: the index of the model
+        :param property: the name of the property
+        :return: the value of the property
+        """
+        position = self._property_positions.get(property)
+        if position is None:
+            raise ValueError(
+                "Models of type `%s` do not have the property `%s`" % (self._model_type.__name__, property))
+        offset = self._get_record_offset(index)
+        if position == 0:
+            return self._decode_internal_id(_INTERNAL_ID.unpack_from(self._view, offset)[0])
+        offset += _INTERNAL_ID.size + _STRING_INDEX.size * (position - 1)
+        return self._decode_string(_STRING_INDEX.unpack_from(self._view, offset)[0])
+
+    def release(self):
+        """
+        Releases the view of the buffer. Models cannot be accessed afterwards.
+        """
+        self._view.release()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        record = self._record_struct.unpack_from(self._view, self._get_record_offset(index))
+        return self._create_model(
+            [self._decode_internal_id(record[0])] + [self._decode_string(string_index) for string_index in record[1:]])
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in range(self._length):
+            yield self[index]
+
+    def __enter__(self) -> "BinaryModels":
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+    def _get_record_offset(self, index: int) -> int:
+        """
+        Gets the offset in the buffer of the record of the model at the given index.
+        :param index: the index of the model, which can be negative to count from the end
+        :return: the offset of the record
+        """
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("Index out of range: %d" % index)
+        return _HEADER.size + self._record_struct.size * index
+
+    @staticmethod
+    def _decode_internal_id(internal_id: int) -> Any:
+        """
+        Decodes the given internal ID held in a record.
+        :param internal_id: the internal ID, as held in the record
+        :return: the internal ID, which is `None` if the model does not have one
+        """
+        return None if internal_id == _NO_INTERNAL_ID else internal_id
+
+    def _get_string_offset(self, index: int) -> int:
+        """
+        Gets the offset of the string with the given (zero-based) position in the string table.
+        :param index: the position of the string
+        :return: the offset of the string from the start of the strings
+        """
+        return _STRING_OFFSET.unpack_from(self._view, self._string_offsets_start + _STRING_OFFSET.size * index)[0]
+
+    def _decode_string(self, string_index: int) -> Any:
+        """
+        Decodes the string with the given index, as held in records.
+        :param string_index: the index of the string
+        :return: the string, which is `None` if the index is that of `None`
+        """
+        if string_index == _NO_STRING:
+            return None
+        start = self._strings_start + self._get_string_offset(string_index - 1)
+        end = self._strings_start + self._get_string_offset(string_index)
+        return str(self._view[start:end], "utf-8")
+
+    def _decode_strings(self) -> Tuple[Any, ...]:
+        """
+        Decodes all of the strings in the string table.
+        :return: the strings, by index as held in records (with `None` at the index of `None`)
+        """
+        offsets = struct.unpack_from("<%dI" % (self._number_of_strings + 1), self._view, self._string_offsets_start)
+        strings = bytes(self._view[self._strings_start:self._strings_start + offsets[-1]])
+        return (None, ) + tuple(strings[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:]))
@@ -0,0 +1,281 @@
+import collections
+import copy
+import time
+from threading import Lock
+from typing import Union, Any, Iterable, Sequence, Tuple, Optional, Callable, Dict, List, Set
+
+from hgicommon.models import Model
+
+from sequencescape._delegating_mappers import DelegatingMapper, DelegatingSampleMapper, DelegatingStudyMapper
+from sequencescape.mappers import Mapper, MappedType, SampleMapper, StudyMapper, LibraryMapper, \
+    MultiplexedLibraryMapper, WellMapper, _unique_models
+from sequencescape.models import Sample, Study, Library, MultiplexedLibrary, Well
+
+# Maximum number of property values for which models are cached by default
+DEFAULT_CACHE_SIZE = 10000
+
+CacheKey = Tuple[type, str, Any]
+
+
+class CacheStatistics(Model):
+    """
+    Model of the usage statistics of a model cache.
+    """
+    def __init__(self, hits: int=0, misses: int=0, evictions: int=0, expirations: int=0, size: int=0):
+        """
+        Constructor.
+        :param hits: number of property values whose models were found in the cache
+        :param misses: number of property values whose models were not in the cache (or had expired)
+        :param evictions: number of entries removed to keep the cache within its maximum size
+        :param expirations: number of entries removed because they had outlived their time to live
+        :param size: number of entries currently in the cache
+        """
+        self.hits = hits
+        self.misses = misses
+        self.evictions = evictions
+        self.expirations = expirations
+        self.size = size
+
+
+class ModelCache:
+    """
+    Thread-safe, least recently used cache of the models that have a property value, keyed by model type, property and
+    value. Entries can expire after a time to live. The cache can be shared between caching mappers.
+    """
+    def __init__(self, max_size: int=DEFAULT_CACHE_SIZE, ttl: float=None, cache_not_found: bool=True,
+                 timer: Callable[[], float]=time.monotonic):
+        """
+        Constructor.
+        :param max_size: the maximum number of entries in the cache, after which the least recently used are evicted
+        :param ttl: the number of seconds after which an entry expires. `None` for entries to never expire
+        :param cache_not_found: whether to cache that no models have a property value
+        :param timer: function that gets the current time, in seconds
+        """
+        if max_size < 1:
+            raise ValueError("Cache size must be at least 1 (%d given)" % max_size)
+        if ttl is not None and ttl <= 0:
+            raise ValueError("Time to live must be positive (%s given)" % ttl)
+
+        self._max_size = max_size
+        self._ttl = ttl
+        self._cache_not_found = cache_not_found
+        self._timer = timer
+
+        self._entries = collections.OrderedDict()   # type: Dict[CacheKey, Tuple[Optional[float], Tuple[Model, ...]]]
+        # Properties by which models of each type have been cached, by any of the mappers sharing the cache
+        self._cached_properties = collections.defaultdict(set)     # type: Dict[type, Set[str]]
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: CacheKey) -> Optional[Tuple[Model, ...]]:
+        """
+        Gets the models cached for the given key.
+        :param key: tuple containing the type of model, the property and the property value
+        :return: the cached models, which are empty if it is cached that no models have the property value. `None` if
+        nothing is cached for the key
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, models = entry
+                if expires is not None and expires <= self._timer():
+                    del self._entries[key]
+                    self._expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return models
+            self._misses += 1
+            return None
+
+    def set(self, key: CacheKey, models: Iterable[Model]):
+        """
+        Caches the given models (which may be none) as those that have the property value in the given key.
+        :param key: tuple containing the type of model, the property and the property value
+        :param models: the models that have the property value
+        """
+        models = tuple(models)
+        if len(models) == 0 and not self._cache_not_found:
+            return
+        expires = self._timer() + self._ttl if self._ttl is not None else None
+        with self._lock:
+            self._cached_properties[key[0]].add(key[1])
+            self._entries[key] = (expires, models)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key: CacheKey):
+        """
+        Removes anything that is cached for the given key.
+        :param key: tuple containing the type of model, the property and the property value
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_models(self, model_type: type, models: Iterable[Model]):
+        """
+        Removes anything that is cached for the values of any property of the given models.
+        :param model_type: the type of the models
+        :param models: the models (e.g. that have been added to the database)
+        """
+        with self._lock:
+            properties = list(self._cached_properties.get(model_type, ()))
+            for model in models:
+                for property in properties:
+                    value = getattr(model, property, None)
+                    if value is not None:
+                        self._entries.pop((model_type, property, value), None)
+
+    def clear(self):
+        """
+        Removes everything from the cache. Statistics are not reset.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def get_statistics(self) -> CacheStatistics:
+        """
+        Gets statistics about the usage of the cache.
+        :return: the cache statistics
+        """
+        with self._lock:
+            return CacheStatistics(hits=self._hits, misses=self._misses, evictions=self._evictions,
+                                   expirations=self._expirations, size=len(self._entries))
+
+
+class CachingMapper(DelegatingMapper[MappedType]):
+    """
+    Mapper that caches the results of lookups by property value made through another mapper. When only some of the
+    values being looked up are cached, only the others are looked up through the other mapper.
+
+    Models added through this mapper invalidate the cache entries for their property values, including entries cached by
+    other mappers sharing the cache. Changes made to the database by other means are only seen once the entries they
+    affect expire.
+    """
+    def __init__(self, mapper: Mapper[MappedType], model_type: type, cache: ModelCache=None):
+        """
+        Constructor.
+        :param mapper: the mapper through which data is got from the database
+        :param model_type: the type of model that the mapper deals with
+        :param cache: the cache to use, which may be shared with other caching mappers. `None` to use a new cache with
+        the default settings
+        """
+        super().__init__(mapper)
+        self._model_type = model_type
+        self._cache = cache if cache is not None else ModelCache()
+
+    @property
+    def cache(self) -> ModelCache:
+        """
+        Gets the cache used by this mapper.
+        :return: the cache
+        """
+        return self._cache
+
+    def add(self, models: Union[MappedType, Iterable[MappedType]]):
+        if isinstance(models, Model):
+            models = [models]
+        elif models is not None:
+            models = list(models)
+        self._mapper.add(models)
+        if models is not None:
+            self._cache.invalidate_models(self._model_type, models)
+
+    def _get_by_property_value_sequence(self, property: str, values: Iterable[Any]) -> Sequence[MappedType]:
+        results = []    # type: List[MappedType]
+        missing_values = []
+        for value in collections.OrderedDict.fromkeys(values):
+            cached = self._cache.get((self._model_type, property, value))
+            if cached is None:
+                missing_values.append(value)
+            else:
+                results.extend(cached)
+
+        if len(missing_values) > 0:
+            retrieved = self._mapper._get_by_property_value_sequence(property, missing_values)
+            models_by_value = collections.OrderedDict((value, []) for value in missing_values)
+            all_matched = True
+            for model in retrieved:
+                value = getattr(model, property)
+                if value in models_by_value:
+                    models_by_value[value].append(model)
+                else:
+                    # The database matched the value differently (e.g. ignoring case) so the model cannot be cached
+                    all_matched = False
+            for value, models in models_by_value.items():
+                if len(models) > 0 or all_matched:
+                    self._cache.set((self._model_type, property, value), models)
+            results.extend(retrieved)
+
+        # Copies are returned so changes made to them do not change what is cached
+        return [copy.copy(model) for model in _unique_models(results)]
+
+
+class CachingSampleMapper(CachingMapper[Sample], DelegatingSampleMapper):
+    """
+    Implementation of `SampleMapper` that caches lookups made through another `SampleMapper`.
+    """
+    def __init__(self, mapper: SampleMapper, cache: ModelCache=None):
+        """
+        Constructor.
+        :param mapper: the mapper through which data is got from the database
+        :param cache: the cache to use. `None` to use a new cache with the default settings
+        """
+        super().__init__(mapper, Sample, cache)
+
+
+class CachingStudyMapper(CachingMapper[Study], DelegatingStudyMapper):
+    """
+    Implementation of `StudyMapper` that caches lookups made through another `StudyMapper`.
+    """
+    def __init__(self, mapper: StudyMapper, cache: ModelCache=None):
+        """
+        Constructor.
+        :param mapper: the mapper through which data is got from the database
+        :param cache: the cache to use. `None` to use a new cache with the default settings
+        """
+        super().__init__(mapper, Study, cache)
+
+
+class CachingLibraryMapper(CachingMapper[Library], LibraryMapper):
+    """
+    Implementation of `LibraryMapper` that caches lookups made through another `LibraryMapper`.
+    """
+    def __init__(self, mapper: LibraryMapper, cache: ModelCache=None):
+        """
+        Constructor.
+        :param mapper: the mapper through which data is got from the database
+        :param cache: the cache to use. `None` to use a new cache with the default settings
+        """
+        super().__init__(mapper, Library, cache)
+
+
+class CachingMultiplexedLibraryMapper(CachingMapper[MultiplexedLibrary], MultiplexedLibraryMapper):
+    """
+    Implementation of `MultiplexedLibraryMapper` that caches lookups made through another `MultiplexedLibraryMapper`.
+    """
+    def __init__(self, mapper: MultiplexedLibraryMapper, cache: ModelCache=None):
+        """
+        Constructor.
+        :param mapper: the mapper through which data is got from the database
+        :param cache: the cache to use. `None` to use a new cache with the default settings
+        """
+        super().__init__(mapper, MultiplexedLibrary, cache)
+
+
+class CachingWellMapper(CachingMapper[Well], WellMapper):
+    """
+    Implementation of `WellMapper` that caches lookups made through another `WellMapper`.
+    """
+    def __init__(self, mapper: WellMapper, cache: ModelCache=None):
+        """
+        Constructor.
+        :param mapper: the mapper through which data is got from the database
+        :param cache: the cache to use. `None` to use a new cache with the default settings
+        """
+        super().__init__(mapper, Well, cache)
@@ -0,0 +1,200 @@
+import collections
+import collections.abc
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Union
+
+from hgicommon.models import Model
+
+from sequencescape.compact_models import CompactModel
+
+# Type code of the arrays in which columns of integers are held
+_INTEGER_ARRAY_TYPE_CODE = "q"
+
+
+def _get_model_factory(model_type: type, properties: Sequence[str]) -> Callable[[Sequence[Any]], Any]:
+    """
+    Gets a function that creates a model of the given type from the values of the given properties, in that order.
+    :param model_type: the type of model (or compact model) to create
+    :param properties: the names of the properties whose values are given
+    :return: the function
+    """
+    if issubclass(model_type, CompactModel):
+        properties = list(properties)
+        positions = [properties.index(name) for name in model_type.__slots__]
+        return lambda values: model_type(*[values[position] for position in positions])
+
+    # Properties are set in the order in which the constructor sets them so models share the keys of their dictionaries
+    property_defaults = list(vars(model_type()).items())
+    create = object.__new__
+
+    def create_model(values: Sequence[Any]) -> Model:
+        model = create(model_type)
+        given = dict(zip(properties, values))
+        model.__dict__.update([(name, given.get(name, default)) for name, default in property_defaults])
+        return model
+
+    return create_model
+
+
+def _compact_column(values: List[Any], intern_strings: bool) -> Sequence[Any]:
+    """
+    Reduces the memory used by the given column of values.
+    :param values: the values in the column
+    :param intern_strings: whether to make equal strings in the column the same object
+    :return: the values, in a list, or in an array if they are all integers
+    """
+    if len(values) > 0 and all(type(value) is int for value in values):
+        try:
+            return array(_INTEGER_ARRAY_TYPE_CODE, values)
+        except OverflowError:
+            return values
+    if intern_strings:
+        # Low cardinality columns (e.g. organism) become lists of references to a few strings. The table is only
+        # held while the column is compacted so interning high cardinality columns costs nothing afterwards
+        table = {}  # type: Dict[str, str]
+        setdefault = table.setdefault
+        return [setdefault(value, value) if type(value) is str else value for value in values]
+    return values
+
+
+class ColumnarModels(collections.abc.Sequence):
+    """
+    Sequence of models that holds the values of each property in a column, rather than holding a model object for each
+    element. Models are only created when elements are accessed.
+
+    Aggregations, such as counting the models with each value of a property, work on the columns directly so are much
+    faster (and use much less memory) than with lists of models.
+    """
+    def __init__(self, model_type: type, columns: Dict[str, Sequence[Any]], intern_strings: bool=True):
+        """
+        Constructor.
+        :param model_type: the type of model (or compact model) that elements are accessed as
+        :param columns: the values of each property, by property name, which must all be the same length
+        :param intern_strings: whether to make equal strings in each column the same object, which saves memory when
+        there are few distinct values (e.g. organisms)
+        """
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must be the same length (lengths given: %s)" % sorted(lengths))
+        self._model_type = model_type
+        self._length = lengths.pop() if len(lengths) == 1 else 0
+        self._columns = collections.OrderedDict(
+            (name, _compact_column(list(values), intern_strings)) for name, values in columns.items())
+        self._create_model = _get_model_factory(model_type, list(self._columns.keys()))
+
+    @staticmethod
+    def from_models(models: Iterable[Any], model_type: type=None, intern_strings: bool=True) -> "ColumnarModels":
+        """
+        Creates a columnar sequence holding the values of the given models.
+        :param models: the models, which must all be of the same type
+        :param model_type: the type of model that elements are accessed as. `None` to use the type of the models
+        :param intern_strings: see constructor
+        :return: the columnar sequence
+        """
+        models = list(models)
+        if model_type is None:
+            if len(models) == 0:
+                raise ValueError("Type of model must be given if there are no models")
+            model_type = type(models[0])
+        properties = list(vars(models[0]).keys()) if len(models) > 0 else list(vars(model_type()).keys())
+        columns = collections.OrderedDict((name, [getattr(model, name) for model in models]) for name in properties)
+        return ColumnarModels(model_type, columns, intern_strings)
+
+    @property
+    def model_type(self) -> type:
+        """
+        Gets the type of model that elements are accessed as.
+        :return: the type of model
+        """
+        return self._model_type
+
+    @property
+    def properties(self) -> List[str]:
+        """
+        Gets the names of the properties that are held in columns.
+        :return: the property names
+        """
+        return list(self._columns.keys())
+
+    def column(self, property: str) -> Sequence[Any]:
+        """
+        Gets the values of the given property of all the models, which should not be modified.
+        :param property: the name of the property
+        :return: the values, in order
+        """
+        if property not in self._columns:
+            raise ValueError("No column for property `%s` (properties: %s)" % (property, self.properties))
+        return self._columns[property]
+
+    def count_by(self, *properties: str) -> Dict[Any, int]:
+        """
+        Counts the models with each value of the given properties.
+        :param properties: the names of the properties to count by
+        :return: the number of models with each value (or, for more than one property, tuple of values)
+        """
+        return collections.Counter(self._get_keys(properties))
+
+    def group_by(self, *properties: str) -> Dict[Any, "ColumnarModels"]:
+        """
+        Groups the models by the values of the given properties.
+        :param properties: the names of the properties to group by
+        :return: the models with each value (or, for more than one property, tuple of values), in columns
+        """
+        indices_by_key = collections.OrderedDict()   # type: Dict[Any, List[int]]
+        for index, key in enumerate(self._get_keys(properties)):
+            indices = indices_by_key.get(key)
+            if indices is None:
+                indices_by_key[key] = [index]
+            else:
+                indices.append(index)
+        return collections.OrderedDict((key, self._take(indices)) for key, indices in indices_by_key.items())
+
+    def to_models(self) -> List[Any]:
+        """
+        Creates all of the models.
+        :return: the models, in order
+        """
+        return [self._create_model(values) for values in zip(*self._columns.values())]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return self._take(range(*index.indices(self._length)))
+        return self._create_model([values[index] for values in self._columns.values()])
+
+    def __iter__(self):
+        for values in zip(*self._columns.values()):
+            yield self._create_model(values)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, ColumnarModels):
+            return self._model_type == other._model_type and self._columns == other._columns
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return "<%s of %d %s models>" % (type(self).__name__, self._length, self._model_type.__name__)
+
+    def _get_keys(self, properties: Sequence[str]) -> Iterable[Any]:
+        """
+        Gets the values of the given properties of each model, as used as the keys of aggregations.
+        :param properties: the names of the properties
+        :return: the value of the property of each model if one property is given, else tuples of values
+        """
+        if len(properties) == 0:
+            raise ValueError("At least one property must be given")
+        columns = [self.column(property) for property in properties]
+        return columns[0] if len(columns) == 1 else zip(*columns)
+
+    def _take(self, indices: Iterable[int]) -> "ColumnarModels":
+        """
+        Creates a columnar sequence of the models at the given indices.
+        :param indices: the indices of the models
+        :return: the columnar sequence
+        """
+        indices = list(indices)
+        columns = collections.OrderedDict(
+            (name, [values[index] for index in indices]) for name, values in self._columns.items())
+        # The strings have already been interned
+        return ColumnarModels(self._model_type, columns, intern_strings=False)
@@ -0,0 +1,168 @@
+import collections
+from abc import ABCMeta
+from typing import Dict, Any, Optional
+
+from sequencescape.models import Sample, Study, Library, MultiplexedLibrary, Well
+
+
+class CompactModel(metaclass=ABCMeta):
+    """
+    Memory-compact equivalent of a model, whose properties are held in slots rather than in an instance dictionary.
+
+    Compact models are registered as (virtual) subclasses of the type of model that they are equivalent to, so they
+    pass `isinstance` checks for that type, compare equal to (and hash the same as) models of it with the same property
+    values and can be encoded with its JSON encoder. Unlike models, properties cannot be added to compact models.
+    """
+    __slots__ = ()
+
+    # The type of model that this type of compact model is equivalent to
+    model_type = None   # type: type
+
+    @property
+    def __dict__(self) -> Dict[str, Any]:
+        """
+        Gets the values of the properties of this model, as `vars` does for models.
+        :return: the property values, by property name
+        """
+        return collections.OrderedDict((name, getattr(self, name)) for name in self.__slots__)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, self.model_type):
+            return False
+        for name in self.__slots__:
+            if getattr(other, name, None) != getattr(self, name):
+                return False
+        return True
+
+    def __hash__(self) -> int:
+        return hash(self.internal_id)
+
+    def __str__(self) -> str:
+        return "{ %s }" % ", ".join(sorted("%s: %s" % (name, getattr(self, name)) for name in self.__slots__))
+
+    def __repr__(self) -> str:
+        return "<%s object at %s: %s>" % (type(self), id(self), str(self))
+
+    def __reduce__(self):
+        return self.__class__, tuple(getattr(self, name) for name in self.__slots__)
+
+
+class CompactSample(CompactModel):
+    """
+    Memory-compact equivalent of `Sample`.
+    """
+    __slots__ = ("internal_id", "name", "accession_number", "organism", "common_name", "taxon_id", "gender",
+                 "ethnicity", "cohort", "country_of_origin", "geographical_region")
+    model_type = Sample
+
+    def __init__(self, internal_id: int=None, name: str=None, accession_number: str=None, organism: str=None,
+                 common_name: str=None, taxon_id: str=None, gender: str=None, ethnicity: str=None, cohort: str=None,
+                 country_of_origin: str=None, geographical_region: str=None):
+        self.internal_id = internal_id
+        self.name = name
+        self.accession_number = accession_number
+        self.organism = organism
+        self.common_name = common_name
+        self.taxon_id = taxon_id
+        self.gender = gender
+        self.ethnicity = ethnicity
+        self.cohort = cohort
+        self.country_of_origin = country_of_origin
+        self.geographical_region = geographical_region
+
+
+class CompactStudy(CompactModel):
+    """
+    Memory-compact equivalent of `Study`.
+    """
+    __slots__ = ("internal_id", "name", "accession_number", "study_type", "description", "study_title",
+                 "study_visibility", "faculty_sponsor")
+    model_type = Study
+
+    def __init__(self, internal_id: int=None, name: str=None, accession_number: str=None, study_type: str=None,
+                 description: str=None, study_title: str=None, study_visibility: str=None,
+                 faculty_sponsor: str=None):
+        self.internal_id = internal_id
+        self.name = name
+        self.accession_number = accession_number
+        self.study_type = study_type
+        self.description = description
+        self.study_title = study_title
+        self.study_visibility = study_visibility
+        self.faculty_sponsor = faculty_sponsor
+
+
+class CompactLibrary(CompactModel):
+    """
+    Memory-compact equivalent of `Library`.
+    """
+    __slots__ = ("internal_id", "name", "library_type")
+    model_type = Library
+
+    def __init__(self, internal_id: int=None, name: str=None, library_type: str=None):
+        self.internal_id = internal_id
+        self.name = name
+        self.library_type = library_type
+
+
+class CompactMultiplexedLibrary(CompactModel):
+    """
+    Memory-compact equivalent of `MultiplexedLibrary`.
+    """
+    __slots__ = ("internal_id", "name")
+    model_type = MultiplexedLibrary
+
+    def __init__(self, internal_id: int=None, name: str=None):
+        self.internal_id = internal_id
+        self.name = name
+
+
+class CompactWell(CompactModel):
+    """
+    Memory-compact equivalent of `Well`.
+    """
+    __slots__ = ("internal_id", "name")
+    model_type = Well
+
+    def __init__(self, internal_id: int=None, name: str=None):
+        self.internal_id = internal_id
+        self.name = name
+
+
+_COMPACT_MODEL_TYPES = {
+    compact_model_type.model_type: compact_model_type
+    for compact_model_type in (CompactSample, CompactStudy, CompactLibrary, CompactMultiplexedLibrary, CompactWell)
+}   # type: Dict[type, type]
+
+for _model_type, _compact_model_type in _COMPACT_MODEL_TYPES.items():
+    _model_type.register(_compact_model_type)
+
+
+def get_compact_model_type(model_type: type) -> Optional[type]:
+    """
+    Gets the type of compact model that is equivalent to the given type of model.
+    :param model_type: the type of model
+    :return: the equivalent type of compact model. `None` if there is not one
+    """
+    return _COMPACT_MODEL_TYPES.get(model_type)
+
+
+def to_compact_model(model: Any) -> CompactModel:
+    """
+    Converts the given model into its compact equivalent.
+    :param model: the model to convert
+    :return: the equivalent compact model
+    """
+    compact_model_type = get_compact_model_type(type(model))
+    if compact_model_type is None:
+        raise ValueError("No compact equivalent of model of type `%s` known" % type(model))
+    return compact_model_type(*(getattr(model, name) for name in compact_model_type.__slots__))
+
+
+def to_model(compact_model: CompactModel) -> Any:
+    """
+    Converts the given compact model into an equivalent (ordinary) model.
+    :param compact_model: the compact model to convert
+    :return: the equivalent model
+    """
+    return compact_model.model_type(**vars(compact_model))
@@ -0,0 +1,303 @@
+import copy
+from threading import RLock
+from typing import Union, Any, Iterable, Sequence, Dict, List, Set, Iterator
+
+from hgicommon.models import Model
+
+from sequencescape.enums import Property
+from sequencescape.mappers import Mapper, MappedType, SampleMapper, StudyMapper, LibraryMapper, \
+    MultiplexedLibraryMapper, WellMapper, _unique_models
+from sequencescape.models import InternalIdModel, Sample, Study, Library, MultiplexedLibrary, Well
+
+# Properties that are indexed, where models have them
+INDEXED_PROPERTIES = (Property.INTERNAL_ID, Property.NAME, Property.ACCESSION_NUMBER)
+
+
+class _Table:
+    """
+    Models of one type held in memory, with a hash index of the values of each of their indexed properties.
+    """
+    def __init__(self, model_type: type):
+        """
+        Constructor.
+        :param model_type: the type of the models
+        """
+        self.model_type = model_type
+        self.properties = frozenset(vars(model_type()))
+        self.models = []    # type: List[Model]
+        self.indexes = {
+            property: {} for property in INDEXED_PROPERTIES if property in self.properties
+        }   # type: Dict[str, Dict[Any, List[Model]]]
+
+    def add(self, models: Sequence[Model]):
+        """
+        Adds the given models, which must have been validated with `validate_new`.
+        :param models: the models to add
+        """
+        self.models.extend(models)
+        for property, index in self.indexes.items():
+            for model in models:
+                value = getattr(model, property)
+                if value is not None:
+                    index.setdefault(value, []).append(model)
+
+    def validate_new(self, models: Sequence[Model]):
+        """
+        Checks that the given models can be added.
+        :param models: the models to check
+        """
+        internal_id_index = self.indexes.get(Property.INTERNAL_ID, {})
+        internal_ids = set()     # type: Set[int]
+        for model in models:
+            if not isinstance(model, self.model_type):
+                raise ValueError("Cannot add `%s` using a mapper for models of type `%s`" % (model, self.model_type))
+            internal_id = getattr(model, Property.INTERNAL_ID, None)
+            if internal_id is not None:
+                if internal_id in internal_id_index or internal_id in internal_ids:
+                    raise ValueError("Model with internal ID %d already exists: %s" % (internal_id, model))
+                internal_ids.add(internal_id)
+
+    def get_by_property_value(self, property: str, values: Iterable[Any]) -> List[Model]:
+        """
+        Gets the models with any of the given values of the given property, using the property's index if it has one.
+        :param property: the name of the property
+        :param values: the values of the property to match
+        :return: the models
+        """
+        if property not in self.properties:
+            raise ValueError("Models of type `%s` do not have the property `%s`" % (self.model_type.__name__, property))
+        index = self.indexes.get(property)
+        if index is not None:
+            results = []
+            for value in values:
+                results.extend(index.get(value, ()))
+            return results
+        values = set(values)
+        return [model for model in self.models if getattr(model, property) in values]
+
+
+class InMemoryDatabase:
+    """
+    Models of each type, and the associations between studies and samples, held in memory. In-memory mappers that share
+    a database see the same models and associations. All operations are thread-safe.
+    """
+    def __init__(self):
+        """
+        Constructor.
+        """
+        self._lock = RLock()
+        self._tables = {
+            model_type: _Table(model_type) for model_type in (Sample, Study, Library, MultiplexedLibrary, Well)
+        }   # type: Dict[type, _Table]
+        # Adjacency index of the associations, in both directions, by internal ID
+        self._samples_of_study = {}     # type: Dict[int, Set[int]]
+        self._studies_of_sample = {}    # type: Dict[int, Set[int]]
+
+    def clear(self):
+        """
+        Removes all models and associations.
+        """
+        with self._lock:
+            for model_type in self._tables.keys():
+                self._tables[model_type] = _Table(model_type)
+            self._samples_of_study.clear()
+            self._studies_of_sample.clear()
+
+    def _get_table(self, model_type: type) -> _Table:
+        """
+        Gets the table of models of the given type.
+        :param model_type: the type of model
+        :return: the table
+        """
+        table = self._tables.get(model_type)
+        if table is None:
+            raise ValueError("Models of type `%s` cannot be held in memory" % model_type)
+        return table
+
+    def _set_association(self, samples: Union[Sample, Iterable[Sample]], studies: Union[Study, Iterable[Study]]):
+        """
+        Associates each of the given samples with each of the given studies. Associations that already exist are left
+        as they are.
+        :param samples: the samples to associate
+        :param studies: the studies to associate with
+        """
+        with self._lock:
+            sample_internal_ids = self._get_existing_internal_ids(Sample, samples)
+            study_internal_ids = self._get_existing_internal_ids(Study, studies)
+            for study_internal_id in study_internal_ids:
+                self._samples_of_study.setdefault(study_internal_id, set()).update(sample_internal_ids)
+            for sample_internal_id in sample_internal_ids:
+                self._studies_of_sample.setdefault(sample_internal_id, set()).update(study_internal_ids)
+
+    def _get_association(self, associated_with: Union[InternalIdModel, Iterable[InternalIdModel]],
+                         associated_with_type: type, associate_type: type) -> List[InternalIdModel]:
+        """
+        Gets the models that are associated to the given models.
+        :param associated_with: the models to find the models associated with
+        :param associated_with_type: the type of the models to find the models associated with
+        :param associate_type: the type of the associated models
+        :return: the associated models, ordered by internal ID
+        """
+        adjacency = self._samples_of_study if associated_with_type == Study else self._studies_of_sample
+        with self._lock:
+            internal_ids = self._get_existing_internal_ids(associated_with_type, associated_with)
+            associated_internal_ids = set()     # type: Set[int]
+            for internal_id in internal_ids:
+                associated_internal_ids.update(adjacency.get(internal_id, ()))
+            return self._get_table(associate_type).get_by_property_value(
+                Property.INTERNAL_ID, sorted(associated_internal_ids))
+
+    def _get_existing_internal_ids(self, model_type: type, models: Union[InternalIdModel, Iterable[InternalIdModel]]) \
+            -> List[int]:
+        """
+        Gets the internal IDs of the given models, checking that models of the given type with them exist.
+        :param model_type: the type of the models
+        :param models: the models
+        :return: the internal IDs of the models
+        """
+        if isinstance(models, InternalIdModel):
+            models = [models]
+        models = list(models)
+        for model in models:
+            if model.internal_id is None:
+                raise ValueError("Model to associate must have an internal ID: %s" % model)
+        with self._lock:
+            internal_id_index = self._get_table(model_type).indexes[Property.INTERNAL_ID]
+            missing = [model for model in models if model.internal_id not in internal_id_index]
+        if len(missing) > 0:
+            raise ValueError("Models do not exist: %s" % missing)
+        return [model.internal_id for model in models]
+
+
+class InMemoryMapper(Mapper[MappedType]):
+    """
+    Mapper that holds models in an `InMemoryDatabase`, finding them by internal ID, name and accession number through
+    hash indexes (and by other properties by scanning all the models). Models are copied when they are added and when
+    they are got, so changes to them do not change the models held.
+
+    Intended for use as a fast test fixture or as a local tier in front of a database (e.g. populated with `get_all`).
+    """
+    def __init__(self, model_type: type, database: InMemoryDatabase=None):
+        """
+        Constructor.
+        :param model_type: the type of model that the mapper deals with
+        :param database: the database in which models are held. Mappers must share a database to see the same
+        associations. `None` to use a new database
+        """
+        self._model_type = model_type
+        self._database = database if database is not None else InMemoryDatabase()
+        self._database._get_table(model_type)
+
+    @property
+    def database(self) -> InMemoryDatabase:
+        """
+        Gets the database in which this mapper holds models.
+        :return: the database
+        """
+        return self._database
+
+    def add(self, models: Union[MappedType, Iterable[MappedType]]):
+        if models is None:
+            raise ValueError("Cannot add `None`")
+        if isinstance(models, Model):
+            models = [models]
+        models = [copy.copy(model) for model in models]
+        with self._database._lock:
+            table = self._database._get_table(self._model_type)
+            table.validate_new(models)
+            table.add(models)
+
+    def get_all(self) -> Sequence[MappedType]:
+        with self._database._lock:
+            models = list(self._database._get_table(self._model_type).models)
+        return [copy.copy(model) for model in models]
+
+    def iter_all(self) -> Iterator[MappedType]:
+        for model in self.get_all():
+            yield model
+
+    def _get_by_property_value_sequence(self, property: str, values: Iterable[Any]) -> Sequence[MappedType]:
+        values = list(values)
+        with self._database._lock:
+            models = self._database._get_table(self._model_type).get_by_property_value(property, values)
+        return [copy.copy(model) for model in _unique_models(models)]
+
+    def __len__(self) -> int:
+        with self._database._lock:
+            return len(self._database._get_table(self._model_type).models)
+
+
+class InMemorySampleMapper(InMemoryMapper[Sample], SampleMapper):
+    """
+    Implementation of `SampleMapper` that holds samples in memory.
+    """
+    def __init__(self, database: InMemoryDatabase=None):
+        """
+        Constructor.
+        :param database: the database in which samples are held, which must be shared with the `InMemoryStudyMapper` of
+        associated studies. `None` to use a new database
+        """
+        super().__init__(Sample, database)
+
+    def set_association_with_study(self, samples: Union[Sample, Iterable[Sample]],
+                                   study: Union[Study, Iterable[Study]]):
+        self._database._set_association(samples, study)
+
+    def get_associated_with_study(self, studies: Union[Study, Iterable[Study]]) -> Sequence[Sample]:
+        return [copy.copy(model) for model in self._database._get_association(studies, Study, Sample)]
+
+
+class InMemoryStudyMapper(InMemoryMapper[Study], StudyMapper):
+    """
+    Implementation of `StudyMapper` that holds studies in memory.
+    """
+    def __init__(self, database: InMemoryDatabase=None):
+        """
+        Constructor.
+        :param database: the database in which studies are held, which must be shared with the `InMemorySampleMapper`
+        of associated samples. `None` to use a new database
+        """
+        super().__init__(Study, database)
+
+    def set_association_with_sample(self, studies: Union[Study, Iterable[Study]],
+                                    sample: Union[Sample, Iterable[Sample]]):
+        self._database._set_association(sample, studies)
+
+    def get_associated_with_sample(self, samples: Union[Sample, Iterable[Sample]]) -> Sequence[Study]:
+        return [copy.copy(model) for model in self._database._get_association(samples, Sample, Study)]
+
+
+class InMemoryLibraryMapper(InMemoryMapper[Library], LibraryMapper):
+    """
+    Implementation of `LibraryMapper` that holds libraries in memory.
+    """
+    def __init__(self, database: InMemoryDatabase=None):
+        """
+        Constructor.
+        :param database: the database in which libraries are held. `None` to use a new database
+        """
+        super().__init__(Library, database)
+
+
+class InMemoryMultiplexedLibraryMapper(InMemoryMapper[MultiplexedLibrary], MultiplexedLibraryMapper):
+    """
+    Implementation of `MultiplexedLibraryMapper` that holds multiplexed libraries in memory.
+    """
+    def __init__(self, database: InMemoryDatabase=None):
+        """
+        Constructor.
+        :param database: the database in which multiplexed libraries are held. `None` to use a new database
+        """
+        super().__init__(MultiplexedLibrary, database)
+
+
+class InMemoryWellMapper(InMemoryMapper[Well], WellMapper):
+    """
+    Implementation of `WellMapper` that holds wells in memory.
+    """
+    def __init__(self, database: InMemoryDatabase=None):
+        """
+        Constructor.
+        :param database: the database in which wells are held. `None` to use a new database
+        """
+        super().__init__(Well, database)
@@ -1,4 +1,7 @@
-from hgijson import JsonPropertyMapping, MappingJSONEncoderClassBuilder, MappingJSONDecoderClassBuilder
+from hgijson import MappingJSONEncoderClassBuilder, MappingJSONDecoderClassBuilder
+
+from sequencescape._fast_json_converters import SimpleJsonPropertyMapping, FastJSONEncoderClassBuilder, \
+    FastJSONDecoderClassBuilder
 from sequencescape.models import Sample, InternalIdModel, NamedModel, Study, AccessionNumberModel, Library, Well, \
     MultiplexedLibrary
 
@@ -28,7 +31,7 @@ JSON_LIBRARY_TYPE = "type"
 
 # JSON encoder/decoder for `NamedModel`
 _named_json_mapping = [
-    JsonPropertyMapping(JSON_NAME_PROPERTY, "name")
+    SimpleJsonPropertyMapping(JSON_NAME_PROPERTY, "name")
 ]
 _NamedModelJSONEncoder = MappingJSONEncoderClassBuilder(NamedModel, _named_json_mapping).build()
 _NamedModelJSONDecoder = MappingJSONDecoderClassBuilder(NamedModel, _named_json_mapping).build()
@@ -36,7 +39,7 @@ _NamedModelJSONDecoder = MappingJSONDecoderClassBuilder(NamedModel, _named_json_
 
 # JSON encoder/decoder for `InternalIdModel`
 _internal_id_json_mapping = [
-    JsonPropertyMapping(JSON_INTERNAL_ID_PROPERTY, "internal_id")
+    SimpleJsonPropertyMapping(JSON_INTERNAL_ID_PROPERTY, "internal_id")
 ]
 _InternalIdModelJSONEncoder = MappingJSONEncoderClassBuilder(InternalIdModel, _internal_id_json_mapping).build()
 _InternalIdModelJSONDecoder = MappingJSONDecoderClassBuilder(InternalIdModel, _internal_id_json_mapping).build()
@@ -44,7 +47,7 @@ _InternalIdModelJSONDecoder = MappingJSONDecoderClassBuilder(InternalIdModel, _i
 
 # JSON encoder/decoder for `AccessionNumberModel`
 _accession_number_json_mapping = [
-    JsonPropertyMapping(JSON_ACCESSION_NUMBER_PROPERTY, "accession_number")
+    SimpleJsonPropertyMapping(JSON_ACCESSION_NUMBER_PROPERTY, "accession_number")
 ]
 _AccessionNumberModelJSONEncoder = MappingJSONEncoderClassBuilder(AccessionNumberModel, _accession_number_json_mapping).build()
 _AccessionNumberModelJSONDecoder = MappingJSONDecoderClassBuilder(AccessionNumberModel, _accession_number_json_mapping).build()
@@ -52,14 +55,14 @@ _AccessionNumberModelJSONDecoder = MappingJSONDecoderClassBuilder(AccessionNumbe
 
 # JSON encoder/decoder for `Sample`
 _sample_json_mapping = [
-    JsonPropertyMapping(JSON_ORGANISM_PROPERTY, "organism"),
-    JsonPropertyMapping(JSON_COMMON_NAME_PROPERTY, "common_name"),
-    JsonPropertyMapping(JSON_TAXON_ID_PROPERTY, "taxon_id"),
-    JsonPropertyMapping(JSON_GENDER_PROPERTY, "gender"),
-    JsonPropertyMapping(JSON_ETHNICITY_PROPERTY, "ethnicity"),
-    JsonPropertyMapping(JSON_COHORT_PROPERTY, "cohort"),
-    JsonPropertyMapping(JSON_COUNTRY_OF_ORIGIN_PROPERTY, "country_of_origin"),
-    JsonPropertyMapping(JSON_GEOGRAPHICAL_REGION_PROPERTY, "geographical_region")
+    SimpleJsonPropertyMapping(JSON_ORGANISM_PROPERTY, "organism"),
+    SimpleJsonPropertyMapping(JSON_COMMON_NAME_PROPERTY, "common_name"),
+    SimpleJsonPropertyMapping(JSON_TAXON_ID_PROPERTY, "taxon_id"),
+    SimpleJsonPropertyMapping(JSON_GENDER_PROPERTY, "gender"),
+    SimpleJsonPropertyMapping(JSON_ETHNICITY_PROPERTY, "ethnicity"),
+    SimpleJsonPropertyMapping(JSON_COHORT_PROPERTY, "cohort"),
+    SimpleJsonPropertyMapping(JSON_COUNTRY_OF_ORIGIN_PROPERTY, "country_of_origin"),
+    SimpleJsonPropertyMapping(JSON_GEOGRAPHICAL_REGION_PROPERTY, "geographical_region")
 ]
 SampleJSONEncoder = MappingJSONEncoderClassBuilder(
     Sample, _sample_json_mapping,
@@ -73,11 +76,11 @@ SampleJSONDecoder = MappingJSONDecoderClassBuilder(
 
 # JSON encoder/decoder for `Study`
 _study_json_mapping = [
-    JsonPropertyMapping(JSON_STUDY_TYPE, "study_type"),
-    JsonPropertyMapping(JSON_DESCRIPTION, "description"),
-    JsonPropertyMapping(JSON_STUDY_TITLE, "study_title"),
-    JsonPropertyMapping(JSON_STUDY_VISIBILITY, "study_visibility"),
-    JsonPropertyMapping(JSON_FACULTY_SPONSER, "faculty_sponsor")
+    SimpleJsonPropertyMapping(JSON_STUDY_TYPE, "study_type"),
+    SimpleJsonPropertyMapping(JSON_DESCRIPTION, "description"),
+    SimpleJsonPropertyMapping(JSON_STUDY_TITLE, "study_title"),
+    SimpleJsonPropertyMapping(JSON_STUDY_VISIBILITY, "study_visibility"),
+    SimpleJsonPropertyMapping(JSON_FACULTY_SPONSER, "faculty_sponsor")
 ]
 StudyJSONEncoder = MappingJSONEncoderClassBuilder(
     Study, _study_json_mapping, (_NamedModelJSONEncoder, _AccessionNumberModelJSONEncoder, _InternalIdModelJSONEncoder)
@@ -89,7 +92,7 @@ StudyJSONDecoder = MappingJSONDecoderClassBuilder(
 
 # JSON encoder/decoder for `Library`
 _library_json_mapping = [
-    JsonPropertyMapping(JSON_LIBRARY_TYPE, "library_type")
+    SimpleJsonPropertyMapping(JSON_LIBRARY_TYPE, "library_type")
 ]
 LibraryJSONEncoder = MappingJSONEncoderClassBuilder(
     Library, _library_json_mapping, (_NamedModelJSONEncoder, _InternalIdModelJSONEncoder)
@@ -117,3 +120,18 @@ WellJSONEncoder = MappingJSONEncoderClassBuilder(
 WellJSONDecoder = MappingJSONDecoderClassBuilder(
     Well, _well_json_mapping, (_NamedModelJSONDecoder, _InternalIdModelJSONDecoder)
 ).build()
+
+
+# Fast JSON encoders/decoders, generated from the mappings of the encoders/decoders above, which produce the same JSON
+FastSampleJSONEncoder = FastJSONEncoderClassBuilder(Sample, SampleJSONEncoder).build()
+FastSampleJSONDecoder = FastJSONDecoderClassBuilder(Sample, SampleJSONDecoder).build()
+FastStudyJSONEncoder = FastJSONEncoderClassBuilder(Study, StudyJSONEncoder).build()
+FastStudyJSONDecoder = FastJSONDecoderClassBuilder(Study, StudyJSONDecoder).build()
+FastLibraryJSONEncoder = FastJSONEncoderClassBuilder(Library, LibraryJSONEncoder).build()
+FastLibraryJSONDecoder = FastJSONDecoderClassBuilder(Library, LibraryJSONDecoder).build()
+FastMultiplexedLibraryJSONEncoder = FastJSONEncoderClassBuilder(
+    MultiplexedLibrary, MultiplexedLibraryJSONEncoder).build()
+FastMultiplexedLibraryJSONDecoder = FastJSONDecoderClassBuilder(
+    MultiplexedLibrary, MultiplexedLibraryJSONDecoder).build()
+FastWellJSONEncoder = FastJSONEncoderClassBuilder(Well, WellJSONEncoder).build()
+FastWellJSONDecoder = FastJSONDecoderClassBuilder(Well, WellJSONDecoder).build()
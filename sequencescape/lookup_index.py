@@ -0,0 +1,377 @@
+import mmap
+import os
+import struct
+import tempfile
+from threading import Lock
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from sequencescape._delegating_mappers import DelegatingMapper, DelegatingSampleMapper, DelegatingStudyMapper
+from sequencescape.binary_codec import BinaryModels, encode_models
+from sequencescape.compact_models import get_compact_model_type
+from sequencescape.mappers import Mapper, MappedType, SampleMapper, StudyMapper, LibraryMapper, \
+    MultiplexedLibraryMapper, WellMapper, _unique_models
+from sequencescape.models import Sample, Study, Library, MultiplexedLibrary, Well
+
+# An index file holds (with all integers little-endian):
+# - header: magic bytes, format version and the size of the models
+# - models: the indexed models, in the binary format of `binary_codec`
+# - for each indexed property of the type of model: the number of models with a value for the property, followed by
+#   the positions of these models in the models, sorted by their value of the property
+LOOKUP_INDEX_MAGIC = b"SQSI"
+LOOKUP_INDEX_VERSION = 1
+
+# Properties that are indexed, where models have them
+INDEXED_PROPERTIES = ("internal_id", "name", "accession_number")
+
+_HEADER = struct.Struct("<4sB3xQ")
+_POSITION = struct.Struct("<I")
+
+
+def _get_indexed_properties(model_type: type) -> List[str]:
+    """
+    Gets the properties of the given type of model that are indexed.
+    :param model_type: the type of model
+    :return: the names of the indexed properties, in the order in which their indexes are held
+    """
+    properties = get_compact_model_type(model_type).__slots__
+    return [property for property in INDEXED_PROPERTIES if property in properties]
+
+
+class _IndexFile:
+    """
+    Index file that is open and mapped into memory.
+    """
+    def __init__(self, location: str):
+        """
+        Constructor.
+        :param location: the location of the index file
+        """
+        with open(location, "rb") as file:
+            self.status = os.fstat(file.fileno())
+            if self.status.st_size < _HEADER.size:
+                raise ValueError("File `%s` is too small to be an index" % location)
+            self._mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, models_size = _HEADER.unpack_from(self._mapped)
+        if magic != LOOKUP_INDEX_MAGIC:
+            raise ValueError("File `%s` is not an index (magic bytes: %r)" % (location, magic))
+        if version != LOOKUP_INDEX_VERSION:
+            raise ValueError("Unsupported index version: %d" % version)
+
+        self._view = memoryview(self._mapped)
+        self.models = BinaryModels(self._view[_HEADER.size:_HEADER.size + models_size])
+        self.indexes = {}   # type: Dict[str, Tuple[int, int]]
+        offset = _HEADER.size + models_size
+        for property in _get_indexed_properties(self.models.model_type):
+            if offset + _POSITION.size > len(self._view):
+                raise ValueError("File `%s` is too small to hold its indexes" % location)
+            length = _POSITION.unpack_from(self._view, offset)[0]
+            self.indexes[property] = (offset + _POSITION.size, length)
+            offset += _POSITION.size * (length + 1)
+        if offset > len(self._view):
+            raise ValueError("File `%s` is too small to hold its indexes" % location)
+
+    def find(self, property: str, value: Any) -> Iterator[int]:
+        """
+        Finds the positions of the models with the given value of the given property, by binary search of its index.
+        :param property: the name of the indexed property
+        :param value: the value of the property to match, which must be of the same type as the values of the property
+        :return: iterator of the positions of the models with the value
+        """
+        start, length = self.indexes[property]
+        view = self._view
+        get_value = self.models.get_value
+
+        def get_position(i: int) -> int:
+            return _POSITION.unpack_from(view, start + _POSITION.size * i)[0]
+
+        lower, upper = 0, length
+        while lower < upper:
+            middle = (lower + upper) // 2
+            if get_value(get_position(middle), property) < value:
+                lower = middle + 1
+            else:
+                upper = middle
+        while lower < length:
+            position = get_position(lower)
+            if get_value(position, property) != value:
+                break
+            yield position
+            lower += 1
+
+    def close(self):
+        """
+        Unmaps and closes the index file.
+        """
+        self.models.release()
+        self._view.release()
+        self._mapped.close()
+
+
+class LookupIndex:
+    """
+    Read-only index of models, held in a memory-mapped file, that finds the models with given values of their internal
+    ID, name and accession number in O(log n) time without accessing the database. Values are matched exactly (i.e.
+    case-sensitively).
+
+    As the file is mapped read-only, many processes can use the same index while only one copy of it is held in memory
+    (in the page cache). Indexes are rebuilt by writing a new file and atomically moving it into place. Indexes that are
+    open see the new file once they are reloaded.
+    """
+    @staticmethod
+    def build(models: Iterable[Any], model_type: type, location: str):
+        """
+        Builds an index of the given models in a file at the given location, replacing any index already there. The
+        index is written to a temporary file that is moved into place, so processes never see a partially written index.
+        :param models: the models to index
+        :param model_type: the type of the models
+        :param location: the location of the index file
+        """
+        models = list(models)
+        encoded_models = encode_models(models, model_type)
+        blocks = [_HEADER.pack(LOOKUP_INDEX_MAGIC, LOOKUP_INDEX_VERSION, len(encoded_models)), encoded_models]
+        for property in _get_indexed_properties(model_type):
+            values = [getattr(model, property) for model in models]
+            positions = sorted((position for position, value in enumerate(values) if value is not None),
+                               key=values.__getitem__)
+            blocks.append(struct.pack("<I%dI" % len(positions), len(positions), *positions))
+
+        directory, file_name = os.path.split(os.path.abspath(location))
+        file_handle, temp_location = tempfile.mkstemp(prefix=".%s." % file_name, dir=directory)
+        try:
+            with os.fdopen(file_handle, "wb") as file:
+                for block in blocks:
+                    file.write(block)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_location, location)
+        except BaseException:
+            os.remove(temp_location)
+            raise
+
+    def __init__(self, location: str):
+        """
+        Constructor.
+        :param location: the location of the index file, which must exist
+        """
+        self._location = location
+        self._lock = Lock()
+        self._file = _IndexFile(location)
+
+    @property
+    def location(self) -> str:
+        """
+        Gets the location of the index file.
+        :return: the location
+        """
+        return self._location
+
+    @property
+    def model_type(self) -> type:
+        """
+        Gets the type of the indexed models.
+        :return: the type of model
+        """
+        return self._file.models.model_type
+
+    @property
+    def indexed_properties(self) -> List[str]:
+        """
+        Gets the properties that are indexed.
+        :return: the names of the indexed properties
+        """
+        return _get_indexed_properties(self.model_type)
+
+    def get_by_property_value(self, property: str, values: Iterable[Any]) -> List[Any]:
+        """
+        Gets the indexed models with any of the given values of the given property.
+        :param property: the name of the indexed property
+        :param values: the values of the property to match
+        :return: the models, in the order of the values they match
+        """
+        index_file = self._file
+        if property not in index_file.indexes:
+            raise ValueError("Property `%s` is not indexed (indexed properties: %s)"
+                             % (property, self.indexed_properties))
+        value_type = int if property == "internal_id" else str
+        results = []
+        for value in values:
+            # No models can have values of other types
+            if isinstance(value, value_type):
+                results.extend(index_file.models[position] for position in index_file.find(property, value))
+        return _unique_models(results)
+
+    def get_all(self) -> List[Any]:
+        """
+        Gets all the indexed models.
+        :return: the models
+        """
+        return self._file.models.to_models()
+
+    def is_stale(self) -> bool:
+        """
+        Gets whether the index file has been replaced (e.g. rebuilt) since it was opened.
+        :return: whether the index file has been replaced
+        """
+        try:
+            return not os.path.samestat(self._file.status, os.stat(self._location))
+        except FileNotFoundError:
+            return False
+
+    def reload(self, if_stale: bool=True) -> bool:
+        """
+        Reopens the index file, to see the latest build of the index. Lookups being made by other threads continue to
+        use the previous file, which is unmapped once they no longer refer to it.
+        :param if_stale: whether to only reload if the index file has been replaced since it was opened
+        :return: whether the index was reloaded
+        """
+        with self._lock:
+            if if_stale and not self.is_stale():
+                return False
+            self._file = _IndexFile(self._location)
+            return True
+
+    def close(self):
+        """
+        Closes the index file. Lookups cannot be made afterwards.
+        """
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._file.models)
+
+    def __enter__(self) -> "LookupIndex":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class IndexedMapper(DelegatingMapper[MappedType]):
+    """
+    Mapper that gets models by internal ID, name and accession number from a `LookupIndex` of the models of another
+    mapper, rather than from the database. All other operations are passed on to the other mapper.
+
+    The index is built from the other mapper when this mapper is created if there is no index file, and when `rebuild`
+    is called. Models added since the index was last built (through this mapper or by other means) are not found by
+    lookups until it is rebuilt.
+    """
+    def __init__(self, mapper: Mapper[MappedType], model_type: type, index_location: str, auto_reload: bool=False):
+        """
+        Constructor.
+        :param mapper: the mapper from which the index is built and to which other operations are passed on
+        :param model_type: the type of model that the mapper deals with
+        :param index_location: the location of the index file, which may be shared with other processes
+        :param auto_reload: whether to check that the index file has not been rebuilt (e.g. by another process) before
+        each lookup, reloading it if it has
+        """
+        super().__init__(mapper)
+        self._model_type = model_type
+        self._index_location = index_location
+        self._auto_reload = auto_reload
+        if not os.path.exists(index_location):
+            LookupIndex.build(self._mapper.get_all(), model_type, index_location)
+        self._index = LookupIndex(index_location)
+        if self._index.model_type != model_type:
+            raise ValueError("Index at `%s` is of models of type `%s`, not `%s`"
+                             % (index_location, self._index.model_type.__name__, model_type.__name__))
+
+    @property
+    def index(self) -> LookupIndex:
+        """
+        Gets the index used by this mapper.
+        :return: the index
+        """
+        return self._index
+
+    def rebuild(self):
+        """
+        Rebuilds the index from the models got through the other mapper, atomically replacing the index file.
+        """
+        LookupIndex.build(self._mapper.get_all(), self._model_type, self._index_location)
+        self._index.reload()
+
+    def iter_by_property_value(self, property: Union[str, Union[Tuple[str, Any]], Iterable[Tuple[str, Any]]],
+                               values: Optional[Union[Any, Iterable[Any]]]=None) -> Iterator[MappedType]:
+        yield from self.get_by_property_value(property, values)
+
+    def _get_by_property_value_sequence(self, property: str, values: Iterable[Any]) -> Sequence[MappedType]:
+        if self._auto_reload:
+            self._index.reload()
+        if property in self._index.indexed_properties:
+            return self._index.get_by_property_value(property, values)
+        return self._mapper._get_by_property_value_sequence(property, values)
+
+
+class IndexedSampleMapper(IndexedMapper[Sample], DelegatingSampleMapper):
+    """
+    Implementation of `SampleMapper` that gets samples by internal ID, name and accession number from an index of the
+    samples of another `SampleMapper`.
+    """
+    def __init__(self, mapper: SampleMapper, index_location: str, auto_reload: bool=False):
+        """
+        Constructor.
+        :param mapper: the mapper from which the index is built and to which other operations are passed on
+        :param index_location: the location of the index file
+        :param auto_reload: whether to reload the index file before each lookup if it has been rebuilt
+        """
+        super().__init__(mapper, Sample, index_location, auto_reload)
+
+
+class IndexedStudyMapper(IndexedMapper[Study], DelegatingStudyMapper):
+    """
+    Implementation of `StudyMapper` that gets studies by internal ID, name and accession number from an index of the
+    studies of another `StudyMapper`.
+    """
+    def __init__(self, mapper: StudyMapper, index_location: str, auto_reload: bool=False):
+        """
+        Constructor.
+        :param mapper: the mapper from which the index is built and to which other operations are passed on
+        :param index_location: the location of the index file
+        :param auto_reload: whether to reload the index file before each lookup if it has been rebuilt
+        """
+        super().__init__(mapper, Study, index_location, auto_reload)
+
+
+class IndexedLibraryMapper(IndexedMapper[Library], LibraryMapper):
+    """
+    Implementation of `LibraryMapper` that gets libraries by internal ID and name from an index of the libraries of
+    another `LibraryMapper`.
+    """
+    def __init__(self, mapper: LibraryMapper, index_location: str, auto_reload: bool=False):
+        """
+        Constructor.
+        :param mapper: the mapper from which the index is built and to which other operations are passed on
+        :param index_location: the location of the index file
+        :param auto_reload: whether to reload the index file before each lookup if it has been rebuilt
+        """
+        super().__init__(mapper, Library, index_location, auto_reload)
+
+
+class IndexedMultiplexedLibraryMapper(IndexedMapper[MultiplexedLibrary], MultiplexedLibraryMapper):
+    """
+    Implementation of `MultiplexedLibraryMapper` that gets multiplexed libraries by internal ID and name from an index
+    of the multiplexed libraries of another `MultiplexedLibraryMapper`.
+    """
+    def __init__(self, mapper: MultiplexedLibraryMapper, index_location: str, auto_reload: bool=False):
+        """
+        Constructor.
+        :param mapper: the mapper from which the index is built and to which other operations are passed on
+        :param index_location: the location of the index file
+        :param auto_reload: whether to reload the index file before each lookup if it has been rebuilt
+        """
+        super().__init__(mapper, MultiplexedLibrary, index_location, auto_reload)
+
+
+class IndexedWellMapper(IndexedMapper[Well], WellMapper):
+    """
+    Implementation of `WellMapper` that gets wells by internal ID and name from an index of the wells of another
+    `WellMapper`.
+    """
+    def __init__(self, mapper: WellMapper, index_location: str, auto_reload: bool=False):
+        """
+        Constructor.
+        :param mapper: the mapper from which the index is built and to which other operations are passed on
+        :param index_location: the location of the index file
+        :param auto_reload: whether to reload the index file before each lookup if it has been rebuilt
+        """
+        super().__init__(mapper, Well, index_location, auto_reload)
@@ -1,5 +1,5 @@
 from abc import abstractmethod, ABCMeta
-from typing import Tuple, Union, Any, Optional, Iterable, Sequence, Generic, TypeVar
+from typing import Tuple, Union, Any, Optional, Iterable, Sequence, Generic, TypeVar, List, Dict, Iterator
 
 import collections
 
@@ -11,6 +11,43 @@ from sequencescape.models import Study, NamedModel, InternalIdModel, AccessionNu
 MappedType = TypeVar("MappedType", bound=Model)
 
 
+def _unique_models(models: Iterable[MappedType]) -> List[MappedType]:
+    """
+    Removes duplicates from the given models, retaining the order in which each model first appears. Models with
+    internal IDs are considered duplicates if they have the same internal ID.
+    :param models: the models to remove duplicates from
+    :return: the unique models
+    """
+    seen = set()
+    unique_models = []
+    for model in models:
+        if isinstance(model, InternalIdModel) and model.internal_id is not None:
+            key = (InternalIdModel, model.internal_id)
+        else:
+            key = model
+        if key not in seen:
+            seen.add(key)
+            unique_models.append(model)
+    return unique_models
+
+
+def _group_values_by_property(property_value_tuples: Iterable[Tuple[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    Groups the values in the given property-value tuples by property. Duplicate values are removed.
+    :param property_value_tuples: the tuples declaring what property values to group, where the value may either be a
+    single value or an iterable of values
+    :return: ordered dictionary where the keys are the properties and the values are the values for the property
+    """
+    grouped = collections.OrderedDict()    # type: Dict[str, Dict[Any, None]]
+    for property, value in property_value_tuples:
+        if property not in grouped:
+            grouped[property] = collections.OrderedDict()
+        values = [value] if isinstance(value, str) or isinstance(value, int) else value
+        for value in values:
+            grouped[property][value] = None
+    return collections.OrderedDict((property, list(values)) for property, values in grouped.items())
+
+
 class Mapper(Generic[MappedType], metaclass=ABCMeta):
     """
     A data mapper as defined by Martin Fowler (see: http://martinfowler.com/eaaCatalog/dataMapper.html) that moves data
@@ -31,6 +68,28 @@ class Mapper(Generic[MappedType], metaclass=ABCMeta):
         deals with
         """
 
+    def iter_all(self) -> Iterator[MappedType]:
+        """
+        Iterates over all the data of the type this data mapper deals with in the Sequencescape database.
+        Implementations should override this method if they are able to stream the data, rather than getting it all at
+        once.
+        :return: iterator of models representing each piece of data in the database of the type this data mapper deals
+        with
+        """
+        yield from self.get_all()
+
+    def iter_by_property_value(self, property: Union[str, Union[Tuple[str, Any]], Iterable[Tuple[str, Any]]],
+                               values: Optional[Union[Any, Iterable[Any]]]=None) -> Iterator[MappedType]:
+        """
+        Iterates over models (of the type this data mapper deals with) of data from the database that have the given
+        property values. Implementations should override this method if they are able to stream the data, rather than
+        getting it all at once.
+        :param property: see `get_by_property_value`
+        :param values: see `get_by_property_value`
+        :return: iterator of models that have the given property values
+        """
+        yield from self.get_by_property_value(property, values)
+
     @abstractmethod
     def _get_by_property_value_sequence(self, property: str, values: Iterable[Any]) -> Sequence[MappedType]:
         """
@@ -68,14 +127,14 @@ class Mapper(Generic[MappedType], metaclass=ABCMeta):
         if isinstance(property_value_tuples, tuple):
             property_value_tuples = [property_value_tuples]
 
-        # TODO: Be clever and group tuples querying same property
-
+        # Query once for each property, instead of once for each tuple. Implementations that can query for many
+        # properties at the same time should override this method
         results = []
-        for property, value in property_value_tuples:
-            result = self.get_by_property_value(property, value)
+        for property, values in _group_values_by_property(property_value_tuples).items():
+            result = self._get_by_property_value_sequence(property, values)
             assert isinstance(result, collections.Sequence)
             results.extend(result)
-        return results
+        return _unique_models(results)
 
 
 class NamedMapper(Mapper[NamedModel], metaclass=ABCMeta):
@@ -132,11 +191,12 @@ class SampleMapper(NamedMapper, InternalIdMapper, AccessionNumberMapper, metacla
     Mapper for `Sample` models.
     """
     @abstractmethod
-    def set_association_with_study(self, samples: Union[Sample, Iterable[Sample]], study: Study):
+    def set_association_with_study(self, samples: Union[Sample, Iterable[Sample]],
+                                   study: Union[Study, Iterable[Study]]):
         """
-        Associates the given samples to the given study.
+        Associates the given samples to the given study or studies.
         :param samples: the samples to associate to the study
-        :param study: the study to which the samples are associated
+        :param study: the study (or studies) to which the samples are associated
         """
 
     @abstractmethod
@@ -153,11 +213,12 @@ class StudyMapper(NamedMapper, InternalIdMapper, AccessionNumberMapper, metaclas
     Mapper for `Study` models.
     """
     @abstractmethod
-    def set_association_with_sample(self, studies: Union[Study, Iterable[Study]], sample: Sample):
+    def set_association_with_sample(self, studies: Union[Study, Iterable[Study]],
+                                    sample: Union[Sample, Iterable[Sample]]):
         """
-        Associates the given studies to the given sample.
+        Associates the given studies to the given sample or samples.
         :param studies: the studies to associate to the sample
-        :param sample: the sample to which the studies are associated
+        :param sample: the sample (or samples) to which the studies are associated
         """
 
     @abstractmethod
@@ -0,0 +1,179 @@
+import urllib.parse
+from typing import Dict
+
+from hgicommon.models import Model
+from sqlalchemy import create_engine, select, func, inspect, Index, Table
+from sqlalchemy.engine import Engine, Connection as EngineConnection
+from sqlalchemy.sql import Select
+
+from sequencescape._sqlalchemy._models import SQLAlchemyModel, SQLAlchemySample, SQLAlchemyStudy, SQLAlchemyLibrary, \
+    SQLAlchemyMultiplexedLibrary, SQLAlchemyWell, study_sample_join_table
+from sequencescape.api import Connection
+
+# Number of rows copied from the source database at a time
+DEFAULT_MIRROR_BATCH_SIZE = 10000
+
+# Tables that are copied incrementally, by internal ID
+_MODEL_TABLES = [model_type.__table__ for model_type in (
+    SQLAlchemySample, SQLAlchemyStudy, SQLAlchemyLibrary, SQLAlchemyMultiplexedLibrary, SQLAlchemyWell)]
+
+# Tables without an internal ID, which are copied in full on every sync
+_ASSOCIATION_TABLES = [study_sample_join_table]
+
+# Columns that are indexed in the mirror, as they are commonly used in lookups
+_INDEXED_COLUMN_NAMES = ["name", "accession_number"]
+
+
+class MirrorSyncStatistics(Model):
+    """
+    Model of what was copied during a sync of a mirror.
+    """
+    def __init__(self, rows_added: Dict[str, int]=None, full: bool=False):
+        """
+        Constructor.
+        :param rows_added: the number of rows added to each table of the mirror, by table name. Includes all the rows of
+        tables that were copied in full
+        :param full: whether all tables were copied in full
+        """
+        self.rows_added = rows_added if rows_added is not None else {}
+        self.full = full
+
+
+class SequencescapeMirror:
+    """
+    Local SQLite copy of the tables of a Sequencescape database, which can be used instead of the source database for
+    read-heavy workloads.
+
+    Rows of tables with internal IDs are copied incrementally: each sync only copies the rows with internal IDs above
+    the highest in the mirror (the high-water mark). Changes to rows that have already been copied are therefore only
+    picked up by a full sync. The association table is copied in full on every sync. Each sync is made in a single
+    transaction, so readers of the mirror see all or none of its changes.
+    """
+    def __init__(self, source_database_location: str, mirror_location: str,
+                 batch_size: int=DEFAULT_MIRROR_BATCH_SIZE):
+        """
+        Constructor.
+        :param source_database_location: location of the source Sequencescape database as a URL
+        :param mirror_location: path of the SQLite file to mirror the database into, which is created if it does not
+        exist
+        :param batch_size: the number of rows to copy from the source database at a time
+        """
+        if urllib.parse.urlparse(source_database_location).scheme == "":
+            raise ValueError("Database location must define a scheme (%s given)" % source_database_location)
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1 (%d given)" % batch_size)
+        self._source_database_location = source_database_location
+        self._mirror_location = mirror_location
+        self._batch_size = batch_size
+
+    @property
+    def mirror_database_location(self) -> str:
+        """
+        Gets the location of the mirror as a URL.
+        :return: the location of the mirror
+        """
+        return "sqlite:///%s" % self._mirror_location
+
+    def connect(self, **kwargs) -> Connection:
+        """
+        Creates a connection to the mirror, which can be used in the same way as a connection to the source database.
+        :param kwargs: connection options, as defined in `connect_to_sequencescape`
+        :return: connection to the mirror
+        """
+        return Connection(self.mirror_database_location, **kwargs)
+
+    def sync(self, full: bool=False) -> MirrorSyncStatistics:
+        """
+        Copies new rows from the source database into the mirror, creating the mirror if it does not exist.
+        :param full: whether to replace all rows in the mirror instead of only adding rows with new internal IDs
+        :return: statistics about what was copied
+        """
+        source_engine = create_engine(self._source_database_location)
+        mirror_engine = create_engine(self.mirror_database_location)
+        try:
+            self._create_schema(mirror_engine)
+            rows_added = {}
+            with source_engine.connect() as source, mirror_engine.begin() as mirror:
+                for table in _MODEL_TABLES:
+                    if full:
+                        mirror.execute(table.delete())
+                    rows_added[table.name] = self._copy_new_rows(table, source, mirror)
+                for table in _ASSOCIATION_TABLES:
+                    mirror.execute(table.delete())
+                    rows_added[table.name] = self._copy_rows(table.select(), table, source, mirror)
+            return MirrorSyncStatistics(rows_added=rows_added, full=full)
+        finally:
+            source_engine.dispose()
+            mirror_engine.dispose()
+
+    def _copy_new_rows(self, table: Table, source: EngineConnection, mirror: EngineConnection) -> int:
+        """
+        Copies the rows of the given table with internal IDs above the high-water mark in the mirror, in batches.
+        :param table: the table to copy rows of
+        :param source: connection to the source database
+        :param mirror: connection to the mirror, in a transaction
+        :return: the number of rows copied
+        """
+        internal_id = table.c.internal_id
+        high_water_mark = mirror.execute(select([func.max(internal_id)])).scalar()
+        rows_copied = 0
+        while True:
+            # Paging by internal ID (rather than by offset) keeps each batch as cheap to get as the first
+            query = table.select().order_by(internal_id).limit(self._batch_size)
+            if high_water_mark is not None:
+                query = query.where(internal_id > high_water_mark)
+            rows = source.execute(query).fetchall()
+            if len(rows) == 0:
+                return rows_copied
+            mirror.execute(table.insert(), [dict(row) for row in rows])
+            rows_copied += len(rows)
+            high_water_mark = rows[-1][internal_id]
+
+    def _copy_rows(self, query: Select, table: Table, source: EngineConnection, mirror: EngineConnection) -> int:
+        """
+        Copies the rows selected from the source database by the given query into the given table of the mirror.
+        :param query: the query for the rows to copy
+        :param table: the table to copy the rows into
+        :param source: connection to the source database
+        :param mirror: connection to the mirror, in a transaction
+        :return: the number of rows copied
+        """
+        result = source.execute(query)
+        rows_copied = 0
+        try:
+            while True:
+                rows = result.fetchmany(self._batch_size)
+                if len(rows) == 0:
+                    return rows_copied
+                mirror.execute(table.insert(), [dict(row) for row in rows])
+                rows_copied += len(rows)
+        finally:
+            result.close()
+
+    @staticmethod
+    def _create_schema(mirror_engine: Engine):
+        """
+        Creates the tables and indexes of the mirror, if they do not already exist.
+        :param mirror_engine: engine connected to the mirror
+        """
+        SQLAlchemyModel.metadata.create_all(bind=mirror_engine, tables=_MODEL_TABLES + _ASSOCIATION_TABLES)
+        inspector = inspect(mirror_engine)
+        for table in _MODEL_TABLES:
+            existing_index_names = {index["name"] for index in inspector.get_indexes(table.name)}
+            for column_name in _INDEXED_COLUMN_NAMES:
+                index_name = "ix_%s_%s" % (table.name, column_name)
+                if column_name in table.c and index_name not in existing_index_names:
+                    Index(index_name, table.c[column_name]).create(bind=mirror_engine)
+
+
+def create_mirror(source_database_location: str, mirror_location: str, **kwargs) -> SequencescapeMirror:
+    """
+    Creates a local SQLite mirror of a Sequencescape database, copying all of its data.
+    :param source_database_location: location of the source Sequencescape database as a URL
+    :param mirror_location: path of the SQLite file to mirror the database into
+    :param kwargs: mirror options, as defined in the constructor of `SequencescapeMirror`
+    :return: the mirror, which can be synced again later to copy new data
+    """
+    mirror = SequencescapeMirror(source_database_location, mirror_location, **kwargs)
+    mirror.sync()
+    return mirror
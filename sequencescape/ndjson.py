@@ -0,0 +1,234 @@
+import io
+import itertools
+from typing import Any, Iterable, Iterator, List, Tuple, IO
+
+from hgicommon.models import Model
+
+from sequencescape.json_converters import FastSampleJSONEncoder, FastSampleJSONDecoder, FastStudyJSONEncoder, \
+    FastStudyJSONDecoder, FastLibraryJSONEncoder, FastLibraryJSONDecoder, FastMultiplexedLibraryJSONEncoder, \
+    FastMultiplexedLibraryJSONDecoder, FastWellJSONEncoder, FastWellJSONDecoder
+from sequencescape.mappers import Mapper
+from sequencescape.models import Sample, Study, Library, MultiplexedLibrary, Well
+
+# Number of characters of encoded models that are held before being written to the stream
+DEFAULT_NDJSON_BUFFER_SIZE = 64 * 1024
+
+# Number of decoded models that are added through a mapper at a time when importing
+DEFAULT_NDJSON_IMPORT_BATCH_SIZE = 1000
+
+# Encoding of binary streams
+NDJSON_ENCODING = "utf-8"
+
+# JSON encoder and decoder of each type of model
+_JSON_CONVERTERS = {
+    Sample: (FastSampleJSONEncoder, FastSampleJSONDecoder),
+    Study: (FastStudyJSONEncoder, FastStudyJSONDecoder),
+    Library: (FastLibraryJSONEncoder, FastLibraryJSONDecoder),
+    MultiplexedLibrary: (FastMultiplexedLibraryJSONEncoder, FastMultiplexedLibraryJSONDecoder),
+    Well: (FastWellJSONEncoder, FastWellJSONDecoder)
+}
+
+
+def _get_json_converters(model_type: type) -> Tuple[type, type]:
+    """
+    Gets the JSON encoder and decoder of the given type of model.
+    :param model_type: the type of model
+    :return: tuple containing the encoder and decoder types
+    """
+    if model_type not in _JSON_CONVERTERS:
+        raise ValueError("No JSON encoder and decoder for models of type `%s`" % model_type)
+    return _JSON_CONVERTERS[model_type]
+
+
+def _is_binary_stream(stream: IO) -> bool:
+    """
+    Gets whether the given stream reads or writes bytes, rather than strings.
+    :param stream: the stream
+    :return: whether the stream is binary
+    """
+    return isinstance(stream, (io.RawIOBase, io.BufferedIOBase))
+
+
+class NDJSONWriter:
+    """
+    Writes models of a given type to a stream as newline-delimited JSON: one JSON object per line. Encoded models are
+    buffered so that the stream is written to in chunks of about `buffer_size`, never holding more than that (plus one
+    model) in memory.
+
+    The stream can be text or binary (e.g. a file or `socket.makefile("wb")`). It is not closed by the writer.
+    """
+    def __init__(self, model_type: type, stream: IO, buffer_size: int=DEFAULT_NDJSON_BUFFER_SIZE):
+        """
+        Constructor.
+        :param model_type: the type of model that is written
+        :param stream: the stream to write to
+        :param buffer_size: the number of characters of encoded models to hold before writing them to the stream
+        """
+        if buffer_size < 1:
+            raise ValueError("Buffer size must be at least 1 (%d given)" % buffer_size)
+        encoder_type, _ = _get_json_converters(model_type)
+        self._encode = encoder_type(separators=(",", ":")).encode
+        self._stream = stream
+        self._binary = _is_binary_stream(stream)
+        self._buffer_size = buffer_size
+        self._buffer = []     # type: List[str]
+        self._buffered = 0
+        self._models_written = 0
+        self._closed = False
+
+    @property
+    def models_written(self) -> int:
+        """
+        Gets the number of models that have been written (including those still buffered).
+        :return: the number of models
+        """
+        return self._models_written
+
+    def write(self, model: Model):
+        """
+        Writes the given model.
+        :param model: the model to write
+        """
+        if self._closed:
+            raise ValueError("Cannot write to a closed writer")
+        line = self._encode(model) + "\n"
+        self._buffer.append(line)
+        self._buffered += len(line)
+        self._models_written += 1
+        if self._buffered >= self._buffer_size:
+            self._write_buffer()
+
+    def write_all(self, models: Iterable[Model]) -> int:
+        """
+        Writes the given models, which are iterated over (not held in memory).
+        :param models: the models to write
+        :return: the number of models written
+        """
+        written = self._models_written
+        for model in models:
+            self.write(model)
+        return self._models_written - written
+
+    def flush(self):
+        """
+        Writes all buffered models to the stream and flushes the stream.
+        """
+        self._write_buffer()
+        self._stream.flush()
+
+    def close(self):
+        """
+        Writes all buffered models to the stream. Models cannot be written after the writer has been closed.
+        """
+        if not self._closed:
+            self.flush()
+            self._closed = True
+
+    def _write_buffer(self):
+        """
+        Writes the buffered models to the stream.
+        """
+        if len(self._buffer) > 0:
+            data = "".join(self._buffer)
+            self._stream.write(data.encode(NDJSON_ENCODING) if self._binary else data)
+            self._buffer.clear()
+            self._buffered = 0
+
+    def __enter__(self) -> "NDJSONWriter":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class NDJSONReader:
+    """
+    Reads models of a given type from a stream of newline-delimited JSON. Lines are read and decoded lazily, as the
+    reader is iterated over, so only one model is held in memory at a time. Blank lines are skipped.
+
+    The stream can be text or binary (e.g. a file or `socket.makefile("rb")`). It is not closed by the reader.
+    """
+    def __init__(self, model_type: type, stream: IO):
+        """
+        Constructor.
+        :param model_type: the type of model that is read
+        :param stream: the stream to read from
+        """
+        _, decoder_type = _get_json_converters(model_type)
+        self._decode = decoder_type().decode
+        self._stream = stream
+        self._binary = _is_binary_stream(stream)
+
+    def __iter__(self) -> Iterator[Model]:
+        for line_number, line in enumerate(self._stream, start=1):
+            if self._binary:
+                line = line.decode(NDJSON_ENCODING)
+            if line.strip() == "":
+                continue
+            try:
+                yield self._decode(line)
+            except ValueError as e:
+                raise ValueError("Invalid JSON on line %d: %s" % (line_number, e)) from e
+
+
+def write_ndjson(model_type: type, models: Iterable[Model], stream: IO,
+                 buffer_size: int=DEFAULT_NDJSON_BUFFER_SIZE) -> int:
+    """
+    Writes the given models to the given stream as newline-delimited JSON.
+    :param model_type: the type of the models
+    :param models: the models, which are iterated over (not held in memory)
+    :param stream: the (text or binary) stream to write to, which is flushed but not closed
+    :param buffer_size: see `NDJSONWriter`
+    :return: the number of models written
+    """
+    with NDJSONWriter(model_type, stream, buffer_size) as writer:
+        return writer.write_all(models)
+
+
+def read_ndjson(model_type: type, stream: IO) -> Iterator[Model]:
+    """
+    Lazily reads models from the given stream of newline-delimited JSON.
+    :param model_type: the type of the models
+    :param stream: the (text or binary) stream to read from
+    :return: iterator of the models
+    """
+    return iter(NDJSONReader(model_type, stream))
+
+
+def export_ndjson(mapper: Mapper, model_type: type, stream: IO, buffer_size: int=DEFAULT_NDJSON_BUFFER_SIZE,
+                  **iter_all_kwargs: Any) -> int:
+    """
+    Writes all the models of the given mapper to the given stream as newline-delimited JSON, streaming them from the
+    mapper with `iter_all` so that the export runs in constant memory.
+    :param mapper: the mapper to export the models of
+    :param model_type: the type of model that the mapper deals with
+    :param stream: the (text or binary) stream to write to, which is flushed but not closed
+    :param buffer_size: see `NDJSONWriter`
+    :param iter_all_kwargs: options for `iter_all` of the mapper (e.g. `batch_size`)
+    :return: the number of models exported
+    """
+    return write_ndjson(model_type, mapper.iter_all(**iter_all_kwargs), stream, buffer_size)
+
+
+def import_ndjson(mapper: Mapper, model_type: type, stream: IO,
+                  batch_size: int=DEFAULT_NDJSON_IMPORT_BATCH_SIZE) -> int:
+    """
+    Adds the models read from the given stream of newline-delimited JSON through the given mapper, in batches, so that
+    the import runs in constant memory.
+    :param mapper: the mapper to add the models through
+    :param model_type: the type of model that the mapper deals with
+    :param stream: the (text or binary) stream to read from
+    :param batch_size: the number of models to add at a time
+    :return: the number of models imported
+    """
+    if batch_size < 1:
+        raise ValueError("Batch size must be at least 1 (%d given)" % batch_size)
+    models = read_ndjson(model_type, stream)
+    imported = 0
+    while True:
+        batch = list(itertools.islice(models, batch_size))
+        if len(batch) == 0:
+            break
+        mapper.add(batch)
+        imported += len(batch)
+    return imported
@@ -72,6 +72,23 @@ def create_stub_sample() -> Sample:
     return sample
 
 
+def create_stub_samples(number_of_samples: int, first_internal_id: int=0) -> List[Sample]:
+    """
+    Creates `Sample` stubs with consecutive internal IDs and with names and accession numbers made unique by them.
+    :param number_of_samples: the number of samples to create
+    :param first_internal_id: the internal ID of the first sample
+    :return: the stub `Sample` models
+    """
+    samples = []    # type: List[Sample]
+    for internal_id in range(first_internal_id, first_internal_id + number_of_samples):
+        sample = create_stub_sample()
+        sample.internal_id = internal_id
+        sample.name = "sample_%d" % internal_id
+        sample.accession_number = "accession_%d" % internal_id
+        samples.append(sample)
+    return samples
+
+
 def create_stub_study() -> Study:
     """
     Creates a `Study` stub.
@@ -4,7 +4,7 @@ from unittest.mock import MagicMock
 from sequencescape.enums import Property
 from sequencescape.mappers import Mapper, NamedMapper, InternalIdMapper, AccessionNumberMapper, SampleMapper,\
     WellMapper, MultiplexedLibraryMapper, LibraryMapper, StudyMapper
-from sequencescape.models import Model, NamedModel, InternalIdModel, AccessionNumberModel
+from sequencescape.models import Model, NamedModel, InternalIdModel, AccessionNumberModel, Sample, Study
 
 
 class MockMapper(Mapper):
@@ -41,11 +41,29 @@ class MockAccessionNumberMapper(MockMapper, AccessionNumberMapper):
 
 
 class MockSampleMapper(MockMapper, SampleMapper):
-    pass
+    def __init__(self):
+        super().__init__()
+        self.set_association_with_study = MagicMock()
+        self.get_associated_with_study = MagicMock(return_value=[])
+
+    def set_association_with_study(self, samples: Union[Sample, List[Sample]], study: Union[Study, List[Study]]):
+        pass
+
+    def get_associated_with_study(self, studies: Union[Study, List[Study]]) -> List[Sample]:
+        pass
 
 
 class MockStudyMapper(MockMapper, StudyMapper):
-    pass
+    def __init__(self):
+        super().__init__()
+        self.set_association_with_sample = MagicMock()
+        self.get_associated_with_sample = MagicMock(return_value=[])
+
+    def set_association_with_sample(self, studies: Union[Study, List[Study]], sample: Union[Sample, List[Sample]]):
+        pass
+
+    def get_associated_with_sample(self, samples: Union[Sample, List[Sample]]) -> List[Study]:
+        pass
 
 
 class MockLibraryMapper(MockMapper, LibraryMapper):
@@ -0,0 +1,74 @@
+"""
+Compares the size of, and the time taken to encode and decode, samples in the binary format with pickle and JSON.
+
+Run with: `python -m sequencescape.tests.benchmarks.benchmark_binary [--models MODELS] [--repeats REPEATS]`
+"""
+import argparse
+import json
+import pickle
+import timeit
+from typing import Any, Callable, List, Tuple
+
+from sequencescape.binary_codec import encode_models, decode_models, BinaryModels
+from sequencescape.json_converters import FastSampleJSONEncoder, FastSampleJSONDecoder
+from sequencescape.models import Sample
+from sequencescape.tests.benchmarks.benchmark_suite import generate_samples
+
+
+def create_samples(number_of_samples: int) -> List[Sample]:
+    """
+    Creates samples whose values are not shared between samples, as they are not when read from the database.
+    :param number_of_samples: the number of samples to create
+    :return: the samples
+    """
+    samples = list(generate_samples(0, number_of_samples))
+    for sample in samples:
+        for name, value in vars(sample).items():
+            if isinstance(value, str):
+                setattr(sample, name, value.encode("utf-8").decode("utf-8"))
+    return samples
+
+
+def benchmark_binary(number_of_models: int, repeats: int) -> List[Tuple[str, int, float, float]]:
+    """
+    Measures the size of, and times the encoding and decoding of, the given number of samples in each format.
+    :param number_of_models: the number of samples
+    :param repeats: the number of times to time each operation
+    :return: tuples containing the name of the format, the size of the encoded samples (in bytes) and the best times
+    to encode and decode them (in seconds)
+    """
+    samples = create_samples(number_of_models)
+    formats = [
+        ("binary", encode_models, decode_models),
+        ("binary (compact)", encode_models, lambda encoded: decode_models(encoded, compact=True)),
+        ("binary (one)", encode_models, lambda encoded: BinaryModels(encoded)[len(samples) // 2]),
+        ("pickle", lambda models: pickle.dumps(models, pickle.HIGHEST_PROTOCOL), pickle.loads),
+        ("json (fast)", lambda models: json.dumps(models, cls=FastSampleJSONEncoder).encode("utf-8"),
+         lambda encoded: FastSampleJSONDecoder().decode(encoded.decode("utf-8")))
+    ]   # type: List[Tuple[str, Callable[[List[Sample]], bytes], Callable[[bytes], Any]]]
+
+    results = []
+    for name, encode, decode in formats:
+        encoded = encode(samples)
+        encode_time = min(timeit.repeat(lambda: encode(samples), number=1, repeat=repeats))
+        decode_time = min(timeit.repeat(lambda: decode(encoded), number=1, repeat=repeats))
+        results.append((name, len(encoded), encode_time, decode_time))
+    return results
+
+
+def main():
+    """
+    Runs the benchmark and prints the results.
+    """
+    parser = argparse.ArgumentParser(description="Compares the binary format with pickle and JSON")
+    parser.add_argument("--models", type=int, default=100000, help="number of samples to encode and decode")
+    parser.add_argument("--repeats", type=int, default=3, help="number of times to time each operation")
+    arguments = parser.parse_args()
+
+    print("%-18s %10s %11s %11s" % ("format", "size (MB)", "encode (s)", "decode (s)"))
+    for name, size, encode_time, decode_time in benchmark_binary(arguments.models, arguments.repeats):
+        print("%-18s %10.2f %11.4f %11.4f" % (name, size / 2 ** 20, encode_time, decode_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compares the memory used by, and the time taken to aggregate, samples held in columns with that of lists of samples.
+
+Run with: `python -m sequencescape.tests.benchmarks.benchmark_columnar [--models MODELS] [--organisms ORGANISMS]
+[--repeats REPEATS]`
+"""
+import argparse
+import collections
+import timeit
+from typing import List, Tuple, Any
+
+from sequencescape._sqlalchemy._models import SQLAlchemySample
+from sequencescape._sqlalchemy.model_converters import get_popo_model_columns, convert_rows_to_popo_models
+from sequencescape.columnar import ColumnarModels
+from sequencescape.models import Sample
+from sequencescape.tests.benchmarks.benchmark_models import create_rows, measure_memory
+
+
+def create_columns(rows: List[Tuple[Any, ...]]) -> collections.OrderedDict:
+    """
+    Splits the given rows of the sample table into columns, in the same way as `get_all_columnar`.
+    :param rows: the rows, containing the columns given by `get_popo_model_columns`
+    :return: the values of each column, by property name
+    """
+    return collections.OrderedDict(
+        (column.key, list(values)) for column, values in zip(get_popo_model_columns(SQLAlchemySample), zip(*rows)))
+
+
+def benchmark_columnar(number_of_models: int, number_of_organisms: int, repeats: int) -> List[Tuple[str, float, float]]:
+    """
+    Measures the memory used by, and times counting by organism of, the given number of samples as a list of models and
+    in columns.
+    :param number_of_models: the number of samples
+    :param number_of_organisms: the number of distinct organisms that the samples have
+    :param repeats: the number of times to time each operation
+    :return: tuples containing the name of what was measured, the measurement for a list of models and the
+    measurement for the columns
+    """
+    organism_index = [column.key for column in get_popo_model_columns(SQLAlchemySample)].index("organism")
+    rows = []
+    for i, row in enumerate(create_rows(number_of_models)):
+        row = list(row)
+        # Organisms are created separately for each row, as they are when read from the database
+        row[organism_index] = "".join(["organism_", str(i % number_of_organisms)])
+        rows.append(tuple(row))
+
+    models = convert_rows_to_popo_models(SQLAlchemySample, rows)
+    columnar = ColumnarModels(Sample, create_columns(rows))
+    assert columnar.count_by("organism") == collections.Counter(model.organism for model in models)
+
+    memory = (
+        measure_memory(lambda: convert_rows_to_popo_models(SQLAlchemySample, rows)),
+        measure_memory(lambda: ColumnarModels(Sample, create_columns(rows)))
+    )
+    count_by = (
+        min(timeit.repeat(lambda: collections.Counter(model.organism for model in models), number=1, repeat=repeats)),
+        min(timeit.repeat(lambda: columnar.count_by("organism"), number=1, repeat=repeats))
+    )
+    return [("memory (MB)", memory[0] / 2 ** 20, memory[1] / 2 ** 20), ("count_by (s)", count_by[0], count_by[1])]
+
+
+def main():
+    """
+    Runs the benchmark and prints the results.
+    """
+    parser = argparse.ArgumentParser(description="Compares samples held in columns with lists of samples")
+    parser.add_argument("--models", type=int, default=100000, help="number of samples")
+    parser.add_argument("--organisms", type=int, default=20, help="number of distinct organisms")
+    parser.add_argument("--repeats", type=int, default=5, help="number of times to time each operation")
+    arguments = parser.parse_args()
+
+    print("%-14s %12s %12s %9s" % ("", "models", "columnar", "ratio"))
+    for name, models_measurement, columnar_measurement in benchmark_columnar(
+            arguments.models, arguments.organisms, arguments.repeats):
+        print("%-14s %12.4f %12.4f %8.1fx" % (
+            name, models_measurement, columnar_measurement, models_measurement / columnar_measurement))
+
+
+if __name__ == "__main__":
+    main()
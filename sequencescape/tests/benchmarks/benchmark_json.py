@@ -0,0 +1,55 @@
+"""
+Compares the time taken to encode and decode samples as JSON with the fast JSON encoder/decoder with that taken with
+the encoder/decoder built with hgijson.
+
+Run with: `python -m sequencescape.tests.benchmarks.benchmark_json [--models MODELS] [--repeats REPEATS]`
+"""
+import argparse
+import json
+import timeit
+from typing import List, Tuple
+
+from sequencescape.json_converters import SampleJSONEncoder, SampleJSONDecoder, FastSampleJSONEncoder, \
+    FastSampleJSONDecoder
+from sequencescape.tests.benchmarks.benchmark_suite import generate_samples
+
+
+def benchmark_json(number_of_models: int, repeats: int) -> List[Tuple[str, float, float]]:
+    """
+    Times the encoding and decoding of the given number of samples.
+    :param number_of_models: the number of samples to encode and decode
+    :param repeats: the number of times to time each operation
+    :return: tuples containing the name of the operation and the best time (in seconds) with the hgijson and the fast
+    encoder/decoder
+    """
+    samples = list(generate_samples(0, number_of_models))
+    encoded = json.dumps(samples, cls=SampleJSONEncoder)
+    assert json.dumps(samples, cls=FastSampleJSONEncoder) == encoded
+    assert FastSampleJSONDecoder().decode(encoded) == samples
+
+    operations = [
+        ("encode", lambda: json.dumps(samples, cls=SampleJSONEncoder),
+         lambda: json.dumps(samples, cls=FastSampleJSONEncoder)),
+        ("decode", lambda: SampleJSONDecoder().decode(encoded), lambda: FastSampleJSONDecoder().decode(encoded))
+    ]
+    return [(name, min(timeit.repeat(operation, number=1, repeat=repeats)),
+             min(timeit.repeat(fast_operation, number=1, repeat=repeats)))
+            for name, operation, fast_operation in operations]
+
+
+def main():
+    """
+    Runs the benchmark and prints the results.
+    """
+    parser = argparse.ArgumentParser(description="Compares the fast JSON encoder/decoder with that built with hgijson")
+    parser.add_argument("--models", type=int, default=100000, help="number of samples to encode and decode")
+    parser.add_argument("--repeats", type=int, default=3, help="number of times to time each operation")
+    arguments = parser.parse_args()
+
+    print("%-8s %12s %12s %9s" % ("", "hgijson (s)", "fast (s)", "speedup"))
+    for name, time, fast_time in benchmark_json(arguments.models, arguments.repeats):
+        print("%-8s %12.4f %12.4f %8.1fx" % (name, time, fast_time, time / fast_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compares the time taken to get samples by name, accession number and internal ID from the stub database with getting
+them from a lookup index of the same samples.
+
+Run with: `python -m sequencescape.tests.benchmarks.benchmark_lookup_index [--rows ROWS] [--lookups LOOKUPS]
+[--repeats REPEATS]`
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import timeit
+from typing import List, Tuple
+
+from sequencescape._sqlalchemy.database_connector import SQLAlchemyDatabaseConnector
+from sequencescape._sqlalchemy.mappers import SQLAlchemySampleMapper
+from sequencescape.lookup_index import IndexedSampleMapper
+from sequencescape.tests.benchmarks.benchmark_suite import generate_samples
+from sequencescape.tests.sqlalchemy.stub_database import create_stub_database
+
+
+def benchmark_lookup_index(number_of_rows: int, number_of_lookups: int, repeats: int) \
+        -> Tuple[int, float, List[Tuple[str, float, float]]]:
+    """
+    Times lookups of random samples, one at a time, in a stub database containing the given number of samples and in a
+    lookup index of them.
+    :param number_of_rows: the number of samples to put in the stub database
+    :param number_of_lookups: the number of samples to get in each timed run
+    :param repeats: the number of times to time the lookups
+    :return: tuple containing the size of the index file (in bytes), the time taken to build it (in seconds) and tuples
+    containing the name of each lookup, the best time from the database and the best time from the index (in seconds)
+    """
+    database_location, dialect = create_stub_database()
+    mapper = SQLAlchemySampleMapper(SQLAlchemyDatabaseConnector("%s:///%s" % (dialect, database_location)))
+    samples = list(generate_samples(0, number_of_rows))
+    mapper.add(samples)
+    chosen = random.Random(0).sample(samples, min(number_of_lookups, number_of_rows))
+
+    directory = tempfile.mkdtemp()
+    try:
+        index_location = os.path.join(directory, "samples.index")
+        build_time = timeit.timeit(lambda: IndexedSampleMapper(mapper, index_location).index.close(), number=1)
+        indexed_mapper = IndexedSampleMapper(mapper, index_location)
+        lookups = [
+            ("name", lambda used_mapper: [used_mapper.get_by_name(sample.name) for sample in chosen]),
+            ("accession number",
+             lambda used_mapper: [used_mapper.get_by_accession_number(sample.accession_number) for sample in chosen]),
+            ("internal ID", lambda used_mapper: [used_mapper.get_by_id(sample.internal_id) for sample in chosen])
+        ]
+        results = []
+        for name, lookup in lookups:
+            assert lookup(mapper) == lookup(indexed_mapper)
+            database_time = min(timeit.repeat(lambda: lookup(mapper), number=1, repeat=repeats))
+            index_time = min(timeit.repeat(lambda: lookup(indexed_mapper), number=1, repeat=repeats))
+            results.append((name, database_time, index_time))
+        size = os.path.getsize(index_location)
+        indexed_mapper.index.close()
+    finally:
+        shutil.rmtree(directory)
+    return size, build_time, results
+
+
+def main():
+    """
+    Runs the benchmark and prints the results.
+    """
+    parser = argparse.ArgumentParser(description="Compares lookups in the database with lookups in a lookup index")
+    parser.add_argument("--rows", type=int, default=20000, help="number of samples to put in the stub database")
+    parser.add_argument("--lookups", type=int, default=1000, help="number of samples to get in each timed run")
+    parser.add_argument("--repeats", type=int, default=3, help="number of times to time the lookups")
+    arguments = parser.parse_args()
+
+    size, build_time, results = benchmark_lookup_index(arguments.rows, arguments.lookups, arguments.repeats)
+    print("Index of %d samples: %.2f MB, built in %.2fs" % (arguments.rows, size / 2 ** 20, build_time))
+    print("%-18s %13s %10s %8s" % ("lookup", "database (s)", "index (s)", "speedup"))
+    for name, database_time, index_time in results:
+        print("%-18s %13.4f %10.4f %7.1fx" % (name, database_time, index_time, database_time / index_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Compares the memory used by, and the time taken to create, samples with that of their compact equivalents.
+
+Run with: `python -m sequencescape.tests.benchmarks.benchmark_models [--models MODELS] [--repeats REPEATS]`
+"""
+import argparse
+import gc
+import timeit
+import tracemalloc
+from typing import Callable, List, Tuple, Sequence, Any
+
+from sequencescape._sqlalchemy._models import SQLAlchemySample
+from sequencescape._sqlalchemy.model_converters import get_popo_model_columns, convert_rows_to_popo_models, \
+    convert_rows_to_compact_models
+from sequencescape.compact_models import CompactSample
+from sequencescape.models import Sample
+from sequencescape.tests._helpers import create_stub_sample
+
+
+def create_rows(number_of_rows: int) -> List[Tuple[Any, ...]]:
+    """
+    Creates rows of the sample table, each with a unique internal ID and name.
+    :param number_of_rows: the number of rows to create
+    :return: the rows, containing the columns given by `get_popo_model_columns`
+    """
+    template = create_stub_sample()
+    rows = []
+    for i in range(number_of_rows):
+        values = vars(template).copy()
+        values.update(internal_id=i, name="sample_%d" % i)
+        rows.append(tuple(values[column.key] for column in get_popo_model_columns(SQLAlchemySample)))
+    return rows
+
+
+def measure_memory(create: Callable[[], Sequence[Any]]) -> int:
+    """
+    Measures the memory allocated by the given function that is still in use once it has returned.
+    :param create: function that creates the objects to measure the memory of
+    :return: the number of bytes
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        created = create()
+        memory, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del created
+    return memory
+
+
+def benchmark_models(number_of_models: int, repeats: int) -> List[Tuple[str, float, float, int, int]]:
+    """
+    Times the creation of, and measures the memory used by, the given number of samples and compact samples.
+    :param number_of_models: the number of models to create
+    :param repeats: the number of times to time the creation of the models
+    :return: tuples containing the name of the way the models were created, the best time for samples and compact
+    samples (in seconds) and the memory used by the samples and compact samples (in bytes)
+    """
+    rows = create_rows(number_of_models)
+    column_names = [column.key for column in get_popo_model_columns(SQLAlchemySample)]
+    keyword_arguments = [dict(zip(column_names, row)) for row in rows]
+
+    creations = [
+        ("constructor", lambda model_type: [model_type(**kwargs) for kwargs in keyword_arguments]),
+        ("from_rows", lambda model_type: (convert_rows_to_compact_models if model_type is CompactSample
+                                          else convert_rows_to_popo_models)(SQLAlchemySample, rows))
+    ]   # type: List[Tuple[str, Callable[[type], Sequence[Any]]]]
+
+    results = []
+    for name, create in creations:
+        assert create(Sample) == create(CompactSample)
+        times = [min(timeit.repeat(lambda: create(model_type), number=1, repeat=repeats))
+                 for model_type in (Sample, CompactSample)]
+        memory = [measure_memory(lambda: create(model_type)) for model_type in (Sample, CompactSample)]
+        results.append((name, times[0], times[1], memory[0], memory[1]))
+    return results
+
+
+def main():
+    """
+    Runs the benchmark and prints the results.
+    """
+    parser = argparse.ArgumentParser(description="Compares samples with compact samples")
+    parser.add_argument("--models", type=int, default=100000, help="number of models to create")
+    parser.add_argument("--repeats", type=int, default=5, help="number of times to time the creation of the models")
+    arguments = parser.parse_args()
+
+    print("%-12s %12s %12s %9s %14s %14s %9s" % (
+        "creation", "model (s)", "compact (s)", "speedup", "model (MB)", "compact (MB)", "saving"))
+    for name, model_time, compact_time, model_memory, compact_memory in benchmark_models(
+            arguments.models, arguments.repeats):
+        print("%-12s %12.4f %12.4f %8.1fx %14.1f %14.1f %8.1fx" % (
+            name, model_time, compact_time, model_time / compact_time, model_memory / 2 ** 20,
+            compact_memory / 2 ** 20, model_memory / compact_memory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares the speed of reading models through the ORM with reading them with SQLAlchemy Core, using the stub database.
+
+Run with: `python -m sequencescape.tests.benchmarks.benchmark_reads [--rows ROWS] [--repeats REPEATS]`
+"""
+import argparse
+import timeit
+from typing import Callable, List, Tuple
+
+from sequencescape._sqlalchemy.database_connector import SQLAlchemyDatabaseConnector
+from sequencescape._sqlalchemy.mappers import SQLAlchemySampleMapper
+from sequencescape.tests._helpers import create_stub_samples
+from sequencescape.tests.sqlalchemy.stub_database import create_stub_database
+
+
+def benchmark_reads(number_of_rows: int, repeats: int) -> List[Tuple[str, float, float]]:
+    """
+    Times reads of samples from a stub database containing the given number of samples, with each read mode.
+    :param number_of_rows: the number of samples to put in the stub database
+    :param repeats: the number of times to time each read
+    :return: tuples containing the name of the read, the best time through the ORM and the best time with Core (in
+    seconds)
+    """
+    database_location, dialect = create_stub_database()
+    connector = SQLAlchemyDatabaseConnector("%s:///%s" % (dialect, database_location))
+    samples = create_stub_samples(number_of_rows)
+    orm_mapper = SQLAlchemySampleMapper(connector)
+    core_mapper = SQLAlchemySampleMapper(connector, core_reads=True)
+    orm_mapper.bulk_add(samples)
+    names = [sample.name for sample in samples]
+
+    reads = [
+        ("get_all", lambda mapper: mapper.get_all()),
+        ("iter_all", lambda mapper: sum(1 for _ in mapper.iter_all())),
+        ("get_by_name", lambda mapper: mapper.get_by_name(names))
+    ]   # type: List[Tuple[str, Callable[[SQLAlchemySampleMapper], object]]]
+
+    results = []
+    for name, read in reads:
+        assert read(orm_mapper) == read(core_mapper)
+        orm_time = min(timeit.repeat(lambda: read(orm_mapper), number=1, repeat=repeats))
+        core_time = min(timeit.repeat(lambda: read(core_mapper), number=1, repeat=repeats))
+        results.append((name, orm_time, core_time))
+    return results
+
+
+def main():
+    """
+    Runs the benchmark and prints the results.
+    """
+    parser = argparse.ArgumentParser(description="Compares reads through the ORM with reads with SQLAlchemy Core")
+    parser.add_argument("--rows", type=int, default=10000, help="number of samples in the stub database")
+    parser.add_argument("--repeats", type=int, default=5, help="number of times to time each read")
+    arguments = parser.parse_args()
+
+    print("%-12s %12s %12s %9s" % ("read", "orm (s)", "core (s)", "speedup"))
+    for name, orm_time, core_time in benchmark_reads(arguments.rows, arguments.repeats):
+        print("%-12s %12.4f %12.4f %8.1fx" % (name, orm_time, core_time, orm_time / core_time))
+
+
+if __name__ == "__main__":
+    main()
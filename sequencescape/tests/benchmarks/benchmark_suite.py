@@ -0,0 +1,277 @@
+"""
+Times the main operations of the mappers and the JSON encoders/decoders against a stub database filled with a
+configurable volume of data, writing the results as JSON so that runs can be compared.
+
+Run with: `python -m sequencescape.tests.benchmarks.benchmark_suite [--samples SAMPLES] [--studies STUDIES]
+[--links LINKS] [--lookup-size LOOKUP_SIZE] [--add-size ADD_SIZE] [--repeats REPEATS] [--core-reads]
+[--compact-models] [--max-parallel-queries MAX_PARALLEL_QUERIES] [--output OUTPUT]`
+
+e.g. at the scale of a production database: `--samples 1000000 --studies 50000 --links 5000000`.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Any, Tuple
+
+import sqlalchemy
+
+from sequencescape._sqlalchemy._models import study_sample_join_table
+from sequencescape._sqlalchemy.database_connector import SQLAlchemyDatabaseConnector
+from sequencescape._sqlalchemy.mappers import SQLAlchemySampleMapper, SQLAlchemyStudyMapper
+from sequencescape.json_converters import SampleJSONEncoder, SampleJSONDecoder, StudyJSONEncoder, StudyJSONDecoder, \
+    FastSampleJSONEncoder, FastSampleJSONDecoder, FastStudyJSONEncoder, FastStudyJSONDecoder
+from sequencescape.models import Sample, Study
+from sequencescape.tests._helpers import create_stub_sample, create_stub_study
+from sequencescape.tests.sqlalchemy.stub_database import create_stub_database
+
+# Number of rows inserted at a time when filling the stub database
+_INSERT_BATCH_SIZE = 10000
+
+# Seed of the random choice of the values that are looked up, so that runs look up the same values
+_LOOKUP_SEED = 1
+
+
+def generate_samples(first_internal_id: int, number_of_samples: int) -> Iterator[Sample]:
+    """
+    Generates samples with consecutive internal IDs, each with a unique name and accession number.
+    :param first_internal_id: the internal ID of the first sample
+    :param number_of_samples: the number of samples to generate
+    :return: iterator of the samples
+    """
+    for internal_id in range(first_internal_id, first_internal_id + number_of_samples):
+        sample = create_stub_sample()
+        sample.internal_id = internal_id
+        sample.name = "sample_%d" % internal_id
+        sample.accession_number = "sample_accession_%d" % internal_id
+        yield sample
+
+
+def generate_studies(number_of_studies: int) -> Iterator[Study]:
+    """
+    Generates studies with consecutive internal IDs (from 0), each with a unique name and accession number.
+    :param number_of_studies: the number of studies to generate
+    :return: iterator of the studies
+    """
+    for internal_id in range(number_of_studies):
+        study = create_stub_study()
+        study.internal_id = internal_id
+        study.name = "study_%d" % internal_id
+        study.accession_number = "study_accession_%d" % internal_id
+        yield study
+
+
+def generate_links(number_of_samples: int, number_of_studies: int, number_of_links: int) -> Iterator[Dict[str, int]]:
+    """
+    Generates unique links between studies and samples, spread evenly over the studies.
+    :param number_of_samples: the number of samples, whose internal IDs are from 0
+    :param number_of_studies: the number of studies, whose internal IDs are from 0
+    :param number_of_links: the number of links to generate
+    :return: iterator of rows of the study-sample join table
+    """
+    study_id_column = study_sample_join_table.c.study_internal_id.key
+    sample_id_column = study_sample_join_table.c.sample_internal_id.key
+    for i in range(number_of_links):
+        study_internal_id = i % number_of_studies
+        # Each study is linked to a run of consecutive samples, starting from a different sample for each study
+        sample_internal_id = (study_internal_id * 7919 + i // number_of_studies) % number_of_samples
+        yield {study_id_column: study_internal_id, sample_id_column: sample_internal_id}
+
+
+def _in_batches(items: Iterator[Any], batch_size: int) -> Iterator[List[Any]]:
+    """
+    Groups the given items into lists of (at most) the given size.
+    :param items: the items to group
+    :param batch_size: the maximum number of items in a list
+    :return: iterator of the lists of items
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if len(batch) > 0:
+        yield batch
+
+
+def populate_database(connector: SQLAlchemyDatabaseConnector, number_of_samples: int, number_of_studies: int,
+                      number_of_links: int):
+    """
+    Fills the stub database with the given number of samples, studies and links between them.
+    :param connector: connector to the stub database
+    :param number_of_samples: the number of samples to add
+    :param number_of_studies: the number of studies to add
+    :param number_of_links: the number of links between studies and samples to add, which must not be more than the
+    number of possible links
+    """
+    if number_of_links > number_of_samples * number_of_studies:
+        raise ValueError("Cannot link %d samples and %d studies %d times"
+                         % (number_of_samples, number_of_studies, number_of_links))
+    sample_mapper = SQLAlchemySampleMapper(connector)
+    study_mapper = SQLAlchemyStudyMapper(connector)
+    for batch in _in_batches(generate_samples(0, number_of_samples), _INSERT_BATCH_SIZE):
+        sample_mapper.bulk_add(batch)
+    for batch in _in_batches(generate_studies(number_of_studies), _INSERT_BATCH_SIZE):
+        study_mapper.bulk_add(batch)
+    for batch in _in_batches(generate_links(number_of_samples, number_of_studies, number_of_links),
+                             _INSERT_BATCH_SIZE):
+        with connector.session_scope() as session:
+            session.execute(study_sample_join_table.insert(), batch)
+
+
+def time_operation(operation: Callable[[], Any], repeats: int,
+                   connector: SQLAlchemyDatabaseConnector=None) -> Dict[str, Any]:
+    """
+    Times the given operation.
+    :param operation: the operation to time
+    :param repeats: the number of times to run the operation
+    :param connector: connector to the database that the operation uses, whose instrumentation is used to break down
+    the time of the operation. `None` if the operation does not use the database
+    :return: the timings, as a JSON serializable dictionary
+    """
+    times = []
+    statistics = None
+    for _ in range(repeats):
+        if connector is not None:
+            connector.instrumentation.reset()
+        started = time.perf_counter()
+        operation()
+        times.append(time.perf_counter() - started)
+        if connector is not None:
+            statistics = connector.instrumentation.get_statistics()
+
+    timings = {
+        "times": times,
+        "best": min(times),
+        "mean": sum(times) / len(times)
+    }
+    if statistics is not None:
+        # Breakdown of the last run
+        operation_statistics = statistics.operations.values()
+        timings["queries"] = statistics.queries
+        timings["database_time"] = statistics.database_time
+        timings["conversion_time"] = sum(x.conversion_time for x in operation_statistics)
+        timings["models_converted"] = sum(x.models_converted for x in operation_statistics)
+    return timings
+
+
+def run_benchmarks(number_of_samples: int, number_of_studies: int, number_of_links: int, lookup_size: int,
+                   add_size: int, repeats: int, **mapper_options) -> Dict[str, Any]:
+    """
+    Runs the benchmarks against a new stub database filled with the given volume of data.
+    :param number_of_samples: the number of samples in the stub database
+    :param number_of_studies: the number of studies in the stub database
+    :param number_of_links: the number of links between studies and samples in the stub database
+    :param lookup_size: the number of values to look up at once
+    :param add_size: the number of samples to add at once
+    :param repeats: the number of times to run each benchmark
+    :param mapper_options: options of the mappers, as defined in the constructor of `SQLAlchemyMapper`
+    :return: the parameters and results of the benchmarks, as a JSON serializable dictionary
+    """
+    database_location, dialect = create_stub_database()
+    connector = SQLAlchemyDatabaseConnector("%s:///%s" % (dialect, database_location))
+    started = time.perf_counter()
+    populate_database(connector, number_of_samples, number_of_studies, number_of_links)
+    populate_time = time.perf_counter() - started
+
+    sample_mapper = SQLAlchemySampleMapper(connector, **mapper_options)
+    study_mapper = SQLAlchemyStudyMapper(connector, **mapper_options)
+
+    randomiser = random.Random(_LOOKUP_SEED)
+    sample_ids = randomiser.sample(range(number_of_samples), min(lookup_size, number_of_samples))
+    sample_names = ["sample_%d" % internal_id for internal_id in sample_ids]
+    study_ids = randomiser.sample(range(number_of_studies), min(lookup_size, number_of_studies))
+    studies = study_mapper.get_by_id(study_ids)
+    samples = sample_mapper.get_by_id(sample_ids)
+
+    next_internal_id = [number_of_samples]
+
+    def add_samples():
+        sample_mapper.add(list(generate_samples(next_internal_id[0], add_size)))
+        next_internal_id[0] += add_size
+
+    encoded_samples = json.dumps(samples, cls=SampleJSONEncoder)
+    encoded_studies = json.dumps(studies, cls=StudyJSONEncoder)
+
+    database_benchmarks = [
+        ("sample.get_all", sample_mapper.get_all),
+        ("study.get_all", study_mapper.get_all),
+        ("sample.iter_all", lambda: sum(1 for _ in sample_mapper.iter_all())),
+        ("sample.get_by_name", lambda: sample_mapper.get_by_name(sample_names)),
+        ("sample.get_by_id", lambda: sample_mapper.get_by_id(sample_ids)),
+        ("sample.get_associated_with_study", lambda: sample_mapper.get_associated_with_study(studies)),
+        ("study.get_associated_with_sample", lambda: study_mapper.get_associated_with_sample(samples)),
+        ("sample.add", add_samples)
+    ]   # type: List[Tuple[str, Callable[[], Any]]]
+    json_benchmarks = [
+        ("sample.json_encode", lambda: json.dumps(samples, cls=SampleJSONEncoder)),
+        ("sample.json_decode", lambda: SampleJSONDecoder().decode(encoded_samples)),
+        ("study.json_encode", lambda: json.dumps(studies, cls=StudyJSONEncoder)),
+        ("study.json_decode", lambda: StudyJSONDecoder().decode(encoded_studies)),
+        ("sample.fast_json_encode", lambda: json.dumps(samples, cls=FastSampleJSONEncoder)),
+        ("sample.fast_json_decode", lambda: FastSampleJSONDecoder().decode(encoded_samples)),
+        ("study.fast_json_encode", lambda: json.dumps(studies, cls=FastStudyJSONEncoder)),
+        ("study.fast_json_decode", lambda: FastStudyJSONDecoder().decode(encoded_studies))
+    ]   # type: List[Tuple[str, Callable[[], Any]]]
+
+    results = {}
+    for name, operation in database_benchmarks:
+        results[name] = time_operation(operation, repeats, connector)
+    for name, operation in json_benchmarks:
+        results[name] = time_operation(operation, repeats)
+    connector.dispose()
+
+    return {
+        "parameters": {
+            "samples": number_of_samples,
+            "studies": number_of_studies,
+            "links": number_of_links,
+            "lookup_size": lookup_size,
+            "add_size": add_size,
+            "repeats": repeats,
+            "mapper_options": mapper_options
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform()
+        },
+        "populate_time": populate_time,
+        "results": results
+    }
+
+
+def main():
+    """
+    Runs the benchmarks and writes the results as JSON.
+    """
+    parser = argparse.ArgumentParser(description="Times mapper operations and JSON encoding against a stub database")
+    parser.add_argument("--samples", type=int, default=100000, help="number of samples in the stub database")
+    parser.add_argument("--studies", type=int, default=5000, help="number of studies in the stub database")
+    parser.add_argument("--links", type=int, default=500000, help="number of study-sample links in the stub database")
+    parser.add_argument("--lookup-size", type=int, default=10000, help="number of values to look up at once")
+    parser.add_argument("--add-size", type=int, default=1000, help="number of samples to add at once")
+    parser.add_argument("--repeats", type=int, default=3, help="number of times to run each benchmark")
+    parser.add_argument("--core-reads", action="store_true", help="read with SQLAlchemy Core instead of the ORM")
+    parser.add_argument("--compact-models", action="store_true", help="read compact models")
+    parser.add_argument("--max-parallel-queries", type=int, default=1, help="number of queries to run in parallel")
+    parser.add_argument("--output", default="-", help="file to write the results to (`-` for standard out)")
+    arguments = parser.parse_args()
+
+    results = run_benchmarks(arguments.samples, arguments.studies, arguments.links, arguments.lookup_size,
+                             arguments.add_size, arguments.repeats, core_reads=arguments.core_reads,
+                             compact_models=arguments.compact_models,
+                             max_parallel_queries=arguments.max_parallel_queries)
+    if arguments.output == "-":
+        json.dump(results, sys.stdout, indent=4, sort_keys=True)
+        print()
+    else:
+        with open(arguments.output, "w") as file:
+            json.dump(results, file, indent=4, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
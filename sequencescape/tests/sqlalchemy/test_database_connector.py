@@ -0,0 +1,109 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+
+from sequencescape._sqlalchemy.database_connector import SQLAlchemyDatabaseConnector, ConnectionPoolStatistics
+from sequencescape.tests.sqlalchemy.stub_database import create_stub_database
+
+
+class TestSQLAlchemyDatabaseConnector(unittest.TestCase):
+    """
+    Tests for `SQLAlchemyDatabaseConnector`.
+    """
+    def setUp(self):
+        database_location, dialect = create_stub_database()
+        self._database_url = "%s:///%s" % (dialect, database_location)
+        self._connector = SQLAlchemyDatabaseConnector(self._database_url)
+
+    def test_engine_is_reused(self):
+        self.assertIs(self._connector.engine, self._connector.engine)
+
+    def test_create_session_uses_same_engine(self):
+        session_1 = self._connector.create_session()
+        session_2 = self._connector.create_session()
+        self.assertIs(session_1.get_bind(), session_2.get_bind())
+        session_1.close()
+        session_2.close()
+
+    def test_session_scope_returns_connection_to_pool(self):
+        with self._connector.session_scope() as session:
+            session.execute(text("SELECT 1"))
+            self.assertEqual(self._connector.get_pool_statistics().checked_out, 1)
+        statistics = self._connector.get_pool_statistics()
+        self.assertEqual(statistics.checked_out, 0)
+        self.assertEqual(statistics.checkouts, 1)
+        self.assertEqual(statistics.checkins, 1)
+
+    def test_session_scope_rolls_back_on_error(self):
+        def use_session():
+            with self._connector.session_scope() as session:
+                session.execute(text("SELECT 1"))
+                raise RuntimeError()
+        self.assertRaises(RuntimeError, use_session)
+        self.assertEqual(self._connector.get_pool_statistics().checked_out, 0)
+
+    def test_session_scopes_within_shared_session_scope_use_shared_session(self):
+        with self._connector.shared_session_scope() as shared_session:
+            self.assertTrue(self._connector.in_shared_session_scope())
+            with self._connector.session_scope() as session:
+                self.assertIs(session, shared_session)
+            with self._connector.shared_session_scope() as session:
+                self.assertIs(session, shared_session)
+            self.assertTrue(self._connector.in_shared_session_scope())
+        self.assertFalse(self._connector.in_shared_session_scope())
+        self.assertEqual(self._connector.get_pool_statistics().checked_out, 0)
+
+    def test_shared_session_scope_rolls_back_on_error(self):
+        def use_session():
+            with self._connector.shared_session_scope():
+                with self._connector.session_scope() as session:
+                    session.execute(text("INSERT INTO current_wells (internal_id, name) VALUES (1, 'well')"))
+                raise RuntimeError()
+        self.assertRaises(RuntimeError, use_session)
+        self.assertFalse(self._connector.in_shared_session_scope())
+        with self._connector.session_scope() as session:
+            self.assertEqual(session.execute(text("SELECT COUNT(*) FROM current_wells")).scalar(), 0)
+
+    def test_shared_session_scope_not_shared_with_other_threads(self):
+        with self._connector.shared_session_scope():
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                self.assertFalse(executor.submit(self._connector.in_shared_session_scope).result())
+
+    def test_get_pool_statistics_before_use(self):
+        self.assertEqual(self._connector.get_pool_statistics(), ConnectionPoolStatistics())
+
+    def test_pool_settings_used(self):
+        connector = SQLAlchemyDatabaseConnector(self._database_url, pool_size=3, max_overflow=2, pool_recycle=60)
+        self.assertIsInstance(connector.engine.pool, QueuePool)
+        with connector.session_scope() as session:
+            session.execute(text("SELECT 1"))
+        statistics = connector.get_pool_statistics()
+        self.assertEqual(statistics.pool_size, 3)
+        self.assertEqual(statistics.idle, 1)
+        self.assertEqual(statistics.overflow, 0)
+        self.assertEqual(statistics.connections_created, 1)
+
+    def test_connections_reused_from_pool(self):
+        connector = SQLAlchemyDatabaseConnector(self._database_url, pool_size=1, pool_pre_ping=True)
+        for _ in range(5):
+            with connector.session_scope() as session:
+                session.execute(text("SELECT 1"))
+        statistics = connector.get_pool_statistics()
+        self.assertEqual(statistics.connections_created, 1)
+        self.assertEqual(statistics.checkouts, 5)
+        self.assertEqual(statistics.disconnects_detected, 0)
+
+    def test_dispose(self):
+        connector = SQLAlchemyDatabaseConnector(self._database_url, pool_size=1)
+        with connector.session_scope() as session:
+            session.execute(text("SELECT 1"))
+        connector.dispose()
+        with connector.session_scope() as session:
+            session.execute(text("SELECT 1"))
+        self.assertEqual(connector.get_pool_statistics().connections_created, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,265 @@
+import unittest
+from typing import List
+
+from sqlalchemy import text
+
+from sequencescape._sqlalchemy.database_connector import SQLAlchemyDatabaseConnector
+from sequencescape._sqlalchemy.instrumentation import Instrumentation, OperationRecord, LATENCY_HISTOGRAM_BUCKETS, \
+    slow_query_logger
+from sequencescape._sqlalchemy.mappers import SQLAlchemySampleMapper, SQLAlchemyStudyMapper
+from sequencescape.models import Sample, Study
+from sequencescape.tests._helpers import create_stub, assign_unique_ids
+from sequencescape.tests.sqlalchemy.stub_database import create_stub_database
+
+
+class _StubTimer:
+    """
+    Timer whose time only changes when it is told to.
+    """
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self) -> float:
+        return self.time
+
+
+class TestInstrumentation(unittest.TestCase):
+    """
+    Tests for `Instrumentation`.
+    """
+    def setUp(self):
+        self._timer = _StubTimer()
+        self._instrumentation = Instrumentation(timer=self._timer)
+
+    def test_operation_is_recorded(self):
+        with self._instrumentation.operation("Sample.get_all") as record:
+            self.assertIs(self._instrumentation.current_record(), record)
+            self._timer.time = 0.02
+        self.assertIsNone(self._instrumentation.current_record())
+        self.assertEqual(record.duration, 0.02)
+
+        statistics = self._instrumentation.get_statistics().operations["Sample.get_all"]
+        self.assertEqual(statistics.calls, 1)
+        self.assertEqual(statistics.total_time, 0.02)
+        self.assertEqual(statistics.max_time, 0.02)
+        self.assertEqual(statistics.latency_histogram[0.025], 1)
+        self.assertEqual(sum(statistics.latency_histogram.values()), 1)
+
+    def test_nested_operation_is_recorded_as_part_of_outer_operation(self):
+        with self._instrumentation.operation("Sample.add") as outer_record:
+            with self._instrumentation.operation("Sample.bulk_add") as inner_record:
+                self.assertIs(inner_record, outer_record)
+        self.assertEqual(list(self._instrumentation.get_statistics().operations.keys()), ["Sample.add"])
+
+    def test_operation_is_recorded_if_it_fails(self):
+        def fail():
+            with self._instrumentation.operation("Sample.get_all"):
+                raise RuntimeError()
+        self.assertRaises(RuntimeError, fail)
+        self.assertEqual(self._instrumentation.get_statistics().operations["Sample.get_all"].calls, 1)
+
+    def test_record_conversion(self):
+        with self._instrumentation.operation("Sample.get_all") as record:
+            self._instrumentation.record_conversion(10, 10, 0.5)
+            self._instrumentation.record_conversion(5, 4, 0.25)
+        self.assertEqual(record.rows_returned, 15)
+        self.assertEqual(record.models_converted, 14)
+        self.assertEqual(record.conversion_time, 0.75)
+
+    def test_record_conversion_outside_of_operation(self):
+        self._instrumentation.record_conversion(10, 10, 0.5)
+        self.assertEqual(self._instrumentation.get_statistics().operations, {})
+
+    def test_hooks_are_called_with_finished_operations(self):
+        records = []    # type: List[OperationRecord]
+        self._instrumentation.add_hook(records.append)
+        with self._instrumentation.operation("Sample.get_all") as record:
+            pass
+        self.assertEqual(records, [record])
+        self._instrumentation.remove_hook(records.append)
+        with self._instrumentation.operation("Sample.get_all"):
+            pass
+        self.assertEqual(len(records), 1)
+
+    def test_failing_hook_does_not_fail_operation(self):
+        def fail(record: OperationRecord):
+            raise RuntimeError()
+        self._instrumentation.add_hook(fail)
+        with self.assertLogs(level="ERROR"):
+            with self._instrumentation.operation("Sample.get_all"):
+                pass
+        self.assertEqual(self._instrumentation.get_statistics().operations["Sample.get_all"].calls, 1)
+
+    def test_get_statistics_returns_snapshot(self):
+        with self._instrumentation.operation("Sample.get_all"):
+            pass
+        statistics = self._instrumentation.get_statistics()
+        with self._instrumentation.operation("Sample.get_all"):
+            pass
+        self.assertEqual(statistics.operations["Sample.get_all"].calls, 1)
+        self.assertEqual(sum(statistics.operations["Sample.get_all"].latency_histogram.values()), 1)
+
+    def test_reset(self):
+        with self._instrumentation.operation("Sample.get_all"):
+            pass
+        self._instrumentation.reset()
+        statistics = self._instrumentation.get_statistics()
+        self.assertEqual(statistics.operations, {})
+        self.assertEqual(statistics.queries, 0)
+
+    def test_slowest_operations_go_in_last_bucket(self):
+        with self._instrumentation.operation("Sample.get_all"):
+            self._timer.time = LATENCY_HISTOGRAM_BUCKETS[-2] + 1
+        histogram = self._instrumentation.get_statistics().operations["Sample.get_all"].latency_histogram
+        self.assertEqual(histogram[LATENCY_HISTOGRAM_BUCKETS[-1]], 1)
+
+
+class TestInstrumentationOfQueries(unittest.TestCase):
+    """
+    Tests for the instrumentation of queries made through a `SQLAlchemyDatabaseConnector`.
+    """
+    def setUp(self):
+        database_location, dialect = create_stub_database()
+        self._connector = SQLAlchemyDatabaseConnector("%s:///%s" % (dialect, database_location),
+                                                      slow_query_threshold=0.0)
+        self._instrumentation = self._connector.instrumentation
+
+    def test_queries_are_counted(self):
+        with self._connector.session_scope() as session:
+            session.execute(text("SELECT 1"))
+            session.execute(text("SELECT 2"))
+        statistics = self._instrumentation.get_statistics()
+        self.assertEqual(statistics.queries, 2)
+        self.assertGreaterEqual(statistics.database_time, 0.0)
+
+    def test_queries_are_attributed_to_active_operation(self):
+        with self._instrumentation.operation("Sample.get_all") as record:
+            with self._connector.session_scope() as session:
+                session.execute(text("SELECT 1"))
+        self.assertEqual(record.queries, 1)
+        self.assertEqual(self._instrumentation.get_statistics().operations["Sample.get_all"].queries, 1)
+
+    def test_slow_queries_are_logged(self):
+        with self.assertLogs(slow_query_logger, level="WARNING") as logs:
+            with self._instrumentation.operation("Sample.get_all"):
+                with self._connector.session_scope() as session:
+                    session.execute(text("SELECT 1"))
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("Sample.get_all", logs.output[0])
+        self.assertIn("SELECT 1", logs.output[0])
+        self.assertEqual(self._instrumentation.get_statistics().slow_queries, 1)
+
+    def test_slow_queries_are_logged_without_parameter_values(self):
+        with self.assertLogs(slow_query_logger, level="WARNING") as logs:
+            with self._connector.session_scope() as session:
+                session.execute(text("SELECT :value"), {"value": "parameter_value"})
+        self.assertNotIn("parameter_value", logs.output[0])
+        self.assertIn("parameters: 1", logs.output[0])
+
+    def test_failed_queries_are_counted(self):
+        with self.assertLogs(slow_query_logger, level="WARNING") as logs:
+            with self._instrumentation.operation("Sample.get_all") as record:
+                for _ in range(3):
+                    with self.assertRaises(Exception):
+                        with self._connector.session_scope() as session:
+                            session.execute(text("SELECT * FROM missing_table"))
+        self.assertIn("Failed query", logs.output[0])
+        self.assertEqual(record.queries, 3)
+        statistics = self._instrumentation.get_statistics()
+        self.assertEqual(statistics.queries, 3)
+        self.assertEqual(statistics.failed_queries, 3)
+
+        with self._connector.session_scope() as session:
+            session.execute(text("SELECT 1"))
+        self.assertEqual(self._instrumentation.get_statistics().queries, 4)
+
+
+class TestInstrumentationOfMappers(unittest.TestCase):
+    """
+    Tests for the instrumentation of the operations of `SQLAlchemyMapper`s.
+    """
+    def setUp(self):
+        database_location, dialect = create_stub_database()
+        self._connector = SQLAlchemyDatabaseConnector("%s:///%s" % (dialect, database_location))
+        self._instrumentation = self._connector.instrumentation
+        self._mapper = SQLAlchemySampleMapper(self._connector, in_clause_chunk_size=2)
+        self._samples = assign_unique_ids([create_stub(Sample) for _ in range(5)])
+        for i in range(len(self._samples)):
+            self._samples[i].name = "sample_%d" % i
+        self._mapper.add(self._samples)
+        self._instrumentation.reset()
+
+    def test_add_is_recorded_as_one_operation(self):
+        self._mapper.add(create_stub(Sample))
+        operations = self._instrumentation.get_statistics().operations
+        self.assertEqual(list(operations.keys()), ["Sample.add"])
+        self.assertEqual(operations["Sample.add"].calls, 1)
+        self.assertGreaterEqual(operations["Sample.add"].queries, 1)
+
+    def test_get_all(self):
+        self._mapper.get_all()
+        statistics = self._instrumentation.get_statistics().operations["Sample.get_all"]
+        self.assertEqual(statistics.calls, 1)
+        self.assertEqual(statistics.queries, 1)
+        self.assertEqual(statistics.rows_returned, len(self._samples))
+        self.assertEqual(statistics.models_converted, len(self._samples))
+
+    def test_get_by_name_records_queries_for_each_chunk(self):
+        self._mapper.get_by_name([sample.name for sample in self._samples])
+        statistics = self._instrumentation.get_statistics().operations["Sample.get_by_name"]
+        self.assertEqual(statistics.calls, 1)
+        self.assertEqual(statistics.queries, 3)
+        self.assertEqual(statistics.models_converted, len(self._samples))
+
+    def test_get_by_property_values(self):
+        self._mapper.get_by_property_value([("name", self._samples[0].name), ("internal_id", 1)])
+        statistics = self._instrumentation.get_statistics().operations["Sample.get_by_property_values"]
+        self.assertEqual(statistics.calls, 1)
+        self.assertEqual(statistics.models_converted, 2)
+
+    def test_parallel_queries_are_attributed_to_operation(self):
+        mapper = SQLAlchemySampleMapper(self._connector, in_clause_chunk_size=2, max_parallel_queries=2)
+        mapper.get_by_id([sample.internal_id for sample in self._samples])
+        statistics = self._instrumentation.get_statistics().operations["Sample.get_by_internal_id"]
+        self.assertEqual(statistics.queries, 3)
+        self.assertEqual(statistics.models_converted, len(self._samples))
+
+    def test_iter_all_is_recorded_when_exhausted(self):
+        iterator = self._mapper.iter_all(batch_size=2)
+        next(iterator)
+        self.assertEqual(self._instrumentation.get_statistics().operations, {})
+        self.assertEqual(len(list(iterator)), len(self._samples) - 1)
+        statistics = self._instrumentation.get_statistics().operations["Sample.iter_all"]
+        self.assertEqual(statistics.calls, 1)
+        self.assertEqual(statistics.models_converted, len(self._samples))
+
+    def test_iter_all_is_recorded_when_closed(self):
+        iterator = self._mapper.iter_all(batch_size=2)
+        next(iterator)
+        iterator.close()
+        statistics = self._instrumentation.get_statistics().operations["Sample.iter_all"]
+        self.assertEqual(statistics.calls, 1)
+        self.assertEqual(statistics.models_converted, 2)
+        self.assertEqual(self._connector.get_pool_statistics().checked_out, 0)
+
+    def test_associations(self):
+        study = create_stub(Study)
+        SQLAlchemyStudyMapper(self._connector).add(study)
+        self._mapper.set_association_with_study(self._samples, study)
+        self._mapper.get_associated_with_study(study)
+        operations = self._instrumentation.get_statistics().operations
+        self.assertEqual(operations["Sample.set_association_with_study"].calls, 1)
+        self.assertEqual(operations["Sample.get_associated_with_study"].models_converted, len(self._samples))
+        self.assertNotIn("Sample.get_by_internal_id", operations)
+
+    def test_hook_is_given_record_of_each_operation(self):
+        records = []    # type: List[OperationRecord]
+        self._instrumentation.add_hook(records.append)
+        self._mapper.get_by_name(self._samples[0].name)
+        self._mapper.get_all()
+        self.assertEqual([record.operation for record in records], ["Sample.get_by_name", "Sample.get_all"])
+        self.assertEqual(records[0].rows_returned, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
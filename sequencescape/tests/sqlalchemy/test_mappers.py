@@ -1,13 +1,21 @@
+import copy
 import unittest
 from abc import abstractmethod, ABCMeta
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from sequencescape._sqlalchemy._models import SQLAlchemyStudy
 from sequencescape._sqlalchemy.database_connector import SQLAlchemyDatabaseConnector
 from sequencescape._sqlalchemy.mappers import SQLAlchemyMapper, SQLAlchemySampleMapper, SQLAlchemyStudyMapper, \
-    SQLAlchemyLibraryMapper, SQLAlchemyWellMapper, SQLAlchemyMultiplexedLibraryMapper
+    SQLAlchemyLibraryMapper, SQLAlchemyWellMapper, SQLAlchemyMultiplexedLibraryMapper, _partition_range
+from sequencescape.compact_models import CompactSample, to_compact_model
 from sequencescape.enums import Property
 from sequencescape.mappers import Mapper
 from sequencescape.models import InternalIdModel, Sample, Study
+from sequencescape.tests._mocks import MockInternalIdModel
 from sequencescape.tests._helpers import create_stub_sample, assign_unique_ids, create_stub_study, create_stub_library, \
     create_stub_multiplexed_library, create_stub_well
 from sequencescape.tests.sqlalchemy.stub_database import create_stub_database
@@ -44,9 +52,11 @@ class _SQLAlchemyMapperTest(unittest.TestCase, metaclass=ABCMeta):
         """
 
     @abstractmethod
-    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector) -> SQLAlchemyMapper:
+    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector, **kwargs) -> SQLAlchemyMapper:
         """
         Creates the mapper that is to be tested.
+        :param connector: the connector to the test database
+        :param kwargs: options to give to the constructor of the mapper
         :return: mapper to be tested
         """
 
@@ -81,6 +91,143 @@ class _SQLAlchemyMapperTest(unittest.TestCase, metaclass=ABCMeta):
         retrieved_models = self._mapper.get_all()
         self.assertCountEqual(retrieved_models, models)
 
+    def test_add_with_model_of_wrong_type(self):
+        self.assertRaises(ValueError, self._mapper.add, MockInternalIdModel(internal_id=1))
+
+    def test_bulk_add_in_batches(self):
+        models = self._create_models(5)
+        rows_inserted = self._mapper.bulk_add(models, batch_size=2)
+        self.assertEqual(rows_inserted, 5)
+        self.assertCountEqual(self._mapper.get_all(), models)
+
+    def test_bulk_add_with_duplicates(self):
+        models = self._create_models(5)
+        self._mapper.add(models[:2])
+        self.assertRaises(IntegrityError, self._mapper.bulk_add, models)
+        self.assertCountEqual(self._mapper.get_all(), models[:2])
+
+    def test_bulk_add_ignoring_duplicates(self):
+        models = self._create_models(5)
+        self._mapper.add(models[:2])
+        rows_inserted = self._mapper.bulk_add(models, batch_size=2, ignore_duplicates=True)
+        self.assertEqual(rows_inserted, 3)
+        self.assertCountEqual(self._mapper.get_all(), models)
+
+    def test_bulk_add_without_internal_ids(self):
+        models = self._create_models(2)
+        for model in models:
+            model.internal_id = None
+        self._mapper.bulk_add(models)
+        self.assertCountEqual([model.internal_id for model in self._mapper.get_all()], [1, 2])
+
+    def test_iter_all_with_no_models(self):
+        self.assertEqual(list(self._mapper.iter_all()), [])
+
+    def test_iter_all_in_batches(self):
+        models = self._create_models(5)
+        self._mapper.add(models)
+
+        retrieved_models = list(self._mapper.iter_all(batch_size=2))
+        self.assertCountEqual(retrieved_models, models)
+
+    def test_iter_all_releases_connection_when_closed(self):
+        self._mapper.add(self._create_models(5))
+
+        iterator = self._mapper.iter_all(batch_size=2)
+        next(iterator)
+        self.assertEqual(self._connector.get_pool_statistics().checked_out, 1)
+        iterator.close()
+        self.assertEqual(self._connector.get_pool_statistics().checked_out, 0)
+
+    def test_get_all_columnar(self):
+        models = self._create_models(5)
+        self._mapper.add(models)
+
+        retrieved_models = self._mapper.get_all_columnar(batch_size=2)
+        self.assertEqual(len(retrieved_models), 5)
+        self.assertCountEqual(retrieved_models.to_models(), models)
+        self.assertCountEqual(retrieved_models.column("internal_id"), self._get_internal_ids(models))
+
+    def test_get_all_columnar_with_no_models(self):
+        retrieved_models = self._mapper.get_all_columnar()
+        self.assertEqual(len(retrieved_models), 0)
+        self.assertEqual(retrieved_models.to_models(), [])
+
+    def test_get_all_in_parallel_partitions(self):
+        models = self._create_models(20)
+        self._mapper.add(models)
+        mapper = self._create_mapper(self._connector, max_parallel_queries=3)
+
+        retrieved_models = mapper.get_all()
+        self.assertEqual(retrieved_models, sorted(models, key=lambda model: model.internal_id))
+
+    def test_close_shuts_down_parallel_query_threads(self):
+        models = self._create_models(20)
+        self._mapper.add(models)
+        mapper = self._create_mapper(self._connector, max_parallel_queries=3)
+        mapper.get_all()
+        executor = mapper._executor
+        mapper.close()
+        self.assertIsNone(mapper._executor)
+        self.assertFalse(any(thread.is_alive() for thread in executor._threads))
+        self.assertEqual(mapper.get_all(), sorted(models, key=lambda model: model.internal_id))
+        mapper.close()
+
+    def test_get_all_in_parallel_partitions_with_no_models(self):
+        mapper = self._create_mapper(self._connector, max_parallel_queries=3)
+        self.assertEqual(mapper.get_all(), [])
+
+    def test_iter_all_in_partitions_unordered(self):
+        models = self._create_models(20)
+        self._mapper.add(models)
+        mapper = self._create_mapper(self._connector, max_parallel_queries=3)
+
+        retrieved_models = list(mapper.iter_all_in_partitions(number_of_partitions=7, ordered=False))
+        self.assertCountEqual(retrieved_models, models)
+
+    def test_iter_all_in_partitions_closed_early(self):
+        models = self._create_models(20)
+        self._mapper.add(models)
+        mapper = self._create_mapper(self._connector, max_parallel_queries=2)
+        checkouts = self._connector.get_pool_statistics().checkouts
+
+        iterator = mapper.iter_all_in_partitions(number_of_partitions=20)
+        self.assertEqual(next(iterator), models[0])
+        iterator.close()
+        mapper.close()
+        statistics = self._connector.get_pool_statistics()
+        self.assertEqual(statistics.checked_out, 0)
+        self.assertLess(statistics.checkouts - checkouts, 1 + 20)
+
+    def test_iter_all_in_partitions_with_more_partitions_than_models(self):
+        models = self._create_models(3)
+        self._mapper.add(models)
+
+        retrieved_models = list(self._mapper.iter_all_in_partitions(number_of_partitions=100))
+        self.assertEqual(retrieved_models, sorted(models, key=lambda model: model.internal_id))
+
+    def test_iter_all_in_partitions_with_invalid_number_of_partitions(self):
+        self.assertRaises(ValueError, list, self._mapper.iter_all_in_partitions(number_of_partitions=0))
+
+    def test_iter_by_property_value(self):
+        models = self._create_models(5)
+        self._mapper.add(models)
+        mapper = self._create_mapper(self._connector, in_clause_chunk_size=2)
+
+        retrieved_models = list(mapper.iter_by_property_value(
+            Property.INTERNAL_ID, self._get_internal_ids(models[:3]), batch_size=1))
+        self.assertCountEqual(retrieved_models, models[:3])
+
+    def test_iter_by_property_value_with_many_properties(self):
+        models = self._create_models(5)
+        self._mapper.add(models)
+        mapper = self._create_mapper(self._connector, in_clause_chunk_size=2)
+
+        property_value_tuples = [(Property.INTERNAL_ID, self._get_internal_ids(models)),
+                                 (Property.NAME, models[0].name)]
+        retrieved_models = list(mapper.iter_by_property_value(property_value_tuples))
+        self.assertCountEqual(retrieved_models, models)
+
     def test__get_by_property_value_sequence_with_empty_list(self):
         models = self._create_models(5)
         models_to_retrieve = []
@@ -119,6 +266,77 @@ class _SQLAlchemyMapperTest(unittest.TestCase, metaclass=ABCMeta):
             Property.INTERNAL_ID, self._get_internal_ids(models_to_retrieve))
         self.assertCountEqual(retrieved_models, models_to_retrieve[:2])
 
+    def test__get_by_property_value_sequence_with_more_values_than_bind_parameter_limit(self):
+        models = self._create_models(5)
+        self._mapper.add(models)
+
+        retrieved_models = self._mapper._get_by_property_value_sequence(
+            Property.INTERNAL_ID, list(range(2000)))
+        self.assertCountEqual(retrieved_models, models)
+
+    def test__get_by_property_value_sequence_in_chunks(self):
+        models = self._create_models(5)
+        self._mapper.add(models)
+        mapper = self._create_mapper(self._connector, in_clause_chunk_size=2)
+
+        retrieved_models = mapper._get_by_property_value_sequence(
+            Property.INTERNAL_ID, self._get_internal_ids(models))
+        self.assertCountEqual(retrieved_models, models)
+
+    def test__get_by_property_value_sequence_in_parallel_chunks(self):
+        models = self._create_models(5)
+        self._mapper.add(models)
+        mapper = self._create_mapper(self._connector, in_clause_chunk_size=2, max_parallel_queries=3)
+
+        retrieved_models = mapper._get_by_property_value_sequence(
+            Property.INTERNAL_ID, self._get_internal_ids(models))
+        self.assertCountEqual(retrieved_models, models)
+
+    def test__get_by_property_value_sequence_with_duplicate_values(self):
+        models = self._create_models(5)
+        self._mapper.add(models)
+        mapper = self._create_mapper(self._connector, in_clause_chunk_size=1)
+
+        internal_ids = self._get_internal_ids(models)
+        retrieved_models = mapper._get_by_property_value_sequence(Property.INTERNAL_ID, internal_ids + internal_ids)
+        self.assertCountEqual(retrieved_models, models)
+
+    def test_constructor_with_invalid_chunk_size(self):
+        self.assertRaises(ValueError, type(self._mapper), self._connector, in_clause_chunk_size=0)
+
+    def test__get_by_property_value_tuple_with_many_properties(self):
+        models = self._create_models(5)
+        for i in range(len(models)):
+            models[i].name = "name_%d" % i
+        self._mapper.add(models)
+
+        property_value_tuples = [(Property.INTERNAL_ID, models[0].internal_id), (Property.NAME, models[1].name),
+                                 (Property.INTERNAL_ID, models[1].internal_id), (Property.NAME, "other")]
+        retrieved_models = self._mapper._get_by_property_value_tuple(property_value_tuples)
+        self.assertCountEqual(retrieved_models, models[:2])
+
+    def test__get_by_property_value_tuple_uses_single_query(self):
+        models = self._create_models(5)
+        self._mapper.add(models)
+        queries = []
+        event.listen(self._connector.engine, "before_cursor_execute", lambda *args: queries.append(args))
+
+        property_value_tuples = [(Property.INTERNAL_ID, model.internal_id) for model in models] \
+                                + [(Property.NAME, model.name) for model in models]
+        retrieved_models = self._mapper._get_by_property_value_tuple(property_value_tuples)
+        self.assertCountEqual(retrieved_models, models)
+        self.assertEqual(len(queries), 1)
+
+    def test__get_by_property_value_tuple_in_chunks(self):
+        models = self._create_models(5)
+        self._mapper.add(models)
+        mapper = self._create_mapper(self._connector, in_clause_chunk_size=1)
+
+        property_value_tuples = [(Property.INTERNAL_ID, self._get_internal_ids(models)),
+                                 (Property.NAME, models[0].name)]
+        retrieved_models = mapper._get_by_property_value_tuple(property_value_tuples)
+        self.assertCountEqual(retrieved_models, models)
+
     def test__get_by_property_value_sequence_returns_correct_type(self):
         models = self._create_models(5)
         self._mapper.add(models)
@@ -207,6 +425,107 @@ class _SQLAssociationMapperTest(_SQLAlchemyMapperTest):
         associated = self._mapper_get_associated_with_x(xs)
         self.assertCountEqual(associated, [model])
 
+    def test__set_association_with_x_with_many_to_many(self):
+        xs = [self._get_associated_with_instance(i) for i in range(3)]
+        self._associated_with_mapper.add(xs)
+        models = self._create_models(4)
+        self._mapper.add(models)
+
+        self._mapper_set_association_with_x(models, xs)
+        for x in xs:
+            self.assertCountEqual(self._mapper_get_associated_with_x(x), models)
+
+    def test__set_association_with_x_when_already_associated(self):
+        x = self._get_associated_with_instance()
+        self._associated_with_mapper.add(x)
+        models = self._create_models(3)
+        self._mapper.add(models)
+
+        self._mapper_set_association_with_x(models[:2], x)
+        self._mapper_set_association_with_x(models, x)
+        join_table = SQLAlchemyStudy.samples.property.secondary
+        with self._connector.session_scope() as session:
+            number_of_associations = session.query(join_table).count()
+        self.assertEqual(number_of_associations, 3)
+        self.assertCountEqual(self._mapper_get_associated_with_x(x), models)
+
+    def test__set_association_with_x_concurrently(self):
+        x = self._get_associated_with_instance()
+        self._associated_with_mapper.add(x)
+        models = self._create_models(20)
+        self._mapper.add(models)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: self._mapper_set_association_with_x(models, x), range(8)))
+        join_table = SQLAlchemyStudy.samples.property.secondary
+        with self._connector.session_scope() as session:
+            number_of_associations = session.query(join_table).count()
+        self.assertEqual(number_of_associations, len(models))
+
+    def test__set_association_with_x_with_non_existent_x(self):
+        models = self._create_models(1)
+        self._mapper.add(models)
+        self.assertRaises(ValueError, self._mapper_set_association_with_x, models, self._get_associated_with_instance())
+
+    def test__set_association_with_x_with_non_existent_model(self):
+        x = self._get_associated_with_instance()
+        self._associated_with_mapper.add(x)
+        self.assertRaises(ValueError, self._mapper_set_association_with_x, self._create_models(1), x)
+
+    def test__set_association_with_x_does_not_change_associated_models(self):
+        x = self._get_associated_with_instance()
+        self._associated_with_mapper.add(x)
+        model = self._create_model()
+        self._mapper.add(model)
+        model_copy = copy.copy(model)
+        model_copy.name = "other_name"
+
+        self._mapper_set_association_with_x(model_copy, x)
+        self.assertEqual(self._mapper.get_all(), [model])
+
+    def test__set_association_with_x_uses_constant_number_of_queries(self):
+        xs = [self._get_associated_with_instance(i) for i in range(5)]
+        self._associated_with_mapper.add(xs)
+        models = self._create_models(20)
+        self._mapper.add(models)
+        queries = []
+        event.listen(self._connector.engine, "before_cursor_execute", lambda *args: queries.append(args))
+
+        self._mapper_set_association_with_x(models, xs)
+        # Existence checks for both sides and insert of the associations that do not already exist
+        self.assertEqual(len(queries), 3)
+
+    def test__get_associated_with_x_with_partially_existent_list(self):
+        xs = [self._get_associated_with_instance(i) for i in range(2)]
+        self._associated_with_mapper.add(xs[0])
+        self.assertRaises(ValueError, self._mapper_get_associated_with_x, xs)
+
+    def test__get_associated_with_x_with_many_shared_associations_in_chunks(self):
+        xs = [self._get_associated_with_instance(i) for i in range(5)]
+        self._associated_with_mapper.add(xs)
+        models = self._create_models(3)
+        self._mapper.add(models)
+        for x in xs:
+            self._mapper_set_association_with_x(models, x)
+        mapper = self._create_mapper(self._connector, in_clause_chunk_size=2)
+        get_associated_with_x = getattr(mapper, "get_associated_with_%s" % self._associated_with_type.lower())
+
+        associated = get_associated_with_x(xs)
+        self.assertCountEqual(associated, models)
+
+    def test__get_associated_with_x_uses_constant_number_of_queries(self):
+        xs = [self._get_associated_with_instance(i) for i in range(10)]
+        self._associated_with_mapper.add(xs)
+        models = self._create_models(3)
+        self._mapper.add(models)
+        for x in xs:
+            self._mapper_set_association_with_x(models, x)
+        queries = []
+        event.listen(self._connector.engine, "before_cursor_execute", lambda *args: queries.append(args))
+
+        self._mapper_get_associated_with_x(xs)
+        self.assertEqual(len(queries), 2)
+
 
 class SQLAlchemySampleMapperTest(_SQLAssociationMapperTest):
     """
@@ -215,8 +534,8 @@ class SQLAlchemySampleMapperTest(_SQLAssociationMapperTest):
     def _create_model(self) -> InternalIdModel:
         return create_stub_sample()
 
-    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector) -> SQLAlchemyMapper:
-        return SQLAlchemySampleMapper(connector)
+    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector, **kwargs) -> SQLAlchemyMapper:
+        return SQLAlchemySampleMapper(connector, **kwargs)
 
     def _get_associated_with_instance(self, internal_id=None) -> InternalIdModel:
         study = create_stub_study()
@@ -232,8 +551,8 @@ class SQLAlchemyStudyMapperTest(_SQLAssociationMapperTest):
     def _create_model(self) -> InternalIdModel:
         return create_stub_study()
 
-    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector) -> SQLAlchemyMapper:
-        return SQLAlchemyStudyMapper(connector)
+    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector, **kwargs) -> SQLAlchemyMapper:
+        return SQLAlchemyStudyMapper(connector, **kwargs)
 
     def _get_associated_with_instance(self, internal_id=None) -> InternalIdModel:
         study = create_stub_sample()
@@ -249,8 +568,8 @@ class SQLAlchemyLibraryMapperTest(_SQLAlchemyMapperTest):
     def _create_model(self) -> InternalIdModel:
         return create_stub_library()
 
-    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector) -> SQLAlchemyMapper:
-        return SQLAlchemyLibraryMapper(connector)
+    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector, **kwargs) -> SQLAlchemyMapper:
+        return SQLAlchemyLibraryMapper(connector, **kwargs)
 
 
 class SQLAlchemyWellMapperTest(_SQLAlchemyMapperTest):
@@ -260,8 +579,8 @@ class SQLAlchemyWellMapperTest(_SQLAlchemyMapperTest):
     def _create_model(self) -> InternalIdModel:
         return create_stub_well()
 
-    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector) -> SQLAlchemyMapper:
-        return SQLAlchemyWellMapper(connector)
+    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector, **kwargs) -> SQLAlchemyMapper:
+        return SQLAlchemyWellMapper(connector, **kwargs)
 
 
 class SQLAlchemyMultiplexedLibraryMapperTest(_SQLAlchemyMapperTest):
@@ -271,8 +590,88 @@ class SQLAlchemyMultiplexedLibraryMapperTest(_SQLAlchemyMapperTest):
     def _create_model(self) -> InternalIdModel:
         return create_stub_multiplexed_library()
 
-    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector) -> SQLAlchemyMapper:
-        return SQLAlchemyMultiplexedLibraryMapper(connector)
+    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector, **kwargs) -> SQLAlchemyMapper:
+        return SQLAlchemyMultiplexedLibraryMapper(connector, **kwargs)
+
+
+class SQLAlchemySampleMapperWithCoreReadsTest(SQLAlchemySampleMapperTest):
+    """
+    Tests for `SQLAlchemySampleMapper` when reading with SQLAlchemy Core.
+    """
+    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector, **kwargs) -> SQLAlchemyMapper:
+        return SQLAlchemySampleMapper(connector, core_reads=True, **kwargs)
+
+
+class SQLAlchemyStudyMapperWithCoreReadsTest(SQLAlchemyStudyMapperTest):
+    """
+    Tests for `SQLAlchemyStudyMapper` when reading with SQLAlchemy Core.
+    """
+    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector, **kwargs) -> SQLAlchemyMapper:
+        return SQLAlchemyStudyMapper(connector, core_reads=True, **kwargs)
+
+
+class SQLAlchemyLibraryMapperWithCoreReadsTest(SQLAlchemyLibraryMapperTest):
+    """
+    Tests for `SQLAlchemyLibraryMapper` when reading with SQLAlchemy Core.
+    """
+    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector, **kwargs) -> SQLAlchemyMapper:
+        return SQLAlchemyLibraryMapper(connector, core_reads=True, **kwargs)
+
+
+class SQLAlchemySampleMapperWithCompactModelsTest(SQLAlchemySampleMapperTest):
+    """
+    Tests for `SQLAlchemySampleMapper` when reading compact models.
+    """
+    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector, **kwargs) -> SQLAlchemyMapper:
+        return SQLAlchemySampleMapper(connector, compact_models=True, **kwargs)
+
+    def test_reads_compact_models(self):
+        self._mapper.add(self._create_models(5))
+        for model in self._mapper.get_all():
+            self.assertIsInstance(model, CompactSample)
+
+    def test_add_compact_models(self):
+        models = self._create_models(2)
+        self._mapper.add(models[0])
+        other_mapper = self._create_mapper(_create_connector())
+        other_mapper.add(self._mapper.get_all() + [to_compact_model(models[1])])
+        self.assertCountEqual(other_mapper.get_all(), models)
+
+    def test_get_all_columnar_as_compact_models(self):
+        self._mapper.add(self._create_models(2))
+        retrieved_models = self._mapper.get_all_columnar()
+        self.assertEqual(retrieved_models.model_type, CompactSample)
+        self.assertIsInstance(retrieved_models[0], CompactSample)
+
+
+class SQLAlchemyStudyMapperWithCompactModelsTest(SQLAlchemyStudyMapperTest):
+    """
+    Tests for `SQLAlchemyStudyMapper` when reading compact models.
+    """
+    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector, **kwargs) -> SQLAlchemyMapper:
+        return SQLAlchemyStudyMapper(connector, compact_models=True, **kwargs)
+
+
+class SQLAlchemyLibraryMapperWithCompactModelsTest(SQLAlchemyLibraryMapperTest):
+    """
+    Tests for `SQLAlchemyLibraryMapper` when reading compact models.
+    """
+    def _create_mapper(self, connector: SQLAlchemyDatabaseConnector, **kwargs) -> SQLAlchemyMapper:
+        return SQLAlchemyLibraryMapper(connector, compact_models=True, **kwargs)
+
+
+class TestPartitionRange(unittest.TestCase):
+    """
+    Tests for `_partition_range`.
+    """
+    def test_partitions_cover_range(self):
+        self.assertEqual(_partition_range(1, 10, 3), [(1, 4), (4, 7), (7, 11)])
+
+    def test_with_more_partitions_than_integers(self):
+        self.assertEqual(_partition_range(5, 6, 10), [(5, 6), (6, 7)])
+
+    def test_with_single_integer(self):
+        self.assertEqual(_partition_range(3, 3, 2), [(3, 4)])
 
 
 # Trick required to stop Python's unittest from running the abstract base classes as tests
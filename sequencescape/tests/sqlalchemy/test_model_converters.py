@@ -3,12 +3,16 @@ import unittest
 from typing import List
 
 from sequencescape import NamedModel
+from sequencescape.compact_models import CompactSample, CompactLibrary
 from sequencescape.models import Sample, Study, Library, Well, MultiplexedLibrary
 from sequencescape._sqlalchemy._models import SQLAlchemySample, SQLAlchemyStudy, SQLAlchemyLibrary, \
     SQLAlchemyWell, SQLAlchemyMultiplexedLibrary
 from sequencescape._sqlalchemy.model_converters import get_equivalent_popo_model_type, \
     get_equivalent_sqlalchemy_model_type, convert_to_sqlalchemy_model, convert_to_popo_model, \
-    convert_to_sqlalchemy_models, convert_to_popo_models
+    convert_to_sqlalchemy_models, convert_to_popo_models, convert_to_table_rows, register_model_conversion, \
+    get_popo_model_columns, convert_rows_to_popo_models, convert_rows_to_compact_models, \
+    _SQLALCHEMY_TO_POPO_CONVERSIONS, _POPO_TO_SQLALCHEMY_CONVERSIONS, _clear_conversion_caches, \
+    _get_popo_model_converter, _get_sqlalchemy_model_converter
 from sequencescape.tests._helpers import create_stub_sample, INTERNAL_ID, NAME, ACCESSION_NUMBER, ORGANISM,\
     COMMON_NAME, TAXON_ID, GENDER, ETHNICITY, COHORT, COUNTRY_OF_ORIGIN, GEOGRAPHICAL_REGION, create_stub_study, \
     STUDY_TYPE, DESCRIPTION, STUDY_TITLE, STUDY_VISIBILITY, FACULTY_SPONSOR, create_stub_library, LIBRARY_TYPE, \
@@ -60,6 +64,73 @@ class TestGetEquivalentSqlalchemyModelType(unittest.TestCase):
     def test_correct_with_multiplexed_library(self):
         self.assertEqual(get_equivalent_sqlalchemy_model_type(MultiplexedLibrary), SQLAlchemyMultiplexedLibrary)
 
+    def test_correct_with_compact_model(self):
+        self.assertEqual(get_equivalent_sqlalchemy_model_type(CompactSample), SQLAlchemySample)
+
+
+class TestRegisterModelConversion(unittest.TestCase):
+    """
+    Unit testing for `register_model_conversion`.
+    """
+    class _CustomSample(Sample):
+        pass
+
+    class _CustomSQLAlchemySample(SQLAlchemySample):
+        pass
+
+    def setUp(self):
+        self._sqlalchemy_to_popo_conversions = dict(_SQLALCHEMY_TO_POPO_CONVERSIONS)
+        self._popo_to_sqlalchemy_conversions = dict(_POPO_TO_SQLALCHEMY_CONVERSIONS)
+
+    def tearDown(self):
+        _SQLALCHEMY_TO_POPO_CONVERSIONS.clear()
+        _SQLALCHEMY_TO_POPO_CONVERSIONS.update(self._sqlalchemy_to_popo_conversions)
+        _POPO_TO_SQLALCHEMY_CONVERSIONS.clear()
+        _POPO_TO_SQLALCHEMY_CONVERSIONS.update(self._popo_to_sqlalchemy_conversions)
+        _clear_conversion_caches()
+
+    def test_raises_with_non_model(self):
+        self.assertRaises(ValueError, register_model_conversion, str, SQLAlchemySample)
+
+    def test_raises_with_non_sqlalchemy_model(self):
+        self.assertRaises(ValueError, register_model_conversion, Sample, str)
+
+    def test_subclasses_use_superclass_registration(self):
+        self.assertEqual(get_equivalent_sqlalchemy_model_type(TestRegisterModelConversion._CustomSample),
+                         SQLAlchemySample)
+        self.assertEqual(get_equivalent_popo_model_type(TestRegisterModelConversion._CustomSQLAlchemySample), Sample)
+
+    def test_registered_conversion_used(self):
+        register_model_conversion(
+            TestRegisterModelConversion._CustomSample, TestRegisterModelConversion._CustomSQLAlchemySample)
+        self.assertEqual(get_equivalent_sqlalchemy_model_type(TestRegisterModelConversion._CustomSample),
+                         TestRegisterModelConversion._CustomSQLAlchemySample)
+        self.assertEqual(get_equivalent_popo_model_type(TestRegisterModelConversion._CustomSQLAlchemySample),
+                         TestRegisterModelConversion._CustomSample)
+        self.assertEqual(get_equivalent_sqlalchemy_model_type(Sample), SQLAlchemySample)
+
+    def test_registration_replaces_existing(self):
+        register_model_conversion(TestRegisterModelConversion._CustomSample, SQLAlchemySample)
+        self.assertEqual(get_equivalent_popo_model_type(SQLAlchemySample), TestRegisterModelConversion._CustomSample)
+        self.assertRaises(ValueError, get_equivalent_sqlalchemy_model_type, Sample)
+
+    def test_registration_updates_converters(self):
+        row = [None] * len(get_popo_model_columns(SQLAlchemySample))
+        self.assertIsInstance(convert_to_popo_model(SQLAlchemySample()), Sample)
+        self.assertIsInstance(convert_rows_to_popo_models(SQLAlchemySample, [row])[0], Sample)
+        register_model_conversion(TestRegisterModelConversion._CustomSample, SQLAlchemySample)
+        self.assertIsInstance(convert_to_popo_model(SQLAlchemySample()), TestRegisterModelConversion._CustomSample)
+        self.assertIsInstance(convert_rows_to_popo_models(SQLAlchemySample, [row])[0],
+                              TestRegisterModelConversion._CustomSample)
+
+    def test_converters_restored_when_registrations_restored(self):
+        register_model_conversion(TestRegisterModelConversion._CustomSample, SQLAlchemySample)
+        row = [None] * len(get_popo_model_columns(SQLAlchemySample))
+        convert_rows_to_popo_models(SQLAlchemySample, [row])
+        self.tearDown()
+        self.assertNotIsInstance(convert_rows_to_popo_models(SQLAlchemySample, [row])[0],
+                                 TestRegisterModelConversion._CustomSample)
+
 
 class TestConvertToSQLAlchemyModel(unittest.TestCase):
     """
@@ -158,6 +229,77 @@ class TestConvertToPOPOModels(unittest.TestCase):
         self.assertIsInstance(converted[0], Sample)
         self.assertIsInstance(converted[1], Library)
 
+    def test_convert_equal_to_constructed_model(self):
+        model = SQLAlchemyStudy()
+        model.internal_id = INTERNAL_ID
+        model.name = NAME
+        converted = convert_to_popo_models([model])
+        expected = Study()
+        expected.internal_id = INTERNAL_ID
+        expected.name = NAME
+        self.assertEqual(converted, [expected])
+        self.assertNotIn("_sa_instance_state", vars(converted[0]))
+
+    def test_converters_reused(self):
+        self.assertIs(_get_popo_model_converter(SQLAlchemySample), _get_popo_model_converter(SQLAlchemySample))
+        self.assertIs(_get_sqlalchemy_model_converter(Sample), _get_sqlalchemy_model_converter(Sample))
+
+
+class TestConvertToTableRows(unittest.TestCase):
+    """
+    Unit testing for `convert_to_table_rows`.
+    """
+    def test_convert_sample(self):
+        rows = convert_to_table_rows([create_stub_sample()])
+        self.assertEqual(rows, [{
+            "internal_id": INTERNAL_ID, "name": NAME, "accession_number": ACCESSION_NUMBER, "organism": ORGANISM,
+            "common_name": COMMON_NAME, "taxon_id": TAXON_ID, "gender": GENDER, "ethnicity": ETHNICITY,
+            "cohort": COHORT, "country_of_origin": COUNTRY_OF_ORIGIN, "geographical_region": GEOGRAPHICAL_REGION
+        }])
+
+    def test_convert_many_of_different_type(self):
+        rows = convert_to_table_rows([create_stub_library(), create_stub_well()])
+        self.assertEqual(rows, [
+            {"internal_id": INTERNAL_ID, "name": NAME, "library_type": LIBRARY_TYPE},
+            {"internal_id": INTERNAL_ID, "name": NAME}
+        ])
+
+
+class TestConvertRowsToPopoModels(unittest.TestCase):
+    """
+    Unit testing for `convert_rows_to_popo_models`.
+    """
+    def test_columns_are_of_equivalent_table(self):
+        columns = get_popo_model_columns(SQLAlchemyLibrary)
+        self.assertEqual({column.key for column in columns}, {"internal_id", "name", "library_type"})
+        for column in columns:
+            self.assertIs(column.table, SQLAlchemyLibrary.__table__)
+
+    def test_convert_library(self):
+        values = {"internal_id": INTERNAL_ID, "name": NAME, "library_type": LIBRARY_TYPE}
+        rows = [tuple(values[column.key] for column in get_popo_model_columns(SQLAlchemyLibrary))]
+        self.assertEqual(convert_rows_to_popo_models(SQLAlchemyLibrary, rows), [create_stub_library()])
+
+    def test_convert_with_no_rows(self):
+        self.assertEqual(convert_rows_to_popo_models(SQLAlchemySample, []), [])
+
+
+class TestConvertRowsToCompactModels(unittest.TestCase):
+    """
+    Unit testing for `convert_rows_to_compact_models`.
+    """
+    def test_convert_library(self):
+        values = {"internal_id": INTERNAL_ID, "name": NAME, "library_type": LIBRARY_TYPE}
+        rows = [tuple(values[column.key] for column in get_popo_model_columns(SQLAlchemyLibrary))]
+        converted = convert_rows_to_compact_models(SQLAlchemyLibrary, rows)
+        self.assertEqual(converted, [create_stub_library()])
+        self.assertIsInstance(converted[0], CompactLibrary)
+
+    def test_convert_sample(self):
+        sample = create_stub_sample()
+        rows = [tuple(getattr(sample, column.key) for column in get_popo_model_columns(SQLAlchemySample))]
+        self.assertEqual(convert_rows_to_compact_models(SQLAlchemySample, rows), [sample])
+
 
 class TestConvertToPopoModel(unittest.TestCase):
     """
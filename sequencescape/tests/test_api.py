@@ -1,7 +1,10 @@
 import unittest
 
+from sequencescape._sqlalchemy.database_connector import ConnectionPoolStatistics
+from sequencescape._sqlalchemy.instrumentation import QueryStatistics
 from sequencescape.api import Connection, connect_to_sequencescape
 from sequencescape.mappers import Mapper
+from sequencescape.tests._helpers import create_stub_sample, create_stub_study
 from sequencescape.tests.sqlalchemy.stub_database import create_stub_database
 
 
@@ -27,6 +30,79 @@ class TestConnection(unittest.TestCase):
         self.assertIsInstance(connection.library, Mapper)
         self.assertIsInstance(connection.well, Mapper)
 
+    def test_mappers_share_connection_pool(self):
+        database_location, dialect = create_stub_database()
+        connection = Connection("%s:///%s" % (dialect, database_location), pool_size=1)
+        connection.sample.get_all()
+        connection.study.get_all()
+        statistics = connection.get_pool_statistics()
+        self.assertIsInstance(statistics, ConnectionPoolStatistics)
+        self.assertEqual(statistics.connections_created, 1)
+        self.assertEqual(statistics.checkouts, 2)
+        connection.close()
+
+    def test_close_shuts_down_parallel_query_threads(self):
+        database_location, dialect = create_stub_database()
+        connection = Connection("%s:///%s" % (dialect, database_location), max_parallel_queries=4)
+        samples = [create_stub_sample(), create_stub_sample()]
+        samples[1].internal_id += 1
+        connection.sample.add(samples)
+        connection.sample.get_all()
+        self.assertIsNotNone(connection.sample._executor)
+        connection.close()
+        self.assertIsNone(connection.sample._executor)
+        self.assertEqual(connection.sample.get_all(), samples)
+        connection.close()
+
+    def test_session_shares_connection_and_transaction(self):
+        database_location, dialect = create_stub_database()
+        connection = Connection("%s:///%s" % (dialect, database_location), max_parallel_queries=4)
+        samples = [create_stub_sample(), create_stub_sample()]
+        samples[1].internal_id += 1
+        study = create_stub_study()
+        with connection.session():
+            connection.sample.add(samples)
+            connection.study.add(study)
+            connection.sample.set_association_with_study(samples, study)
+            self.assertCountEqual(connection.sample.get_associated_with_study(study), samples)
+            self.assertCountEqual(connection.sample.get_all(), samples)
+        self.assertEqual(connection.get_pool_statistics().checkouts, 1)
+        self.assertEqual(connection.study.get_associated_with_sample(samples[0]), [study])
+
+    def test_session_rolled_back_on_error(self):
+        database_location, dialect = create_stub_database()
+        connection = Connection("%s:///%s" % (dialect, database_location))
+
+        def add_then_fail():
+            with connection.session():
+                connection.sample.add(create_stub_sample())
+                raise RuntimeError()
+
+        self.assertRaises(RuntimeError, add_then_fail)
+        self.assertEqual(connection.sample.get_all(), [])
+
+    def test_with_core_reads(self):
+        database_location, dialect = create_stub_database()
+        connection = Connection("%s:///%s" % (dialect, database_location), core_reads=True)
+        sample = create_stub_sample()
+        connection.sample.add(sample)
+        self.assertEqual(connection.sample.get_by_name(sample.name), [sample])
+
+    def test_query_statistics(self):
+        database_location, dialect = create_stub_database()
+        connection = Connection("%s:///%s" % (dialect, database_location))
+        operations = []
+        connection.add_instrumentation_hook(lambda record: operations.append(record.operation))
+        sample = create_stub_sample()
+        connection.sample.add(sample)
+        connection.sample.get_by_name(sample.name)
+        statistics = connection.get_query_statistics()
+        self.assertIsInstance(statistics, QueryStatistics)
+        self.assertEqual(statistics.operations["Sample.get_by_name"].models_converted, 1)
+        self.assertEqual(operations, ["Sample.add", "Sample.get_by_name"])
+        connection.reset_query_statistics()
+        self.assertEqual(connection.get_query_statistics().operations, {})
+
 
 class TestConnectToSequencescape(unittest.TestCase):
     """
@@ -0,0 +1,180 @@
+import asyncio
+import gc
+import io
+import unittest
+import warnings
+from contextlib import redirect_stderr
+from threading import Event
+from typing import List, Iterator, Callable, Any
+
+from sequencescape.async_api import connect_to_sequencescape_async, AsyncConnection, AsyncModelIterator
+from sequencescape.tests._helpers import create_stub_samples, create_stub_study, create_stub_library
+from sequencescape.tests.sqlalchemy.stub_database import create_stub_database
+
+
+class TestAsyncConnection(unittest.TestCase):
+    """
+    Tests for `AsyncConnection`.
+    """
+    def setUp(self):
+        database_location, dialect = create_stub_database()
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._connection = connect_to_sequencescape_async("%s:///%s" % (dialect, database_location), max_workers=4)
+        self._samples = create_stub_samples(10)
+        self._run(self._connection.sample.add(self._samples))
+
+    def tearDown(self):
+        self._run(self._connection.close())
+        self._loop.close()
+        asyncio.set_event_loop(None)
+
+    def _run(self, coroutine):
+        return self._loop.run_until_complete(coroutine)
+
+    def _collect(self, iterator: AsyncModelIterator) -> List:
+        async def collect():
+            models = []
+            async for model in iterator:
+                models.append(model)
+            return models
+        return self._run(collect())
+
+    def test_connect_returns_async_connection(self):
+        self.assertIsInstance(self._connection, AsyncConnection)
+
+    def test_get_all(self):
+        self.assertCountEqual(self._run(self._connection.sample.get_all()), self._samples)
+
+    def test_get_by_name(self):
+        self.assertEqual(self._run(self._connection.sample.get_by_name(self._samples[0].name)), [self._samples[0]])
+
+    def test_get_by_id(self):
+        self.assertEqual(self._run(self._connection.sample.get_by_id(self._samples[1].internal_id)), [self._samples[1]])
+
+    def test_get_by_accession_number(self):
+        self.assertCountEqual(
+            self._run(self._connection.sample.get_by_accession_number(
+                [sample.accession_number for sample in self._samples])),
+            self._samples)
+
+    def test_concurrent_lookups(self):
+        lookups = [self._connection.sample.get_by_id(sample.internal_id) for sample in self._samples]
+        results = self._run(asyncio.gather(*lookups))
+        self.assertEqual(results, [[sample] for sample in self._samples])
+
+    def test_associations(self):
+        study = create_stub_study()
+        self._run(self._connection.study.add(study))
+        self._run(self._connection.sample.set_association_with_study(self._samples, study))
+        self.assertCountEqual(self._run(self._connection.sample.get_associated_with_study(study)), self._samples)
+        self.assertEqual(self._run(self._connection.study.get_associated_with_sample(self._samples[0])), [study])
+
+    def test_other_mappers(self):
+        library = create_stub_library()
+        self._run(self._connection.library.add(library))
+        self.assertEqual(self._run(self._connection.library.get_by_name(library.name)), [library])
+
+    def test_iter_all(self):
+        self.assertCountEqual(self._collect(self._connection.sample.iter_all(batch_size=3)), self._samples)
+
+    def test_iter_by_property_value(self):
+        names = [sample.name for sample in self._samples[0:5]]
+        self.assertCountEqual(
+            self._collect(self._connection.sample.iter_by_property_value("name", names, batch_size=2)),
+            self._samples[0:5])
+
+    def test_iter_all_closed_early(self):
+        iterator = self._connection.sample.iter_all(batch_size=1)
+
+        async def get_first():
+            model = await iterator.__anext__()
+            await iterator.aclose()
+            return model
+
+        self.assertIn(self._run(get_first()), self._samples)
+        self.assertEqual(self._collect(iterator), [])
+
+    def test_iter_all_as_context_manager(self):
+        async def get_first():
+            async with self._connection.sample.iter_all(batch_size=1) as iterator:
+                async for model in iterator:
+                    return model, iterator
+
+        model, iterator = self._run(get_first())
+        self.assertIn(model, self._samples)
+        self.assertEqual(self._collect(iterator), [])
+
+    def test_open_iterators_do_not_block_other_operations(self):
+        async def get_while_iterating():
+            iterators = [self._connection.sample.iter_all(batch_size=1) for _ in range(8)]
+            for iterator in iterators:
+                await iterator.__anext__()
+            samples = await asyncio.wait_for(self._connection.sample.get_by_name(self._samples[0].name), 10)
+            for iterator in iterators:
+                await iterator.aclose()
+            return samples
+
+        self.assertEqual(self._run(get_while_iterating()), [self._samples[0]])
+
+    def test_iter_all_with_error(self):
+        def fail():
+            raise IOError()
+        iterator = AsyncModelIterator(fail)
+        self.assertRaises(IOError, self._collect, iterator)
+
+
+class TestAsyncModelIterator(unittest.TestCase):
+    """
+    Tests for `AsyncModelIterator`.
+    """
+    def setUp(self):
+        self._loop = asyncio.new_event_loop()
+        self._proceed = Event()
+
+    def tearDown(self):
+        self._proceed.set()
+        self._loop.close()
+
+    def _create_iterator(self) -> Iterator[int]:
+        yield 1
+        self._proceed.wait()
+        yield 2
+
+    def _assert_thread_exits_cleanly(self, iterator: AsyncModelIterator, stop: Callable[[], Any]):
+        """
+        Asserts that the thread of the given iterator exits without an unhandled exception when the iteration is stopped
+        part-way through with the given function.
+        :param iterator: the iterator, which must not have been started
+        :param stop: stops the iteration
+        """
+        self.assertEqual(self._loop.run_until_complete(iterator.__anext__()), 1)
+        with warnings.catch_warnings(record=True) as caught_warnings, redirect_stderr(io.StringIO()) as stderr:
+            warnings.simplefilter("always")
+            stop()
+            self._proceed.set()
+            iterator._thread.join(10)
+            gc.collect()
+        self.assertFalse(iterator._thread.is_alive())
+        self.assertEqual(stderr.getvalue(), "")
+        self.assertEqual([str(warning.message) for warning in caught_warnings], [])
+
+    def test_thread_exits_when_closed(self):
+        iterator = AsyncModelIterator(self._create_iterator, batch_size=1)
+        self._assert_thread_exits_cleanly(iterator, lambda: self._loop.run_until_complete(iterator.aclose()))
+
+    def test_thread_exits_when_event_loop_closed(self):
+        iterator = AsyncModelIterator(self._create_iterator, batch_size=1)
+        self._assert_thread_exits_cleanly(iterator, self._loop.close)
+
+    def test_error_not_raised_on_thread_when_event_loop_closed(self):
+        def create_iterator():
+            yield 1
+            self._proceed.wait()
+            raise IOError()
+
+        self._assert_thread_exits_cleanly(AsyncModelIterator(create_iterator, batch_size=1), self._loop.close)
+
+
+if __name__ == "__main__":
+    unittest.main()
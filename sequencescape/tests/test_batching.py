@@ -0,0 +1,124 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+from typing import List, Any
+
+from sequencescape.batching import BatchingSampleMapper, BatchingLibraryMapper
+from sequencescape.enums import Property
+from sequencescape.models import Sample
+from sequencescape.tests._helpers import create_stub_samples, create_stub_library, create_stub_study
+from sequencescape.tests._mocks import MockSampleMapper, MockLibraryMapper
+
+_NUMBER_OF_THREADS = 10
+
+
+class TestBatchingMapper(unittest.TestCase):
+    """
+    Tests for `BatchingMapper`, using `BatchingSampleMapper`.
+    """
+    def setUp(self):
+        self._samples = create_stub_samples(_NUMBER_OF_THREADS)
+
+        def get_by_property_value_sequence(property: str, values: List[Any]) -> List[Sample]:
+            return [sample for sample in self._samples if getattr(sample, property) in values]
+
+        self._mapper = MockSampleMapper()
+        self._mapper._get_by_property_value_sequence.side_effect = get_by_property_value_sequence
+        self._executor = ThreadPoolExecutor(max_workers=_NUMBER_OF_THREADS)
+
+    def tearDown(self):
+        self._executor.shutdown()
+
+    def _get_by_names_concurrently(self, batching_mapper: BatchingSampleMapper, names: List[str]) -> List[List[Sample]]:
+        """
+        Gets the samples with each of the given names, each from a different thread at the same time.
+        :param batching_mapper: the mapper to get the samples through
+        :param names: the names of the samples to get
+        :return: the samples got by each thread
+        """
+        barrier = Barrier(len(names))
+
+        def get_by_name(name: str) -> List[Sample]:
+            barrier.wait()
+            return batching_mapper.get_by_name(name)
+
+        return list(self._executor.map(get_by_name, names))
+
+    def test_constructor_with_invalid_batch_size(self):
+        self.assertRaises(ValueError, BatchingSampleMapper, self._mapper, max_batch_size=0)
+
+    def test_get_without_concurrent_lookups(self):
+        batching_mapper = BatchingSampleMapper(self._mapper, batch_window=0)
+        self.assertEqual(batching_mapper.get_by_id([0, 1]), self._samples[0:2])
+        self._mapper._get_by_property_value_sequence.assert_called_once_with(Property.INTERNAL_ID, [0, 1])
+
+    def test_concurrent_lookups_combined(self):
+        batching_mapper = BatchingSampleMapper(self._mapper, batch_window=1)
+        names = [sample.name for sample in self._samples]
+        results = self._get_by_names_concurrently(batching_mapper, names)
+        self.assertEqual(results, [[sample] for sample in self._samples])
+        self.assertEqual(self._mapper._get_by_property_value_sequence.call_count, 1)
+        self.assertCountEqual(self._mapper._get_by_property_value_sequence.call_args[0][1], names)
+
+    def test_full_batch_does_not_wait_for_window(self):
+        batching_mapper = BatchingSampleMapper(self._mapper, batch_window=60, max_batch_size=_NUMBER_OF_THREADS)
+        names = [sample.name for sample in self._samples]
+        results = self._get_by_names_concurrently(batching_mapper, names)
+        self.assertEqual(results, [[sample] for sample in self._samples])
+
+    def test_lookups_of_same_value_get_own_copies(self):
+        batching_mapper = BatchingSampleMapper(self._mapper, batch_window=1, max_batch_size=2)
+        results = self._get_by_names_concurrently(batching_mapper, [self._samples[0].name] * 2)
+        self.assertEqual(results[0], results[1])
+        self.assertIsNot(results[0][0], results[1][0])
+
+    def test_errors_given_to_all_lookups(self):
+        self._mapper._get_by_property_value_sequence.side_effect = IOError()
+        batching_mapper = BatchingSampleMapper(self._mapper, batch_window=60, max_batch_size=2)
+        self.assertRaises(IOError, self._get_by_names_concurrently, batching_mapper, ["name_1", "name_2"])
+
+    def test_errors_sharing_out_results_given_to_all_lookups(self):
+        self._mapper._get_by_property_value_sequence.side_effect = lambda property, values: [object()]
+        batching_mapper = BatchingSampleMapper(self._mapper, batch_window=60, max_batch_size=2)
+        futures = [self._executor.submit(batching_mapper.get_by_name, name) for name in ["name_1", "name_2"]]
+        for future in futures:
+            self.assertRaises(AttributeError, future.result, timeout=10)
+
+    def test_base_exceptions_given_to_all_lookups(self):
+        class _Abort(BaseException):
+            pass
+        self._mapper._get_by_property_value_sequence.side_effect = _Abort()
+        batching_mapper = BatchingSampleMapper(self._mapper, batch_window=60, max_batch_size=2)
+        futures = [self._executor.submit(batching_mapper.get_by_name, name) for name in ["name_1", "name_2"]]
+        for future in futures:
+            self.assertRaises(_Abort, future.result, timeout=10)
+        self.assertEqual(batching_mapper._batches, {})
+
+    def test_lookups_made_separately_if_values_matched_differently(self):
+        self._mapper._get_by_property_value_sequence.side_effect = lambda property, values: \
+            [sample for sample in self._samples if sample.name.upper() in values]
+        batching_mapper = BatchingSampleMapper(self._mapper, batch_window=60, max_batch_size=2)
+        results = self._get_by_names_concurrently(batching_mapper, ["SAMPLE_0", "SAMPLE_1"])
+        self.assertEqual(results, [[self._samples[0]], [self._samples[1]]])
+
+    def test_associations_delegated(self):
+        batching_mapper = BatchingSampleMapper(self._mapper)
+        study = create_stub_study()
+        batching_mapper.get_associated_with_study(study)
+        self._mapper.get_associated_with_study.assert_called_once_with(study)
+
+
+class TestBatchingLibraryMapper(unittest.TestCase):
+    """
+    Tests for `BatchingLibraryMapper`.
+    """
+    def test_get_by_name(self):
+        library = create_stub_library()
+        mapper = MockLibraryMapper()
+        mapper._get_by_property_value_sequence.return_value = [library]
+        batching_mapper = BatchingLibraryMapper(mapper, batch_window=0)
+        self.assertEqual(batching_mapper.get_by_name(library.name), [library])
+
+
+if __name__ == "__main__":
+    unittest.main()
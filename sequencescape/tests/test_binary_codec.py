@@ -0,0 +1,153 @@
+import mmap
+import os
+import pickle
+import tempfile
+import unittest
+
+from sequencescape import Sample, Study, Library, MultiplexedLibrary, Well
+from sequencescape.binary_codec import BinaryModels, encode_models, decode_models
+from sequencescape.compact_models import CompactSample, to_compact_model
+from sequencescape.tests._helpers import create_stub, create_stub_sample
+
+
+def _create_models(model_type: type, number_of_models: int=3):
+    """
+    Creates models of the given type with unique internal IDs and names, along with a model with no properties set.
+    :param model_type: the type of model to create
+    :param number_of_models: the number of models with properties set to create
+    :return: the models
+    """
+    models = []
+    for i in range(number_of_models):
+        model = create_stub(model_type)
+        model.internal_id = i
+        model.name = "name_%d_é" % i
+        models.append(model)
+    models.append(model_type())
+    return models
+
+
+class TestEncodeAndDecodeModels(unittest.TestCase):
+    """
+    Tests for `encode_models` and `decode_models`.
+    """
+    def test_round_trip_all_model_types(self):
+        for model_type in (Sample, Study, Library, MultiplexedLibrary, Well):
+            models = _create_models(model_type)
+            decoded = decode_models(encode_models(models))
+            self.assertEqual(decoded, models)
+            for model, decoded_model in zip(models, decoded):
+                self.assertEqual(type(decoded_model), model_type)
+                self.assertEqual(vars(decoded_model), vars(model))
+
+    def test_round_trip_no_models(self):
+        self.assertEqual(decode_models(encode_models([], Sample)), [])
+
+    def test_encode_no_models_without_type(self):
+        self.assertRaises(ValueError, encode_models, [])
+
+    def test_encode_compact_models(self):
+        models = _create_models(Sample)
+        self.assertEqual(encode_models([to_compact_model(model) for model in models]), encode_models(models))
+
+    def test_decode_as_compact_models(self):
+        models = _create_models(Sample)
+        decoded = decode_models(encode_models(models), compact=True)
+        self.assertEqual(decoded, models)
+        self.assertIsInstance(decoded[0], CompactSample)
+
+    def test_strings_shared(self):
+        models = _create_models(Sample)
+        encoded = encode_models(models)
+        self.assertEqual(encoded.count(models[0].organism.encode("utf-8")), 1)
+        decoded = decode_models(encoded)
+        self.assertIs(decoded[0].organism, decoded[1].organism)
+
+    def test_smaller_than_pickle(self):
+        models = _create_models(Sample, 100)
+        self.assertLess(len(encode_models(models)), len(pickle.dumps(models)))
+
+    def test_encode_models_of_different_types(self):
+        self.assertRaises(ValueError, encode_models, [create_stub_sample(), create_stub(Study)])
+
+    def test_encode_unknown_type(self):
+        self.assertRaises(ValueError, encode_models, [object()])
+
+    def test_encode_non_string_property(self):
+        sample = create_stub_sample()
+        sample.organism = 1
+        self.assertRaises(ValueError, encode_models, [sample])
+
+    def test_encode_non_integer_internal_id(self):
+        sample = create_stub_sample()
+        sample.internal_id = "1"
+        self.assertRaises(ValueError, encode_models, [sample])
+
+    def test_decode_invalid_buffer(self):
+        self.assertRaises(ValueError, decode_models, b"")
+        self.assertRaises(ValueError, decode_models, b"x" * 100)
+        self.assertRaises(ValueError, decode_models, encode_models(_create_models(Sample))[:-1])
+
+
+class TestBinaryModels(unittest.TestCase):
+    """
+    Tests for `BinaryModels`.
+    """
+    def setUp(self):
+        self.models = _create_models(Study)
+        self.encoded = encode_models(self.models)
+
+    def test_model_type(self):
+        self.assertEqual(BinaryModels(self.encoded).model_type, Study)
+
+    def test_len(self):
+        self.assertEqual(len(BinaryModels(self.encoded)), len(self.models))
+
+    def test_getitem(self):
+        binary_models = BinaryModels(self.encoded)
+        for i in range(len(self.models)):
+            self.assertEqual(binary_models[i], self.models[i])
+        self.assertEqual(binary_models[-1], self.models[-1])
+        self.assertEqual(binary_models[1:3], self.models[1:3])
+
+    def test_get_value(self):
+        binary_models = BinaryModels(self.encoded)
+        for i, model in enumerate(self.models):
+            for property, value in vars(model).items():
+                self.assertEqual(binary_models.get_value(i, property), value)
+
+    def test_get_value_of_unknown_property(self):
+        self.assertRaises(ValueError, BinaryModels(self.encoded).get_value, 0, "organism")
+
+    def test_getitem_out_of_range(self):
+        binary_models = BinaryModels(self.encoded)
+        self.assertRaises(IndexError, binary_models.__getitem__, len(self.models))
+        self.assertRaises(IndexError, binary_models.__getitem__, -len(self.models) - 1)
+
+    def test_iter(self):
+        self.assertEqual(list(BinaryModels(self.encoded)), self.models)
+
+    def test_read_from_memoryview(self):
+        buffer = bytearray(b"padding" + self.encoded)
+        with BinaryModels(memoryview(buffer)[len(b"padding"):]) as binary_models:
+            self.assertEqual(binary_models.to_models(), self.models)
+
+    def test_read_from_mmap(self):
+        file_handle, location = tempfile.mkstemp()
+        try:
+            os.write(file_handle, self.encoded)
+            with mmap.mmap(file_handle, 0, access=mmap.ACCESS_READ) as mapped:
+                with BinaryModels(mapped) as binary_models:
+                    self.assertEqual(binary_models[1], self.models[1])
+        finally:
+            os.close(file_handle)
+            os.remove(location)
+
+    def test_release(self):
+        binary_models = BinaryModels(self.encoded)
+        binary_models.release()
+        self.assertRaises(ValueError, binary_models.__getitem__, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
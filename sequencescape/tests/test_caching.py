@@ -0,0 +1,216 @@
+import unittest
+from typing import List, Any
+
+from sequencescape.caching import ModelCache, CacheStatistics, CachingSampleMapper, CachingStudyMapper, \
+    CachingLibraryMapper
+from sequencescape.enums import Property
+from sequencescape.in_memory import InMemoryDatabase, InMemorySampleMapper
+from sequencescape.models import Sample, Study
+from sequencescape.tests._helpers import create_stub_sample, create_stub_samples, create_stub_study, create_stub_library
+from sequencescape.tests._mocks import MockSampleMapper, MockStudyMapper, MockLibraryMapper
+
+
+class _StubTimer:
+    """
+    Timer that only moves when told to.
+    """
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self) -> float:
+        return self.time
+
+
+class TestModelCache(unittest.TestCase):
+    """
+    Tests for `ModelCache`.
+    """
+    _KEY = (Sample, Property.NAME, "name")
+
+    def setUp(self):
+        self._timer = _StubTimer()
+        self._models = (create_stub_sample(), )
+
+    def test_constructor_with_invalid_size(self):
+        self.assertRaises(ValueError, ModelCache, max_size=0)
+
+    def test_constructor_with_invalid_ttl(self):
+        self.assertRaises(ValueError, ModelCache, ttl=0)
+
+    def test_get_when_not_cached(self):
+        cache = ModelCache()
+        self.assertIsNone(cache.get(TestModelCache._KEY))
+        self.assertEqual(cache.get_statistics(), CacheStatistics(misses=1))
+
+    def test_get_when_cached(self):
+        cache = ModelCache()
+        cache.set(TestModelCache._KEY, self._models)
+        self.assertEqual(cache.get(TestModelCache._KEY), self._models)
+        self.assertEqual(cache.get_statistics(), CacheStatistics(hits=1, size=1))
+
+    def test_get_when_cached_not_found(self):
+        cache = ModelCache()
+        cache.set(TestModelCache._KEY, [])
+        self.assertEqual(cache.get(TestModelCache._KEY), ())
+
+    def test_not_found_not_cached_if_disabled(self):
+        cache = ModelCache(cache_not_found=False)
+        cache.set(TestModelCache._KEY, [])
+        self.assertIsNone(cache.get(TestModelCache._KEY))
+
+    def test_least_recently_used_evicted(self):
+        cache = ModelCache(max_size=2)
+        cache.set((Sample, Property.NAME, 1), self._models)
+        cache.set((Sample, Property.NAME, 2), self._models)
+        cache.get((Sample, Property.NAME, 1))
+        cache.set((Sample, Property.NAME, 3), self._models)
+        self.assertIsNone(cache.get((Sample, Property.NAME, 2)))
+        self.assertIsNotNone(cache.get((Sample, Property.NAME, 1)))
+        self.assertIsNotNone(cache.get((Sample, Property.NAME, 3)))
+        self.assertEqual(cache.get_statistics().evictions, 1)
+
+    def test_entries_expire(self):
+        cache = ModelCache(ttl=10, timer=self._timer)
+        cache.set(TestModelCache._KEY, self._models)
+        self._timer.time = 9
+        self.assertIsNotNone(cache.get(TestModelCache._KEY))
+        self._timer.time = 10
+        self.assertIsNone(cache.get(TestModelCache._KEY))
+        self.assertEqual(cache.get_statistics(), CacheStatistics(hits=1, misses=1, expirations=1))
+
+    def test_invalidate(self):
+        cache = ModelCache()
+        cache.set(TestModelCache._KEY, self._models)
+        cache.invalidate(TestModelCache._KEY)
+        self.assertIsNone(cache.get(TestModelCache._KEY))
+
+    def test_invalidate_models(self):
+        cache = ModelCache()
+        sample = create_stub_sample()
+        cache.set((Sample, Property.NAME, sample.name), [])
+        cache.set((Sample, "organism", sample.organism), [])
+        cache.set((Study, Property.NAME, sample.name), [])
+        cache.invalidate_models(Sample, [sample])
+        self.assertIsNone(cache.get((Sample, Property.NAME, sample.name)))
+        self.assertIsNone(cache.get((Sample, "organism", sample.organism)))
+        self.assertIsNotNone(cache.get((Study, Property.NAME, sample.name)))
+
+    def test_clear(self):
+        cache = ModelCache()
+        cache.set(TestModelCache._KEY, self._models)
+        cache.clear()
+        self.assertEqual(cache.get_statistics().size, 0)
+
+
+class TestCachingMapper(unittest.TestCase):
+    """
+    Tests for `CachingMapper`, using `CachingSampleMapper`.
+    """
+    def setUp(self):
+        self._samples = create_stub_samples(3)
+
+        def get_by_property_value_sequence(property: str, values: List[Any]) -> List[Sample]:
+            return [sample for sample in self._samples if getattr(sample, property) in values]
+
+        self._mapper = MockSampleMapper()
+        self._mapper._get_by_property_value_sequence.side_effect = get_by_property_value_sequence
+        self._caching_mapper = CachingSampleMapper(self._mapper)
+
+    def test_get_when_not_cached(self):
+        self.assertEqual(self._caching_mapper.get_by_name(self._samples[0].name), [self._samples[0]])
+        self._mapper._get_by_property_value_sequence.assert_called_once_with(Property.NAME, [self._samples[0].name])
+
+    def test_get_when_cached(self):
+        self._caching_mapper.get_by_name(self._samples[0].name)
+        self.assertEqual(self._caching_mapper.get_by_name(self._samples[0].name), [self._samples[0]])
+        self.assertEqual(self._mapper._get_by_property_value_sequence.call_count, 1)
+        self.assertEqual(self._caching_mapper.cache.get_statistics().hits, 1)
+
+    def test_get_when_partially_cached(self):
+        self._caching_mapper.get_by_id([0, 1])
+        results = self._caching_mapper.get_by_id([0, 1, 2])
+        self.assertCountEqual(results, self._samples)
+        self._mapper._get_by_property_value_sequence.assert_called_with(Property.INTERNAL_ID, [2])
+
+    def test_get_when_not_found_is_cached(self):
+        self.assertEqual(self._caching_mapper.get_by_accession_number("other"), [])
+        self.assertEqual(self._caching_mapper.get_by_accession_number("other"), [])
+        self.assertEqual(self._mapper._get_by_property_value_sequence.call_count, 1)
+
+    def test_get_by_many_properties_uses_cache(self):
+        self._caching_mapper.get_by_id(0)
+        results = self._caching_mapper.get_by_property_value([(Property.INTERNAL_ID, 0), (Property.NAME, "sample_1")])
+        self.assertCountEqual(results, self._samples[0:2])
+        self._mapper._get_by_property_value_sequence.assert_called_with(Property.NAME, ["sample_1"])
+
+    def test_changes_to_results_do_not_change_cache(self):
+        self._caching_mapper.get_by_id(0)[0].name = "changed"
+        self.assertEqual(self._caching_mapper.get_by_id(0)[0].name, self._samples[0].name)
+
+    def test_add_invalidates_cache(self):
+        self.assertEqual(self._caching_mapper.get_by_name("new"), [])
+        sample = create_stub_sample()
+        sample.name = "new"
+        self._caching_mapper.add(sample)
+        self._mapper.add.assert_called_once_with([sample])
+        self._samples.append(sample)
+        self.assertEqual(self._caching_mapper.get_by_name("new"), [sample])
+
+    def test_add_invalidates_cache_shared_with_other_mapper(self):
+        database = InMemoryDatabase()
+        cache = ModelCache()
+        caching_mapper = CachingSampleMapper(InMemorySampleMapper(database), cache)
+        other_caching_mapper = CachingSampleMapper(InMemorySampleMapper(database), cache)
+        self.assertEqual(caching_mapper.get_by_name("new"), [])
+        sample = create_stub_sample()
+        sample.name = "new"
+        other_caching_mapper.add(sample)
+        self.assertEqual(caching_mapper.get_by_name("new"), [sample])
+
+    def test_get_all_not_cached(self):
+        self._mapper.get_all.return_value = self._samples
+        self.assertEqual(self._caching_mapper.get_all(), self._samples)
+        self.assertEqual(self._caching_mapper.get_all(), self._samples)
+        self.assertEqual(self._mapper.get_all.call_count, 2)
+
+    def test_cache_shared_between_mappers_of_different_types(self):
+        study = create_stub_study()
+        study_mapper = MockStudyMapper()
+        study_mapper._get_by_property_value_sequence.return_value = [study]
+        caching_study_mapper = CachingStudyMapper(study_mapper, self._caching_mapper.cache)
+        self._caching_mapper.get_by_id(0)
+        self.assertEqual(caching_study_mapper.get_by_id(0), [study])
+        self.assertIsInstance(caching_study_mapper.get_by_id(0)[0], Study)
+
+
+class TestCachingSampleMapper(unittest.TestCase):
+    """
+    Tests for `CachingSampleMapper`.
+    """
+    def test_associations_delegated(self):
+        mapper = MockSampleMapper()
+        caching_mapper = CachingSampleMapper(mapper)
+        sample = create_stub_sample()
+        study = create_stub_study()
+        caching_mapper.set_association_with_study(sample, study)
+        mapper.set_association_with_study.assert_called_once_with(sample, study)
+        caching_mapper.get_associated_with_study(study)
+        mapper.get_associated_with_study.assert_called_once_with(study)
+
+
+class TestCachingLibraryMapper(unittest.TestCase):
+    """
+    Tests for `CachingLibraryMapper`.
+    """
+    def test_get_by_name(self):
+        library = create_stub_library()
+        mapper = MockLibraryMapper()
+        mapper._get_by_property_value_sequence.return_value = [library]
+        caching_mapper = CachingLibraryMapper(mapper)
+        self.assertEqual(caching_mapper.get_by_name(library.name), [library])
+        self.assertEqual(caching_mapper.get_by_name(library.name), [library])
+        self.assertEqual(mapper._get_by_property_value_sequence.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+from array import array
+
+from sequencescape import Sample, Study, ColumnarModels
+from sequencescape.compact_models import CompactSample, to_compact_model
+from sequencescape.tests._helpers import create_stub_samples, create_stub_study
+
+
+def _create_samples(number_of_samples: int):
+    """
+    Creates samples with unique internal IDs and names, alternating between two organisms.
+    :param number_of_samples: the number of samples to create
+    :return: the samples
+    """
+    samples = create_stub_samples(number_of_samples)
+    for i in range(number_of_samples):
+        samples[i].organism = "organism_%d" % (i % 2)
+    return samples
+
+
+class TestColumnarModels(unittest.TestCase):
+    """
+    Tests for `ColumnarModels`.
+    """
+    def setUp(self):
+        self.samples = _create_samples(5)
+        self.columnar = ColumnarModels.from_models(self.samples)
+
+    def test_init_with_columns_of_different_lengths(self):
+        self.assertRaises(ValueError, ColumnarModels, Sample, {"internal_id": [1, 2], "name": ["a"]})
+
+    def test_len(self):
+        self.assertEqual(len(self.columnar), 5)
+
+    def test_model_type(self):
+        self.assertEqual(self.columnar.model_type, Sample)
+
+    def test_properties(self):
+        self.assertCountEqual(self.columnar.properties, vars(Sample()).keys())
+
+    def test_getitem(self):
+        self.assertEqual(self.columnar[2], self.samples[2])
+        self.assertEqual(self.columnar[-1], self.samples[-1])
+        self.assertEqual(type(self.columnar[0]), Sample)
+        self.assertEqual(vars(self.columnar[0]), vars(self.samples[0]))
+
+    def test_getitem_out_of_range(self):
+        self.assertRaises(IndexError, self.columnar.__getitem__, 5)
+
+    def test_getitem_with_slice(self):
+        sliced = self.columnar[1:4]
+        self.assertIsInstance(sliced, ColumnarModels)
+        self.assertEqual(list(sliced), self.samples[1:4])
+
+    def test_iter(self):
+        self.assertEqual(list(self.columnar), self.samples)
+
+    def test_to_models(self):
+        self.assertEqual(self.columnar.to_models(), self.samples)
+
+    def test_column(self):
+        self.assertEqual(list(self.columnar.column("name")), [sample.name for sample in self.samples])
+
+    def test_column_of_unknown_property(self):
+        self.assertRaises(ValueError, self.columnar.column, "other")
+
+    def test_integer_columns_held_in_arrays(self):
+        self.assertIsInstance(self.columnar.column("internal_id"), array)
+
+    def test_equal_strings_interned(self):
+        organisms = self.columnar.column("organism")
+        self.assertIs(organisms[0], organisms[2])
+
+    def test_count_by(self):
+        self.assertEqual(self.columnar.count_by("organism"), {"organism_0": 3, "organism_1": 2})
+
+    def test_count_by_multiple_properties(self):
+        self.assertEqual(self.columnar.count_by("organism", "gender"),
+                         {("organism_0", self.samples[0].gender): 3, ("organism_1", self.samples[0].gender): 2})
+
+    def test_count_by_no_properties(self):
+        self.assertRaises(ValueError, self.columnar.count_by)
+
+    def test_group_by(self):
+        groups = self.columnar.group_by("organism")
+        self.assertEqual(list(groups.keys()), ["organism_0", "organism_1"])
+        self.assertEqual(list(groups["organism_0"]), [self.samples[0], self.samples[2], self.samples[4]])
+        self.assertEqual(list(groups["organism_1"]), [self.samples[1], self.samples[3]])
+
+    def test_from_models_with_no_models(self):
+        columnar = ColumnarModels.from_models([], Study)
+        self.assertEqual(len(columnar), 0)
+        self.assertEqual(columnar.to_models(), [])
+        self.assertCountEqual(columnar.properties, vars(create_stub_study()).keys())
+
+    def test_from_models_with_no_models_or_type(self):
+        self.assertRaises(ValueError, ColumnarModels.from_models, [])
+
+    def test_compact_models(self):
+        columnar = ColumnarModels.from_models([to_compact_model(sample) for sample in self.samples])
+        self.assertEqual(columnar.model_type, CompactSample)
+        self.assertIsInstance(columnar[0], CompactSample)
+        self.assertEqual(columnar.to_models(), self.samples)
+
+    def test_equality(self):
+        self.assertEqual(ColumnarModels.from_models(self.samples), self.columnar)
+        self.assertNotEqual(ColumnarModels.from_models(self.samples[1:]), self.columnar)
+
+
+if __name__ == "__main__":
+    unittest.main()
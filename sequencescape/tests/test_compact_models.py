@@ -0,0 +1,97 @@
+import copy
+import json
+import pickle
+import unittest
+
+from sequencescape import Sample, Study, Library, MultiplexedLibrary, Well, SampleJSONEncoder, StudyJSONEncoder
+from sequencescape.compact_models import CompactSample, CompactStudy, CompactLibrary, CompactMultiplexedLibrary, \
+    CompactWell, get_compact_model_type, to_compact_model, to_model
+from sequencescape.mappers import _unique_models
+from sequencescape.models import NamedModel, InternalIdModel, AccessionNumberModel
+from sequencescape.tests._helpers import create_stub_sample, create_stub_study, create_stub
+
+
+class TestCompactModels(unittest.TestCase):
+    """
+    Tests for the compact equivalents of models.
+    """
+    def setUp(self):
+        self.sample = create_stub_sample()
+        self.compact_sample = to_compact_model(self.sample)
+
+    def test_get_compact_model_type(self):
+        self.assertEqual(get_compact_model_type(Sample), CompactSample)
+        self.assertEqual(get_compact_model_type(Study), CompactStudy)
+        self.assertEqual(get_compact_model_type(Library), CompactLibrary)
+        self.assertEqual(get_compact_model_type(MultiplexedLibrary), CompactMultiplexedLibrary)
+        self.assertEqual(get_compact_model_type(Well), CompactWell)
+        self.assertIsNone(get_compact_model_type(CompactSample))
+
+    def test_has_same_properties_as_model(self):
+        for model_type in (Sample, Study, Library, MultiplexedLibrary, Well):
+            self.assertCountEqual(get_compact_model_type(model_type).__slots__, vars(model_type()).keys())
+
+    def test_is_instance_of_model_type(self):
+        self.assertIsInstance(self.compact_sample, Sample)
+        self.assertIsInstance(self.compact_sample, NamedModel)
+        self.assertIsInstance(self.compact_sample, InternalIdModel)
+        self.assertIsInstance(self.compact_sample, AccessionNumberModel)
+        self.assertNotIsInstance(self.compact_sample, Study)
+
+    def test_equal_to_model_with_same_properties(self):
+        self.assertEqual(self.compact_sample, self.sample)
+        self.assertEqual(self.sample, self.compact_sample)
+        self.assertEqual(self.compact_sample, to_compact_model(self.sample))
+
+    def test_not_equal_to_model_with_different_properties(self):
+        self.sample.organism = "other"
+        self.assertNotEqual(self.compact_sample, self.sample)
+        self.assertNotEqual(self.sample, self.compact_sample)
+
+    def test_not_equal_to_model_of_different_type(self):
+        study = create_stub_study()
+        self.assertNotEqual(to_compact_model(study), self.compact_sample)
+        self.assertNotEqual(to_compact_model(study), self.sample)
+
+    def test_hashes_same_as_model(self):
+        self.assertEqual(hash(self.compact_sample), hash(self.sample))
+        self.assertEqual(len({self.compact_sample, self.sample}), 1)
+        self.assertEqual(len(_unique_models([self.compact_sample, self.sample])), 1)
+
+    def test_vars(self):
+        self.assertEqual(dict(vars(self.compact_sample)), vars(self.sample))
+
+    def test_str_same_as_model(self):
+        self.assertEqual(str(self.compact_sample), str(self.sample))
+
+    def test_cannot_add_properties(self):
+        self.assertRaises(AttributeError, setattr, self.compact_sample, "other", 1)
+
+    def test_copy(self):
+        copied = copy.copy(self.compact_sample)
+        self.assertIsNot(copied, self.compact_sample)
+        self.assertEqual(copied, self.compact_sample)
+
+    def test_pickle(self):
+        self.assertEqual(pickle.loads(pickle.dumps(self.compact_sample)), self.sample)
+
+    def test_json_encoding_same_as_model(self):
+        self.assertEqual(json.loads(json.dumps(self.compact_sample, cls=SampleJSONEncoder)),
+                         json.loads(json.dumps(self.sample, cls=SampleJSONEncoder)))
+        study = create_stub_study()
+        self.assertEqual(json.loads(json.dumps([to_compact_model(study)], cls=StudyJSONEncoder)),
+                         json.loads(json.dumps([study], cls=StudyJSONEncoder)))
+
+    def test_to_model(self):
+        for model_type in (Sample, Study, Library, MultiplexedLibrary, Well):
+            model = create_stub(model_type)
+            converted = to_model(to_compact_model(model))
+            self.assertEqual(type(converted), model_type)
+            self.assertEqual(vars(converted), vars(model))
+
+    def test_to_compact_model_with_unknown_type(self):
+        self.assertRaises(ValueError, to_compact_model, self.compact_sample)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import json
+import unittest
+
+from hgijson import JsonPropertyMapping, MappingJSONEncoderClassBuilder
+
+from sequencescape import Sample, Study, Library, MultiplexedLibrary, Well
+from sequencescape._fast_json_converters import FastJSONEncoderClassBuilder
+from sequencescape.compact_models import to_compact_model
+from sequencescape.json_converters import SampleJSONEncoder, SampleJSONDecoder, StudyJSONEncoder, StudyJSONDecoder, \
+    LibraryJSONEncoder, LibraryJSONDecoder, MultiplexedLibraryJSONEncoder, MultiplexedLibraryJSONDecoder, \
+    WellJSONEncoder, WellJSONDecoder, FastSampleJSONEncoder, FastSampleJSONDecoder, FastStudyJSONEncoder, \
+    FastStudyJSONDecoder, FastLibraryJSONEncoder, FastLibraryJSONDecoder, FastMultiplexedLibraryJSONEncoder, \
+    FastMultiplexedLibraryJSONDecoder, FastWellJSONEncoder, FastWellJSONDecoder
+from sequencescape.tests._helpers import create_stub
+
+_CONVERTERS = [
+    (Sample, SampleJSONEncoder, SampleJSONDecoder, FastSampleJSONEncoder, FastSampleJSONDecoder),
+    (Study, StudyJSONEncoder, StudyJSONDecoder, FastStudyJSONEncoder, FastStudyJSONDecoder),
+    (Library, LibraryJSONEncoder, LibraryJSONDecoder, FastLibraryJSONEncoder, FastLibraryJSONDecoder),
+    (MultiplexedLibrary, MultiplexedLibraryJSONEncoder, MultiplexedLibraryJSONDecoder,
+     FastMultiplexedLibraryJSONEncoder, FastMultiplexedLibraryJSONDecoder),
+    (Well, WellJSONEncoder, WellJSONDecoder, FastWellJSONEncoder, FastWellJSONDecoder)
+]
+
+
+def _create_models(model_type: type):
+    """
+    Creates models of the given type, including ones with unset properties and non-ASCII values.
+    :param model_type: the type of model to create
+    :return: the models
+    """
+    models = [create_stub(model_type), create_stub(model_type), model_type()]
+    models[1].internal_id += 1
+    models[1].name = "é\"\n"
+    return models
+
+
+class TestFastJSONConverters(unittest.TestCase):
+    """
+    Tests that the fast JSON encoders/decoders are equivalent to the encoders/decoders that they are generated from.
+    """
+    def test_encodes_same_json(self):
+        for model_type, encoder_type, _, fast_encoder_type, _ in _CONVERTERS:
+            models = _create_models(model_type)
+            for model in models:
+                self.assertEqual(json.dumps(model, cls=fast_encoder_type), json.dumps(model, cls=encoder_type))
+            self.assertEqual(json.dumps(models, cls=fast_encoder_type), json.dumps(models, cls=encoder_type))
+
+    def test_encodes_same_json_with_options(self):
+        for model_type, encoder_type, _, fast_encoder_type, _ in _CONVERTERS:
+            models = _create_models(model_type)
+            for options in ({"indent": 4, "sort_keys": True}, {"separators": (",", ":")}, {"ensure_ascii": False}):
+                self.assertEqual(json.dumps(models, cls=fast_encoder_type, **options),
+                                 json.dumps(models, cls=encoder_type, **options))
+
+    def test_default_same(self):
+        for model_type, encoder_type, _, fast_encoder_type, _ in _CONVERTERS:
+            models = _create_models(model_type)
+            self.assertEqual(fast_encoder_type().default(models[0]), encoder_type().default(models[0]))
+            self.assertEqual(fast_encoder_type().default(models), encoder_type().default(models))
+
+    def test_encodes_compact_models(self):
+        for model_type, encoder_type, _, fast_encoder_type, _ in _CONVERTERS:
+            models = [to_compact_model(model) for model in _create_models(model_type)]
+            self.assertEqual(json.dumps(models, cls=fast_encoder_type), json.dumps(models, cls=encoder_type))
+
+    def test_cannot_encode_other_types(self):
+        self.assertRaises(TypeError, json.dumps, create_stub(Study), cls=FastSampleJSONEncoder)
+        self.assertRaises(TypeError, json.dumps, object(), cls=FastSampleJSONEncoder)
+
+    def test_decodes_same_models(self):
+        for model_type, encoder_type, decoder_type, _, fast_decoder_type in _CONVERTERS:
+            models = _create_models(model_type)
+            encoded = json.dumps(models, cls=encoder_type)
+            decoded = fast_decoder_type().decode(encoded)
+            self.assertEqual(decoded, decoder_type().decode(encoded))
+            self.assertEqual(decoded, models)
+            for model, decoded_model in zip(models, decoded):
+                self.assertEqual(type(decoded_model), model_type)
+                self.assertEqual(vars(decoded_model), vars(model))
+
+    def test_decode_parsed_same(self):
+        for model_type, encoder_type, decoder_type, _, fast_decoder_type in _CONVERTERS:
+            model = create_stub(model_type)
+            encoded = encoder_type().default(model)
+            self.assertEqual(fast_decoder_type().decode_parsed(encoded), decoder_type().decode_parsed(encoded))
+
+    def test_with_json_loads(self):
+        encoded = json.dumps(create_stub(Sample), cls=SampleJSONEncoder)
+        self.assertEqual(json.loads(encoded, cls=FastSampleJSONDecoder), create_stub(Sample))
+
+    def test_decode_with_missing_property(self):
+        encoded = json.loads(json.dumps(create_stub(Sample), cls=SampleJSONEncoder))
+        del encoded["name"]
+        self.assertRaises(KeyError, FastSampleJSONDecoder().decode_parsed, encoded)
+        self.assertRaises(KeyError, SampleJSONDecoder().decode_parsed, encoded)
+
+    def test_cannot_build_from_other_mappings(self):
+        encoder_type = MappingJSONEncoderClassBuilder(Sample, [JsonPropertyMapping("name", "name")]).build()
+        self.assertRaises(ValueError, FastJSONEncoderClassBuilder(Sample, encoder_type).build)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from sequencescape.compact_models import to_compact_model
+from sequencescape.enums import Property
+from sequencescape.in_memory import InMemoryDatabase, InMemorySampleMapper, InMemoryStudyMapper, \
+    InMemoryLibraryMapper, InMemoryMultiplexedLibraryMapper, InMemoryWellMapper
+from sequencescape.models import Sample, Study
+from sequencescape.tests._helpers import create_stub_sample, create_stub_samples, create_stub_study, \
+    create_stub_library, create_stub_multiplexed_library, create_stub_well
+
+
+def _create_studies(number_of_studies: int) -> List[Study]:
+    """
+    Creates studies with unique internal IDs and names.
+    :param number_of_studies: the number of studies to create
+    :return: the studies
+    """
+    studies = []    # type: List[Study]
+    for i in range(number_of_studies):
+        study = create_stub_study()
+        study.internal_id = i
+        study.name = "study_%d" % i
+        studies.append(study)
+    return studies
+
+
+class TestInMemoryMapper(unittest.TestCase):
+    """
+    Tests for `InMemoryMapper`, using `InMemorySampleMapper`.
+    """
+    def setUp(self):
+        self._samples = create_stub_samples(5)
+        self._mapper = InMemorySampleMapper()
+        self._mapper.add(self._samples)
+
+    def test_add_single_model(self):
+        sample = create_stub_sample()
+        sample.internal_id = 100
+        self._mapper.add(sample)
+        self.assertEqual(self._mapper.get_by_id(100), [sample])
+
+    def test_add_none(self):
+        self.assertRaises(ValueError, self._mapper.add, None)
+
+    def test_add_model_of_other_type(self):
+        self.assertRaises(ValueError, self._mapper.add, create_stub_study())
+
+    def test_add_duplicate_internal_id(self):
+        sample = create_stub_sample()
+        sample.internal_id = self._samples[0].internal_id
+        self.assertRaises(ValueError, self._mapper.add, sample)
+        new_samples = create_stub_samples(7)[5:]
+        new_samples[1].internal_id = new_samples[0].internal_id
+        self.assertRaises(ValueError, self._mapper.add, new_samples)
+        self.assertEqual(len(self._mapper), len(self._samples))
+
+    def test_add_compact_models(self):
+        sample = create_stub_sample()
+        sample.internal_id = 100
+        self._mapper.add(to_compact_model(sample))
+        self.assertEqual(self._mapper.get_by_name(sample.name)[-1], sample)
+
+    def test_get_all(self):
+        self.assertEqual(self._mapper.get_all(), self._samples)
+        self.assertEqual(list(self._mapper.iter_all()), self._samples)
+
+    def test_get_by_indexed_properties(self):
+        for sample in self._samples:
+            self.assertEqual(self._mapper.get_by_id(sample.internal_id), [sample])
+            self.assertEqual(self._mapper.get_by_name(sample.name), [sample])
+            self.assertEqual(self._mapper.get_by_accession_number(sample.accession_number), [sample])
+
+    def test_get_by_many_values(self):
+        self.assertEqual(self._mapper.get_by_name(["sample_3", "sample_1", "other", "sample_3"]),
+                         [self._samples[3], self._samples[1]])
+
+    def test_get_by_duplicate_value(self):
+        samples = create_stub_samples(8)[5:]
+        for sample in samples:
+            sample.name = "duplicate"
+        self._mapper.add(samples)
+        self.assertEqual(self._mapper.get_by_name("duplicate"), samples)
+
+    def test_get_by_many_properties(self):
+        results = self._mapper.get_by_property_value([(Property.INTERNAL_ID, 0), (Property.NAME, "sample_1")])
+        self.assertCountEqual(results, self._samples[0:2])
+
+    def test_get_by_property_not_indexed(self):
+        self._samples[2].organism = "other"
+        mapper = InMemorySampleMapper()
+        mapper.add(self._samples)
+        self.assertEqual(mapper.get_by_property_value("organism", ["other"]), [self._samples[2]])
+        self.assertEqual(list(mapper.iter_by_property_value("organism", ["other"])), [self._samples[2]])
+
+    def test_get_by_unknown_property(self):
+        self.assertRaises(ValueError, self._mapper.get_by_property_value, "study_type", ["value"])
+
+    def test_changes_to_added_models_do_not_change_held_models(self):
+        self._samples[0].name = "changed"
+        self.assertEqual(self._mapper.get_by_id(0)[0].name, "sample_0")
+
+    def test_changes_to_results_do_not_change_held_models(self):
+        self._mapper.get_by_id(0)[0].name = "changed"
+        self._mapper.get_all()[0].name = "changed"
+        self.assertEqual(self._mapper.get_by_id(0)[0].name, "sample_0")
+
+    def test_clear(self):
+        self._mapper.database.clear()
+        self.assertEqual(self._mapper.get_all(), [])
+        self.assertEqual(self._mapper.get_by_id(0), [])
+
+    def test_concurrent_adds_and_gets(self):
+        mapper = InMemorySampleMapper()
+        samples = create_stub_samples(1000)
+
+        def add_and_get(sample: Sample) -> List[Sample]:
+            mapper.add(sample)
+            return mapper.get_by_name(sample.name)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(add_and_get, samples))
+        self.assertEqual(results, [[sample] for sample in samples])
+        self.assertCountEqual(mapper.get_all(), samples)
+
+
+class TestInMemoryAssociations(unittest.TestCase):
+    """
+    Tests for the associations of `InMemorySampleMapper` and `InMemoryStudyMapper`.
+    """
+    def setUp(self):
+        self._samples = create_stub_samples(4)
+        self._studies = _create_studies(3)
+        database = InMemoryDatabase()
+        self._sample_mapper = InMemorySampleMapper(database)
+        self._study_mapper = InMemoryStudyMapper(database)
+        self._sample_mapper.add(self._samples)
+        self._study_mapper.add(self._studies)
+
+    def test_no_associations(self):
+        self.assertEqual(self._sample_mapper.get_associated_with_study(self._studies[0]), [])
+        self.assertEqual(self._study_mapper.get_associated_with_sample(self._samples), [])
+
+    def test_set_association_with_study(self):
+        self._sample_mapper.set_association_with_study(self._samples[1:3], self._studies[0])
+        self.assertEqual(self._sample_mapper.get_associated_with_study(self._studies[0]), self._samples[1:3])
+        self.assertEqual(self._study_mapper.get_associated_with_sample(self._samples[1]), [self._studies[0]])
+        self.assertEqual(self._sample_mapper.get_associated_with_study(self._studies[1]), [])
+
+    def test_set_association_with_sample(self):
+        self._study_mapper.set_association_with_sample(self._studies[0:2], self._samples[0])
+        self.assertEqual(self._study_mapper.get_associated_with_sample(self._samples[0]), self._studies[0:2])
+        self.assertEqual(self._sample_mapper.get_associated_with_study(self._studies[1]), [self._samples[0]])
+
+    def test_set_association_many_to_many(self):
+        self._sample_mapper.set_association_with_study(self._samples, self._studies[0:2])
+        self._sample_mapper.set_association_with_study(self._samples[0], self._studies[0])
+        self.assertEqual(self._sample_mapper.get_associated_with_study(self._studies[0:2]), self._samples)
+        for sample in self._samples:
+            self.assertEqual(self._study_mapper.get_associated_with_sample(sample), self._studies[0:2])
+
+    def test_set_association_with_non_existent_model(self):
+        study = create_stub_study()
+        study.internal_id = 100
+        self.assertRaises(ValueError, self._sample_mapper.set_association_with_study, self._samples[0], study)
+        self.assertRaises(ValueError, self._sample_mapper.get_associated_with_study, study)
+        self.assertEqual(self._study_mapper.get_associated_with_sample(self._samples[0]), [])
+
+    def test_set_association_with_model_without_internal_id(self):
+        self.assertRaises(ValueError, self._sample_mapper.set_association_with_study, Sample(), self._studies[0])
+
+    def test_associations_not_shared_between_databases(self):
+        sample_mapper = InMemorySampleMapper()
+        sample_mapper.add(self._samples)
+        self.assertRaises(ValueError, sample_mapper.set_association_with_study, self._samples[0], self._studies[0])
+
+    def test_clear_removes_associations(self):
+        self._sample_mapper.set_association_with_study(self._samples, self._studies[0])
+        self._sample_mapper.database.clear()
+        self._sample_mapper.add(self._samples)
+        self._study_mapper.add(self._studies)
+        self.assertEqual(self._sample_mapper.get_associated_with_study(self._studies[0]), [])
+
+
+class TestInMemoryMappersOfOtherTypes(unittest.TestCase):
+    """
+    Tests for `InMemoryLibraryMapper`, `InMemoryMultiplexedLibraryMapper` and `InMemoryWellMapper`.
+    """
+    def test_get_by_name_and_id(self):
+        for mapper, model in ((InMemoryLibraryMapper(), create_stub_library()),
+                              (InMemoryMultiplexedLibraryMapper(), create_stub_multiplexed_library()),
+                              (InMemoryWellMapper(), create_stub_well())):
+            mapper.add(model)
+            self.assertEqual(mapper.get_by_name(model.name), [model])
+            self.assertEqual(mapper.get_by_id(model.internal_id), [model])
+            self.assertIsInstance(mapper.get_by_id(model.internal_id)[0], type(model))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from sequencescape._sqlalchemy.database_connector import SQLAlchemyDatabaseConnector
+from sequencescape._sqlalchemy.mappers import SQLAlchemySampleMapper
+from sequencescape.enums import Property
+from sequencescape.lookup_index import LookupIndex, IndexedSampleMapper, IndexedLibraryMapper
+from sequencescape.models import Sample, Library
+from sequencescape.tests._helpers import create_stub_sample, create_stub_samples, create_stub_library
+from sequencescape.tests._mocks import MockSampleMapper, MockLibraryMapper
+from sequencescape.tests.sqlalchemy.stub_database import create_stub_database
+
+
+class TestLookupIndex(unittest.TestCase):
+    """
+    Tests for `LookupIndex`.
+    """
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._location = os.path.join(self._directory, "samples.index")
+        self._samples = create_stub_samples(20)
+        LookupIndex.build(self._samples, Sample, self._location)
+        self._index = LookupIndex(self._location)
+
+    def tearDown(self):
+        self._index.close()
+        shutil.rmtree(self._directory)
+
+    def test_model_type(self):
+        self.assertEqual(self._index.model_type, Sample)
+
+    def test_indexed_properties(self):
+        self.assertEqual(self._index.indexed_properties,
+                         [Property.INTERNAL_ID, Property.NAME, Property.ACCESSION_NUMBER])
+        LookupIndex.build([], Library, self._location)
+        with LookupIndex(self._location) as index:
+            self.assertEqual(index.indexed_properties, [Property.INTERNAL_ID, Property.NAME])
+
+    def test_len(self):
+        self.assertEqual(len(self._index), len(self._samples))
+
+    def test_get_all(self):
+        self.assertEqual(self._index.get_all(), self._samples)
+
+    def test_get_by_property_value(self):
+        for sample in self._samples:
+            self.assertEqual(self._index.get_by_property_value(Property.INTERNAL_ID, [sample.internal_id]), [sample])
+            self.assertEqual(self._index.get_by_property_value(Property.NAME, [sample.name]), [sample])
+            self.assertEqual(
+                self._index.get_by_property_value(Property.ACCESSION_NUMBER, [sample.accession_number]), [sample])
+
+    def test_get_by_many_property_values(self):
+        names = [sample.name for sample in reversed(self._samples[5:10])]
+        self.assertEqual(self._index.get_by_property_value(Property.NAME, names), list(reversed(self._samples[5:10])))
+
+    def test_get_by_property_value_not_found(self):
+        self.assertEqual(self._index.get_by_property_value(Property.NAME, ["other", "SAMPLE_1", ""]), [])
+        self.assertEqual(self._index.get_by_property_value(Property.INTERNAL_ID, [-1, len(self._samples)]), [])
+
+    def test_get_by_property_value_of_other_type(self):
+        self.assertEqual(self._index.get_by_property_value(Property.INTERNAL_ID, ["1", None]), [])
+        self.assertEqual(self._index.get_by_property_value(Property.NAME, [1, None]), [])
+
+    def test_get_by_property_value_with_duplicate_values(self):
+        samples = create_stub_samples(6)
+        for sample in samples[2:5]:
+            sample.name = "duplicate"
+        LookupIndex.build(samples, Sample, self._location)
+        self._index.reload()
+        self.assertCountEqual(self._index.get_by_property_value(Property.NAME, ["duplicate"]), samples[2:5])
+        self.assertCountEqual(self._index.get_by_property_value(Property.NAME, ["duplicate", "sample_2"]), samples[2:5])
+
+    def test_models_without_values_not_indexed(self):
+        samples = create_stub_samples(3)
+        samples[1].accession_number = None
+        samples[2].internal_id = None
+        LookupIndex.build(samples, Sample, self._location)
+        self._index.reload()
+        self.assertEqual(self._index.get_by_property_value(Property.NAME, ["sample_1", "sample_2"]), samples[1:])
+        self.assertEqual(self._index.get_by_property_value(Property.ACCESSION_NUMBER, [None]), [])
+        self.assertEqual(self._index.get_by_property_value(Property.INTERNAL_ID, [None]), [])
+
+    def test_get_by_property_value_not_indexed(self):
+        self.assertRaises(ValueError, self._index.get_by_property_value, "organism", [self._samples[0].organism])
+
+    def test_reload_when_not_stale(self):
+        self.assertFalse(self._index.is_stale())
+        self.assertFalse(self._index.reload())
+
+    def test_reload_when_rebuilt(self):
+        samples = create_stub_samples(30)
+        LookupIndex.build(samples, Sample, self._location)
+        self.assertTrue(self._index.is_stale())
+        self.assertEqual(len(self._index), len(self._samples))
+        self.assertTrue(self._index.reload())
+        self.assertFalse(self._index.is_stale())
+        self.assertEqual(self._index.get_by_property_value(Property.NAME, ["sample_25"]), [samples[25]])
+
+    def test_build_leaves_no_temporary_files(self):
+        LookupIndex.build(self._samples, Sample, self._location)
+        self.assertRaises(ValueError, LookupIndex.build, [create_stub_library()], Sample, self._location)
+        self.assertEqual(os.listdir(self._directory), [os.path.basename(self._location)])
+
+    def test_open_invalid_file(self):
+        for contents in (b"", b"x" * 100):
+            with open(self._location, "wb") as file:
+                file.write(contents)
+            self.assertRaises(ValueError, LookupIndex, self._location)
+
+    def test_open_truncated_file(self):
+        with open(self._location, "rb") as file:
+            contents = file.read()
+        with open(self._location, "wb") as file:
+            file.write(contents[:-1])
+        self.assertRaises(ValueError, LookupIndex, self._location)
+
+
+class TestIndexedMapper(unittest.TestCase):
+    """
+    Tests for `IndexedMapper`, using `IndexedSampleMapper`.
+    """
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._location = os.path.join(self._directory, "samples.index")
+        self._samples = create_stub_samples(5)
+        self._mapper = MockSampleMapper()
+        self._mapper.get_all.return_value = self._samples
+        self._indexed_mapper = IndexedSampleMapper(self._mapper, self._location)
+
+    def tearDown(self):
+        self._indexed_mapper.index.close()
+        shutil.rmtree(self._directory)
+
+    def test_index_built_when_missing(self):
+        self.assertTrue(os.path.exists(self._location))
+        self.assertEqual(self._mapper.get_all.call_count, 1)
+        self.assertEqual(len(self._indexed_mapper.index), len(self._samples))
+
+    def test_existing_index_used(self):
+        indexed_mapper = IndexedSampleMapper(self._mapper, self._location)
+        self.assertEqual(self._mapper.get_all.call_count, 1)
+        indexed_mapper.index.close()
+
+    def test_existing_index_of_other_type(self):
+        location = os.path.join(self._directory, "libraries.index")
+        LookupIndex.build([create_stub_library()], Library, location)
+        self.assertRaises(ValueError, IndexedSampleMapper, self._mapper, location)
+
+    def test_get_by_indexed_property(self):
+        self.assertEqual(self._indexed_mapper.get_by_name(self._samples[1].name), [self._samples[1]])
+        self.assertEqual(self._indexed_mapper.get_by_id([0, 2]), [self._samples[0], self._samples[2]])
+        self.assertEqual(self._indexed_mapper.get_by_accession_number(self._samples[3].accession_number),
+                         [self._samples[3]])
+        self._mapper._get_by_property_value_sequence.assert_not_called()
+
+    def test_get_by_many_properties(self):
+        results = self._indexed_mapper.get_by_property_value([(Property.INTERNAL_ID, 0), (Property.NAME, "sample_1")])
+        self.assertCountEqual(results, self._samples[0:2])
+        self._mapper._get_by_property_value_sequence.assert_not_called()
+
+    def test_iter_by_indexed_property(self):
+        self.assertEqual(list(self._indexed_mapper.iter_by_property_value(Property.NAME, "sample_1")),
+                         [self._samples[1]])
+        self._mapper._get_by_property_value_sequence.assert_not_called()
+
+    def test_get_by_property_not_indexed(self):
+        self._mapper._get_by_property_value_sequence.return_value = self._samples
+        self.assertEqual(self._indexed_mapper.get_by_property_value("organism", self._samples[0].organism),
+                         self._samples)
+        self._mapper._get_by_property_value_sequence.assert_called_once_with("organism", [self._samples[0].organism])
+
+    def test_add_not_indexed_until_rebuilt(self):
+        sample = create_stub_sample()
+        sample.name = "new"
+        self._indexed_mapper.add(sample)
+        self._mapper.add.assert_called_once_with(sample)
+        self.assertEqual(self._indexed_mapper.get_by_name("new"), [])
+        self._samples.append(sample)
+        self._indexed_mapper.rebuild()
+        self.assertEqual(self._indexed_mapper.get_by_name("new"), [sample])
+
+    def test_auto_reload(self):
+        indexed_mapper = IndexedSampleMapper(self._mapper, self._location, auto_reload=True)
+        sample = create_stub_sample()
+        sample.name = "new"
+        self._samples.append(sample)
+        self._indexed_mapper.rebuild()
+        self.assertEqual(indexed_mapper.get_by_name("new"), [sample])
+        indexed_mapper.index.close()
+
+
+class TestIndexedLibraryMapper(unittest.TestCase):
+    """
+    Tests for `IndexedLibraryMapper`.
+    """
+    def test_get_by_name(self):
+        directory = tempfile.mkdtemp()
+        try:
+            library = create_stub_library()
+            mapper = MockLibraryMapper()
+            mapper.get_all.return_value = [library]
+            indexed_mapper = IndexedLibraryMapper(mapper, os.path.join(directory, "libraries.index"))
+            self.assertEqual(indexed_mapper.get_by_name(library.name), [library])
+            self.assertIsInstance(indexed_mapper.get_by_name(library.name)[0], Library)
+            mapper._get_by_property_value_sequence.assert_not_called()
+            indexed_mapper.index.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestIndexedSampleMapper(unittest.TestCase):
+    """
+    Tests for `IndexedSampleMapper`, indexing the samples in a database.
+    """
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        database_location, dialect = create_stub_database()
+        self._mapper = SQLAlchemySampleMapper(SQLAlchemyDatabaseConnector("%s:///%s" % (dialect, database_location)))
+        self._samples = create_stub_samples(10)
+        self._mapper.add(self._samples)
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def test_resolve_name_to_internal_id_and_back(self):
+        indexed_mapper = IndexedSampleMapper(self._mapper, os.path.join(self._directory, "samples.index"))
+        sample = indexed_mapper.get_by_name("sample_3")[0]
+        self.assertEqual(sample.internal_id, 3)
+        self.assertEqual(indexed_mapper.get_by_id(sample.internal_id), [self._samples[3]])
+        self.assertEqual(indexed_mapper.get_by_accession_number("accession_3"), [self._samples[3]])
+        indexed_mapper.index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
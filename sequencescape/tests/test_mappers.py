@@ -1,8 +1,10 @@
 import unittest
+from unittest.mock import call
 
 from sequencescape.enums import Property
+from sequencescape.mappers import Mapper
 from sequencescape.tests._mocks import MockMapper, MockNamedMapper, MockInternalIdMapper, \
-    MockAccessionNumberMapper
+    MockAccessionNumberMapper, MockInternalIdModel
 
 
 class MapperTest(unittest.TestCase):
@@ -33,6 +35,33 @@ class MapperTest(unittest.TestCase):
         self._mapper.get_by_property_value(property_value_tuples)
         self._mapper._get_by_property_value_tuple.assert_called_once_with(property_value_tuples)
 
+    def test_iter_all(self):
+        self._mapper.get_all.return_value = MapperTest._VALUES
+        self.assertEqual(list(self._mapper.iter_all()), MapperTest._VALUES)
+
+    def test_iter_by_property_value(self):
+        self._mapper._get_by_property_value_sequence.return_value = MapperTest._VALUES
+        self.assertEqual(list(self._mapper.iter_by_property_value(Property.NAME, MapperTest._VALUES)),
+                         MapperTest._VALUES)
+        self._mapper._get_by_property_value_sequence.assert_called_once_with(Property.NAME, MapperTest._VALUES)
+
+    def test__get_by_property_value_tuple_groups_by_property(self):
+        property_value_tuples = [
+            (Property.NAME, MapperTest._VALUES[0]), (Property.ACCESSION_NUMBER, MapperTest._VALUES[1]),
+            (Property.NAME, MapperTest._VALUES[2]), (Property.NAME, MapperTest._VALUES[0])]
+        Mapper._get_by_property_value_tuple(self._mapper, property_value_tuples)
+        self._mapper._get_by_property_value_sequence.assert_has_calls([
+            call(Property.NAME, [MapperTest._VALUES[0], MapperTest._VALUES[2]]),
+            call(Property.ACCESSION_NUMBER, [MapperTest._VALUES[1]])])
+        self.assertEqual(self._mapper._get_by_property_value_sequence.call_count, 2)
+
+    def test__get_by_property_value_tuple_removes_duplicate_results(self):
+        models = [MockInternalIdModel(internal_id=1), MockInternalIdModel(internal_id=2)]
+        self._mapper._get_by_property_value_sequence.return_value = models
+        property_value_tuples = [(Property.NAME, MapperTest._VALUES[0]), (Property.INTERNAL_ID, [1, 2])]
+        results = Mapper._get_by_property_value_tuple(self._mapper, property_value_tuples)
+        self.assertEqual(results, models)
+
 
 class NamedMapperTest(unittest.TestCase):
     """
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, inspect
+
+from sequencescape.api import Connection
+from sequencescape.mirror import SequencescapeMirror, MirrorSyncStatistics, create_mirror
+from sequencescape.tests._helpers import create_stub_samples, create_stub_study, create_stub_library
+from sequencescape.tests.sqlalchemy.stub_database import create_stub_database
+
+
+class TestSequencescapeMirror(unittest.TestCase):
+    """
+    Tests for `SequencescapeMirror`.
+    """
+    def setUp(self):
+        database_location, dialect = create_stub_database()
+        self._source_url = "%s:///%s" % (dialect, database_location)
+        self._source = Connection(self._source_url)
+        file_handle, self._mirror_location = tempfile.mkstemp()
+        os.close(file_handle)
+        self._mirror = SequencescapeMirror(self._source_url, self._mirror_location, batch_size=3)
+
+        self._samples = create_stub_samples(10, 1)
+        self._study = create_stub_study()
+        self._library = create_stub_library()
+        self._source.sample.add(self._samples)
+        self._source.study.add(self._study)
+        self._source.library.add(self._library)
+        self._source.sample.set_association_with_study(self._samples[0:2], self._study)
+
+    def tearDown(self):
+        os.remove(self._mirror_location)
+
+    def test_constructor_with_invalid_source(self):
+        self.assertRaises(ValueError, SequencescapeMirror, "invalid", self._mirror_location)
+
+    def test_sync_copies_all(self):
+        statistics = self._mirror.sync()
+        self.assertEqual(statistics.rows_added["current_samples"], 10)
+        self.assertEqual(statistics.rows_added["current_study_samples"], 2)
+        mirror = self._mirror.connect()
+        self.assertCountEqual(mirror.sample.get_all(), self._samples)
+        self.assertEqual(mirror.study.get_all(), [self._study])
+        self.assertEqual(mirror.library.get_by_name(self._library.name), [self._library])
+        self.assertCountEqual(mirror.sample.get_associated_with_study(self._study), self._samples[0:2])
+
+    def test_sync_only_copies_new_rows(self):
+        self._mirror.sync()
+        new_samples = create_stub_samples(4, 11)
+        self._source.sample.add(new_samples)
+        self._source.sample.set_association_with_study(new_samples[0], self._study)
+
+        statistics = self._mirror.sync()
+        self.assertEqual(statistics.rows_added["current_samples"], 4)
+        self.assertEqual(statistics.rows_added["current_studies"], 0)
+        self.assertEqual(statistics.rows_added["current_study_samples"], 3)
+        mirror = self._mirror.connect()
+        self.assertCountEqual(mirror.sample.get_all(), self._samples + new_samples)
+        self.assertCountEqual(mirror.sample.get_associated_with_study(self._study),
+                              self._samples[0:2] + new_samples[0:1])
+
+    def test_full_sync_replaces_all(self):
+        self._mirror.sync()
+        statistics = self._mirror.sync(full=True)
+        self.assertEqual(statistics, MirrorSyncStatistics(rows_added={
+            "current_samples": 10, "current_studies": 1, "current_library_tubes": 1,
+            "current_multiplexed_library_tubes": 0, "current_wells": 0, "current_study_samples": 2}, full=True))
+        self.assertCountEqual(self._mirror.connect().sample.get_all(), self._samples)
+
+    def test_mirror_has_indexes(self):
+        self._mirror.sync()
+        self._mirror.sync()
+        inspector = inspect(create_engine(self._mirror.mirror_database_location))
+        indexed_columns = [index["column_names"] for index in inspector.get_indexes("current_samples")]
+        self.assertCountEqual(indexed_columns, [["name"], ["accession_number"]])
+        indexed_columns = [index["column_names"] for index in inspector.get_indexes("current_wells")]
+        self.assertEqual(indexed_columns, [["name"]])
+
+
+class TestCreateMirror(unittest.TestCase):
+    """
+    Tests for `create_mirror`.
+    """
+    def test_create_mirror(self):
+        database_location, dialect = create_stub_database()
+        source_url = "%s:///%s" % (dialect, database_location)
+        samples = create_stub_samples(2, 1)
+        Connection(source_url).sample.add(samples)
+        file_handle, mirror_location = tempfile.mkstemp()
+        os.close(file_handle)
+        try:
+            mirror = create_mirror(source_url, mirror_location)
+            self.assertCountEqual(mirror.connect().sample.get_all(), samples)
+        finally:
+            os.remove(mirror_location)
+
+
+if __name__ == "__main__":
+    unittest.main()
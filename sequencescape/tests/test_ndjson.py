@@ -0,0 +1,138 @@
+import io
+import unittest
+
+from sequencescape import Sample, Study, Library, MultiplexedLibrary, Well
+from sequencescape._sqlalchemy.database_connector import SQLAlchemyDatabaseConnector
+from sequencescape._sqlalchemy.mappers import SQLAlchemySampleMapper
+from sequencescape.compact_models import to_compact_model
+from sequencescape.ndjson import NDJSONWriter, NDJSONReader, write_ndjson, read_ndjson, export_ndjson, import_ndjson
+from sequencescape.tests._helpers import create_stub, create_stub_samples
+from sequencescape.tests.sqlalchemy.stub_database import create_stub_database
+
+
+class _RecordingStream(io.StringIO):
+    """
+    Text stream that records the size of each write made to it.
+    """
+    def __init__(self):
+        super().__init__()
+        self.write_sizes = []
+
+    def write(self, data: str) -> int:
+        self.write_sizes.append(len(data))
+        return super().write(data)
+
+
+class TestNDJSONWriter(unittest.TestCase):
+    """
+    Tests for `NDJSONWriter`.
+    """
+    def setUp(self):
+        self.samples = create_stub_samples(10)
+
+    def test_writes_one_line_per_model(self):
+        stream = io.StringIO()
+        with NDJSONWriter(Sample, stream) as writer:
+            writer.write_all(self.samples)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 10)
+        self.assertEqual(writer.models_written, 10)
+
+    def test_buffers_writes(self):
+        stream = _RecordingStream()
+        writer = NDJSONWriter(Sample, stream, buffer_size=1000)
+        writer.write_all(self.samples)
+        writer.close()
+        line_size = len(stream.getvalue()) // 10
+        self.assertGreater(len(stream.write_sizes), 1)
+        self.assertLess(len(stream.write_sizes), 10)
+        for write_size in stream.write_sizes:
+            self.assertLess(write_size, 1000 + line_size + 1)
+
+    def test_nothing_written_until_buffer_full(self):
+        stream = io.StringIO()
+        writer = NDJSONWriter(Sample, stream)
+        writer.write(self.samples[0])
+        self.assertEqual(stream.getvalue(), "")
+        writer.flush()
+        self.assertEqual(len(stream.getvalue().splitlines()), 1)
+
+    def test_write_to_binary_stream(self):
+        stream = io.BytesIO()
+        write_ndjson(Sample, self.samples, stream)
+        stream.seek(0)
+        self.assertEqual(list(read_ndjson(Sample, stream)), self.samples)
+
+    def test_write_compact_models(self):
+        stream = io.StringIO()
+        write_ndjson(Sample, [to_compact_model(sample) for sample in self.samples], stream)
+        stream.seek(0)
+        self.assertEqual(list(read_ndjson(Sample, stream)), self.samples)
+
+    def test_write_after_close(self):
+        writer = NDJSONWriter(Sample, io.StringIO())
+        writer.close()
+        self.assertRaises(ValueError, writer.write, self.samples[0])
+
+    def test_invalid_buffer_size(self):
+        self.assertRaises(ValueError, NDJSONWriter, Sample, io.StringIO(), buffer_size=0)
+
+    def test_unknown_model_type(self):
+        self.assertRaises(ValueError, NDJSONWriter, object, io.StringIO())
+
+
+class TestNDJSONReader(unittest.TestCase):
+    """
+    Tests for `NDJSONReader`.
+    """
+    def test_round_trip_all_model_types(self):
+        for model_type in (Sample, Study, Library, MultiplexedLibrary, Well):
+            models = [create_stub(model_type), create_stub(model_type)]
+            models[1].internal_id += 1
+            stream = io.StringIO()
+            self.assertEqual(write_ndjson(model_type, models, stream), 2)
+            stream.seek(0)
+            self.assertEqual(list(NDJSONReader(model_type, stream)), models)
+
+    def test_skips_blank_lines(self):
+        stream = io.StringIO()
+        write_ndjson(Sample, create_stub_samples(2), stream)
+        stream = io.StringIO("\n" + stream.getvalue().replace("\n", "\n\n"))
+        self.assertEqual(len(list(read_ndjson(Sample, stream))), 2)
+
+    def test_reads_lazily(self):
+        stream = io.StringIO()
+        write_ndjson(Sample, create_stub_samples(1), stream)
+        stream = io.StringIO(stream.getvalue() + "invalid\n")
+        models = read_ndjson(Sample, stream)
+        self.assertEqual(next(models).name, "sample_0")
+        self.assertRaisesRegex(ValueError, "line 2", next, models)
+
+
+class TestExportAndImportNDJSON(unittest.TestCase):
+    """
+    Tests for `export_ndjson` and `import_ndjson`.
+    """
+    @staticmethod
+    def _create_mapper() -> SQLAlchemySampleMapper:
+        database_location, dialect = create_stub_database()
+        return SQLAlchemySampleMapper(SQLAlchemyDatabaseConnector("%s:///%s" % (dialect, database_location)))
+
+    def test_export_and_import(self):
+        samples = create_stub_samples(25)
+        source = self._create_mapper()
+        source.add(samples)
+
+        stream = io.BytesIO()
+        self.assertEqual(export_ndjson(source, Sample, stream, batch_size=10), 25)
+        stream.seek(0)
+        destination = self._create_mapper()
+        self.assertEqual(import_ndjson(destination, Sample, stream, batch_size=10), 25)
+        self.assertCountEqual(destination.get_all(), samples)
+
+    def test_import_with_invalid_batch_size(self):
+        self.assertRaises(ValueError, import_ndjson, self._create_mapper(), Sample, io.StringIO(), batch_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()